@@ -0,0 +1,285 @@
+"""Many create/update/delete operations in one request and one transaction.
+
+Operations run in the order given. Consecutive operations of the same kind,
+entity and set of fields are applied as one set-based statement over
+``unnest()``ed parameter arrays, inside a savepoint of its own, so 500
+status changes cost one UPDATE statement and one firing of each
+statement-level trigger instead of 500 requests. A run is split where it
+would touch the same record twice, which keeps the order of writes to one
+record. Row-level triggers (validation, balances, audit) fire for every row
+as with the per-entity endpoints.
+
+The batch is all or nothing: if any operation fails, nothing is written and
+the response names the first operation that failed.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, ValidationError
+
+from .bulk import validation_message
+from .cache import reference_cache
+from .db import PostgresError, db
+from .entities import BET, COMPETITION, CUSTOMER, EVENT, RESULT, TEAM, Entity
+from .models import (
+    BatchOperationResult,
+    BatchRequest,
+    BatchResult,
+    BetCreate,
+    BetPatch,
+    CompetitionCreate,
+    CompetitionPatch,
+    CustomerCreate,
+    CustomerPatch,
+    EventCreate,
+    EventPatch,
+    PatchModel,
+    ResultCreate,
+    ResultPatch,
+    TeamCreate,
+    TeamPatch,
+)
+
+
+router = APIRouter()
+
+BATCH_MAX_OPERATIONS = 10_000
+
+# Enums and JSONB travel as text arrays and are cast in SQL; money_amount
+# as separate amount and currency arrays
+_CAST_FROM_TEXT = {"currency_code", "event_status", "customer_status", "placement_status", "bet_outcome", "jsonb"}
+
+
+@dataclass(frozen=True)
+class _Target:
+    entity: Entity
+    create: type[BaseModel]
+    patch: type[PatchModel]
+    # Writable columns and their SQL types
+    types: dict[str, str]
+    # Reference cache namespace to invalidate after a write
+    cached: Optional[str] = None
+
+
+_TARGETS = {
+    "teams": _Target(TEAM, TeamCreate, TeamPatch, {"name": "text", "country": "text", "sport": "text"}, "teams"),
+    "competitions": _Target(
+        COMPETITION,
+        CompetitionCreate,
+        CompetitionPatch,
+        {"name": "text", "country": "text", "sport": "text", "active": "boolean"},
+        "competitions",
+    ),
+    "events": _Target(
+        EVENT,
+        EventCreate,
+        EventPatch,
+        {
+            "date": "timestamptz", "competition_id": "bigint", "team_a_id": "bigint", "team_b_id": "bigint",
+            "status": "event_status",
+        },
+    ),
+    "results": _Target(
+        RESULT, ResultCreate, ResultPatch, {"event_id": "bigint", "score_a": "integer", "score_b": "integer"}
+    ),
+    "customers": _Target(
+        CUSTOMER,
+        CustomerCreate,
+        CustomerPatch,
+        {
+            "username": "text", "password": "text", "real_name": "text", "currency": "currency_code",
+            "status": "customer_status", "balance": "money_amount", "preferences": "jsonb",
+        },
+    ),
+    "bets": _Target(
+        BET,
+        BetCreate,
+        BetPatch,
+        {
+            "bookie": "text", "customer_id": "bigint", "bookie_bet_id": "text", "bet_type": "text",
+            "event_id": "bigint", "sport": "text", "placement_status": "placement_status",
+            "outcome": "bet_outcome", "stake": "money_amount", "odds": "numeric", "placement_data": "jsonb",
+        },
+    ),
+}
+
+
+@dataclass
+class _Op:
+    index: int
+    op: str
+    entity: str
+    id: Optional[int]
+    values: dict[str, Any]
+
+
+def _prepare(request: BatchRequest) -> list[_Op]:
+    # Validates every operation before anything is written
+    ops: list[_Op] = []
+    for index, operation in enumerate(request.operations):
+        target = _TARGETS[operation.entity]
+        if operation.op == "create":
+            try:
+                values = target.create.model_validate(operation.data).model_dump()
+            except ValidationError as exc:
+                raise HTTPException(422, {"index": index, "error": validation_message(exc)}) from exc
+            if "preferences" in values:
+                values["preferences"] = values["preferences"] or {}
+            ops.append(_Op(index, "create", operation.entity, None, values))
+            continue
+        if operation.id is None:
+            raise HTTPException(422, {"index": index, "error": f"id is required to {operation.op}"})
+        values = {}
+        if operation.op == "update":
+            try:
+                values = target.patch.model_validate(operation.data).changes()
+            except ValidationError as exc:
+                raise HTTPException(422, {"index": index, "error": validation_message(exc)}) from exc
+        elif operation.data:
+            raise HTTPException(422, {"index": index, "error": "delete takes no data"})
+        ops.append(_Op(index, operation.op, operation.entity, operation.id, values))
+    return ops
+
+
+def group_operations(ops: list[_Op]) -> list[list[_Op]]:
+    # Runs of consecutive operations that one statement can apply: same
+    # kind, entity and fields, and no record twice
+    groups: list[list[_Op]] = []
+    ids: set[int] = set()
+    for op in ops:
+        current = groups[-1] if groups else None
+        if (
+            current is not None
+            and (current[0].op, current[0].entity, current[0].values.keys()) == (op.op, op.entity, op.values.keys())
+            and (op.id is None or op.id not in ids)
+        ):
+            current.append(op)
+        else:
+            groups.append([op])
+            ids = set()
+        if op.id is not None:
+            ids.add(op.id)
+    return groups
+
+
+def _columns(target: _Target, names: list[str], group: list[_Op]) -> tuple[list[str], list[str], list[Any]]:
+    # unnest() column list, value expressions over it, and the arrays
+    aliases: list[str] = []
+    exprs: list[str] = []
+    arrays: list[Any] = []
+    for name in names:
+        sql_type = target.types[name]
+        values = [op.values[name] for op in group]
+        if sql_type == "money_amount":
+            aliases += [f"{name}_amount", f"{name}_currency"]
+            exprs.append(f"ROW(v.{name}_amount::numeric, v.{name}_currency::currency_code)::money_amount")
+            arrays += [("numeric", [v["amount"] for v in values]), ("text", [v["currency"] for v in values])]
+        elif sql_type in _CAST_FROM_TEXT:
+            aliases.append(name)
+            exprs.append(f"v.{name}::{sql_type}")
+            if sql_type == "jsonb":
+                values = [json.dumps(v) for v in values]
+            arrays.append(("text", values))
+        else:
+            aliases.append(name)
+            exprs.append(f"v.{name}")
+            arrays.append((sql_type, values))
+    return aliases, exprs, arrays
+
+
+def _unnest(arrays: list[tuple[str, Any]], first_param: int = 1) -> str:
+    return ", ".join(f"${first_param + i}::{sql_type}[]" for i, (sql_type, _) in enumerate(arrays))
+
+
+async def _apply(conn: Any, group: list[_Op]) -> list[BatchOperationResult]:
+    target = _TARGETS[group[0].entity]
+    table, key = target.entity.table, target.entity.key[0]
+    kind = group[0].op
+    if kind == "create":
+        names = list(group[0].values)
+        aliases, exprs, arrays = _columns(target, names, group)
+        # Rows are inserted, and returned, in ordinality order
+        rows = await conn.fetch(
+            f"""
+            INSERT INTO {table} ({", ".join(names)})
+            SELECT {", ".join(exprs)}
+            FROM unnest({_unnest(arrays)}) WITH ORDINALITY AS v({", ".join(aliases)}, ord)
+            ORDER BY v.ord
+            RETURNING {key}
+            """,
+            *(values for _, values in arrays),
+        )
+        return [BatchOperationResult(index=op.index, status="created", id=r[key]) for op, r in zip(group, rows)]
+
+    ids = [op.id for op in group]
+    if kind == "delete":
+        rows = await conn.fetch(f"DELETE FROM {table} WHERE {key} = ANY($1::bigint[]) RETURNING {key}", ids)
+        done = {r[key] for r in rows}
+        return [
+            BatchOperationResult(index=op.index, status="deleted" if op.id in done else "not_found", id=op.id)
+            for op in group
+        ]
+
+    names = list(group[0].values)
+    aliases, exprs, arrays = _columns(target, names, group)
+    # An id the UPDATE does not return is missing, or was skipped by
+    # skip_noop_update as unchanged; the join to the table (as it was before
+    # the update) tells the two apart in the same statement
+    if names:
+        update = f"""
+            UPDATE {table} t SET {", ".join(f"{n} = {e}" for n, e in zip(names, exprs))}
+            FROM v WHERE t.{key} = v.batch_key
+            RETURNING t.{key}
+        """
+    else:
+        update = f"SELECT NULL::bigint AS {key} WHERE false"
+    rows = await conn.fetch(
+        f"""
+        WITH v AS (
+            SELECT * FROM unnest({_unnest([("bigint", ids), *arrays])}) AS v({", ".join(["batch_key", *aliases])})
+        ), updated AS ({update})
+        SELECT v.batch_key, u.{key} IS NOT NULL AS updated, t.{key} IS NOT NULL AS found
+        FROM v
+        LEFT JOIN updated u ON u.{key} = v.batch_key
+        LEFT JOIN {table} t ON t.{key} = v.batch_key
+        """,
+        ids,
+        *(values for _, values in arrays),
+    )
+    status = {r["batch_key"]: "updated" if r["updated"] else "unchanged" if r["found"] else "not_found" for r in rows}
+    return [BatchOperationResult(index=op.index, status=status[op.id], id=op.id) for op in group]
+
+
+async def _first_failure(conn: Any, group: list[_Op]) -> tuple[int, str] | None:
+    # Replays a failed run one operation at a time to name the culprit
+    for op in group:
+        try:
+            async with conn.transaction():
+                await _apply(conn, [op])
+        except PostgresError as exc:
+            return op.index, str(exc)
+    return None
+
+
+@router.post("/batch", response_model=BatchResult)
+async def run_batch(payload: BatchRequest) -> BatchResult:
+    if len(payload.operations) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(413, f"At most {BATCH_MAX_OPERATIONS} operations per batch")
+    groups = group_operations(_prepare(payload))
+    results: list[BatchOperationResult] = []
+    async with db.acquire() as conn:
+        async with conn.transaction():
+            for group in groups:
+                try:
+                    async with conn.transaction():
+                        results.extend(await _apply(conn, group))
+                except PostgresError as exc:
+                    index, error = await _first_failure(conn, group) or (group[0].index, str(exc))
+                    raise HTTPException(400, {"index": index, "error": error}) from exc
+    for namespace in {_TARGETS[g[0].entity].cached for g in groups} - {None}:
+        await reference_cache.invalidate(namespace)
+    return BatchResult(results=results)
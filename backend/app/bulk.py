@@ -0,0 +1,417 @@
+from __future__ import annotations
+
+import json
+from decimal import Decimal
+from typing import Any, Iterable
+
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import ValidationError
+
+from .db import db
+from .models import (
+    BetCreate,
+    BulkBetResult,
+    BulkRowError,
+    EventSettlement,
+    SettlementResult,
+    SettlementRule,
+)
+
+
+router = APIRouter()
+
+BULK_MAX_ROWS = 50_000
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson")
+
+# Enums and JSONB are staged as text and cast on the way into bets: binary
+# COPY does not go through the connection's text-format jsonb codec.
+_CREATE_STAGING = """
+CREATE TEMP TABLE bets_staging (
+    idx INTEGER PRIMARY KEY,
+    bookie TEXT NOT NULL,
+    customer_id BIGINT NOT NULL,
+    bookie_bet_id TEXT NOT NULL,
+    bet_type TEXT NOT NULL,
+    event_id BIGINT NOT NULL,
+    sport TEXT NOT NULL,
+    placement_status TEXT NOT NULL,
+    outcome TEXT,
+    stake_amount DECIMAL(20, 4) NOT NULL,
+    stake_currency TEXT NOT NULL,
+    odds DECIMAL(20, 10) NOT NULL,
+    placement_data TEXT NOT NULL,
+    error TEXT
+) ON COMMIT DROP
+"""
+
+_STAGING_COLUMNS = (
+    "idx", "bookie", "customer_id", "bookie_bet_id", "bet_type", "event_id", "sport",
+    "placement_status", "outcome", "stake_amount", "stake_currency", "odds", "placement_data",
+)
+
+# Same checks, in the same order and with the same messages, as the per-row
+# BEFORE triggers and constraints on bets: validate_bet, or the separate
+# triggers, which fire alphabetically: currency, then placement, then sport.
+_VALIDATE_STAGED = """
+UPDATE bets_staging s SET error = v.error
+FROM (
+    SELECT s.idx, CASE
+        WHEN c.id IS NULL THEN format('Customer with id %s not found', s.customer_id)
+        WHEN e.id IS NULL THEN format('Event with id %s not found', s.event_id)
+        WHEN bk.name IS NULL THEN format('Bookie %s not found', s.bookie)
+        WHEN s.stake_amount <= 0 THEN 'Stake amount must be positive'
+        WHEN s.outcome IS NOT NULL AND s.placement_status <> 'placed'
+            THEN 'Only placed bets can have an outcome'
+        WHEN s.stake_currency::currency_code <> c.currency
+            THEN format('Bet stake currency %s does not match customer currency %s', s.stake_currency, c.currency)
+        WHEN s.outcome IS NULL AND s.placement_status = 'placed' AND e.status = 'finished'
+            THEN format('Cannot place bet on finished event %s', s.event_id)
+        WHEN comp.sport <> s.sport
+            THEN format('Bet sport %s does not match event sport %s', s.sport, comp.sport)
+        WHEN EXISTS (
+            SELECT 1 FROM bets b WHERE b.bookie = s.bookie AND b.bookie_bet_id = s.bookie_bet_id
+        ) THEN format('Bet %s already exists for bookie %s', s.bookie_bet_id, s.bookie)
+        WHEN s.occurrence > 1
+            THEN format('Duplicate bookie_bet_id %s in request', s.bookie_bet_id)
+    END AS error
+    FROM (
+        SELECT *, row_number() OVER (PARTITION BY bookie, bookie_bet_id ORDER BY idx) AS occurrence
+        FROM bets_staging
+    ) s
+    LEFT JOIN customers c ON c.id = s.customer_id
+    LEFT JOIN events e ON e.id = s.event_id
+    LEFT JOIN competitions comp ON comp.id = e.competition_id
+    LEFT JOIN bookies bk ON bk.name = s.bookie
+) v
+WHERE v.idx = s.idx AND v.error IS NOT NULL
+"""
+
+# Placed bets deduct their stake. Each customer's balance is locked through
+# lock_customer_balance() (its lanes in ledger mode, else its customers row),
+# in id order so concurrent batches cannot deadlock. Stakes are then checked
+# in submission order by check_balances().
+_LOCK_BALANCES = """
+SELECT customer_id, lock_customer_balance(customer_id) AS available
+FROM (
+    SELECT DISTINCT customer_id FROM bets_staging
+    WHERE error IS NULL AND placement_status = 'placed'
+    ORDER BY customer_id
+) c
+"""
+
+_STAGED_STAKES = """
+SELECT idx, customer_id, stake_amount FROM bets_staging
+WHERE error IS NULL AND placement_status = 'placed'
+ORDER BY idx
+"""
+
+_REJECT_STAKES = """
+UPDATE bets_staging s
+SET error = format('Insufficient balance: operation would result in negative balance %s', r.remaining)
+FROM unnest($1::integer[], $2::numeric[]) AS r(idx, remaining)
+WHERE r.idx = s.idx
+"""
+
+# One net delta per customer, applied through the same path the
+# balance_changes trigger uses
+_APPLY_BALANCE_DELTAS = """
+SELECT apply_balance_delta(customer_id, total)
+FROM unnest($1::bigint[], $2::numeric[]) AS d(customer_id, total)
+WHERE total <> 0
+ORDER BY customer_id
+"""
+
+# One statement for the whole batch: the bets, their audit rows and the stake
+# deductions with their own audit rows. The per-customer totals come back
+# with the rows and are applied with _APPLY_BALANCE_DELTAS.
+_INSERT_STAGED = """
+WITH inserted AS (
+    INSERT INTO bets (
+        bookie, customer_id, bookie_bet_id, bet_type, event_id, sport,
+        placement_status, outcome, stake, odds, placement_data
+    )
+    SELECT bookie, customer_id, bookie_bet_id, bet_type, event_id, sport,
+           placement_status::placement_status, outcome::bet_outcome,
+           ROW(stake_amount, stake_currency::currency_code)::money_amount,
+           odds, placement_data::jsonb
+    FROM bets_staging
+    WHERE error IS NULL
+    ORDER BY idx
+    RETURNING *
+), bets_audit AS (
+    INSERT INTO audit_log (table_name, operation, row_id, new_data)
+    SELECT 'bets', 'INSERT', id, to_jsonb(inserted) FROM inserted
+), changes AS (
+    INSERT INTO balance_changes (customer_id, change_type, delta, reference_id, description)
+    SELECT customer_id, 'bet_placed', ROW(-(stake).amount, (stake).currency)::money_amount,
+           'bet_' || id::TEXT, format('Placed bet %s', bookie_bet_id)
+    FROM inserted
+    WHERE placement_status = 'placed'
+    ORDER BY id
+    RETURNING *
+), changes_audit AS (
+    INSERT INTO audit_log (table_name, operation, row_id, new_data)
+    SELECT 'balance_changes', 'INSERT', id, to_jsonb(changes) FROM changes
+), balances AS (
+    SELECT customer_id, SUM((delta).amount) AS total FROM changes GROUP BY customer_id
+)
+SELECT id, bookie, bookie_bet_id, NULL::bigint AS customer_id, NULL::numeric AS total FROM inserted
+UNION ALL
+SELECT NULL, NULL, NULL, customer_id, total FROM balances
+"""
+
+
+def check_balances(
+    available: dict[int, Decimal], stakes: Iterable[tuple[int, int, Decimal]]
+) -> dict[int, Decimal]:
+    # Takes (idx, customer_id, stake) in submission order. A stake that would
+    # take what is left of the balance negative is rejected, as
+    # apply_balance_delta() would reject it one bet at a time, and does not
+    # count against the stakes after it. Returns the rejected rows with the
+    # balance they would have left.
+    remaining = dict(available)
+    rejected: dict[int, Decimal] = {}
+    for idx, customer_id, stake in stakes:
+        left = remaining[customer_id] - stake
+        if left < 0:
+            rejected[idx] = left
+        else:
+            remaining[customer_id] = left
+    return rejected
+
+
+def validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" if err["loc"] else err["msg"]
+        for err in exc.errors()
+    )
+
+
+def _parse_body(body: bytes, content_type: str) -> list[Any]:
+    # Returns one entry per submitted row; rows that are not valid JSON are
+    # returned as the ValueError raised while decoding them
+    if content_type.split(";")[0].strip() in NDJSON_MEDIA_TYPES:
+        rows: list[Any] = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as exc:
+                rows.append(exc)
+        return rows
+    try:
+        rows = json.loads(body)
+    except ValueError as exc:
+        raise HTTPException(400, f"Invalid JSON body: {exc}") from exc
+    if not isinstance(rows, list):
+        raise HTTPException(400, "Expected a JSON array of bets or an NDJSON body")
+    return rows
+
+
+@router.post(
+    "/bets/bulk",
+    response_model=BulkBetResult,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/BetCreate"}}
+                },
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def bulk_create_bets(request: Request) -> BulkBetResult:
+    raw_rows = _parse_body(await request.body(), request.headers.get("content-type", ""))
+    if len(raw_rows) > BULK_MAX_ROWS:
+        raise HTTPException(413, f"At most {BULK_MAX_ROWS} bets per request")
+
+    errors: dict[int, str] = {}
+    staged: list[tuple[Any, ...]] = []
+    for idx, raw in enumerate(raw_rows):
+        if isinstance(raw, ValueError):
+            errors[idx] = f"Invalid JSON: {raw}"
+            continue
+        try:
+            bet = BetCreate.model_validate(raw)
+        except ValidationError as exc:
+            errors[idx] = validation_message(exc)
+            continue
+        staged.append(
+            (
+                idx, bet.bookie, bet.customer_id, bet.bookie_bet_id, bet.bet_type, bet.event_id,
+                bet.sport, bet.placement_status, bet.outcome, bet.stake.amount, bet.stake.currency,
+                bet.odds, json.dumps(bet.placement_data),
+            )
+        )
+
+    ids: list[int | None] = [None] * len(raw_rows)
+    if staged:
+        async with db.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("SET LOCAL app.bulk_write = 'on'")
+                await conn.execute(_CREATE_STAGING)
+                await conn.copy_records_to_table("bets_staging", records=staged, columns=_STAGING_COLUMNS)
+                await conn.execute("ANALYZE bets_staging")
+                await conn.execute(_VALIDATE_STAGED)
+                balances = await conn.fetch(_LOCK_BALANCES)
+                stakes = await conn.fetch(_STAGED_STAKES)
+                overdrawn = check_balances(
+                    {b["customer_id"]: b["available"] for b in balances},
+                    ((r["idx"], r["customer_id"], r["stake_amount"]) for r in stakes),
+                )
+                if overdrawn:
+                    await conn.execute(_REJECT_STAKES, list(overdrawn), list(overdrawn.values()))
+                rejected = await conn.fetch("SELECT idx, error FROM bets_staging WHERE error IS NOT NULL")
+                result = await conn.fetch(_INSERT_STAGED)
+                totals = [r for r in result if r["customer_id"] is not None]
+                inserted = [r for r in result if r["id"] is not None]
+                await conn.execute(
+                    _APPLY_BALANCE_DELTAS,
+                    [t["customer_id"] for t in totals],
+                    [t["total"] for t in totals],
+                )
+        errors.update((r["idx"], r["error"]) for r in rejected)
+        # (bookie, bookie_bet_id) is unique among the accepted rows
+        index_by_key = {(row[1], row[3]): row[0] for row in staged if row[0] not in errors}
+        for r in inserted:
+            ids[index_by_key[(r["bookie"], r["bookie_bet_id"])]] = r["id"]
+
+    return BulkBetResult(
+        inserted=sum(1 for i in ids if i is not None),
+        ids=ids,
+        errors=[BulkRowError(index=i, error=e) for i, e in sorted(errors.items())],
+    )
+
+
+# Settles every placed, unsettled bet on an event in one statement. Each bet
+# takes its explicit outcome if given, else the first matching rule; bets
+# with neither are left pending. Balance changes mirror
+# handle_bet_outcome_change() (loss: 0, void: stake, win: stake * odds).
+_SETTLE_EVENT = """
+WITH rules AS (
+    SELECT * FROM unnest($2::text[], $3::text[], $4::bet_outcome[])
+        WITH ORDINALITY AS r(bet_type, selection, outcome, priority)
+), explicit AS (
+    SELECT * FROM unnest($5::bigint[], $6::bet_outcome[]) AS x(bet_id, outcome)
+), targets AS (
+    SELECT b.id, COALESCE(x.outcome, r.outcome) AS outcome, to_jsonb(b) AS old_data
+    FROM bets b
+    LEFT JOIN explicit x ON x.bet_id = b.id
+    LEFT JOIN LATERAL (
+        SELECT rules.outcome FROM rules
+        WHERE rules.bet_type = b.bet_type
+          AND (rules.selection IS NULL OR rules.selection = b.placement_data->>'selection')
+        ORDER BY rules.priority
+        LIMIT 1
+    ) r ON true
+    WHERE b.event_id = $1 AND b.placement_status = 'placed' AND b.outcome IS NULL
+    FOR UPDATE OF b
+), settled AS (
+    UPDATE bets b SET outcome = t.outcome
+    FROM targets t
+    WHERE b.id = t.id AND t.outcome IS NOT NULL
+    RETURNING b.*, t.old_data
+), bets_audit AS (
+    INSERT INTO audit_log (table_name, operation, row_id, old_data, new_data)
+    SELECT 'bets', 'UPDATE', id, old_data, to_jsonb(settled) - 'old_data' FROM settled
+), changes AS (
+    INSERT INTO balance_changes (customer_id, change_type, delta, reference_id, description)
+    SELECT
+        customer_id,
+        'bet_settled',
+        ROW(CASE outcome
+            WHEN 'lose' THEN 0
+            WHEN 'void' THEN (stake).amount
+            WHEN 'win' THEN ((stake).amount * odds)::DECIMAL(20, 4)
+        END, (stake).currency)::money_amount,
+        'bet_' || id::TEXT,
+        CASE outcome
+            WHEN 'lose' THEN format('Bet %s settled as loss', id)
+            WHEN 'void' THEN format('Bet %s voided - stake returned', id)
+            WHEN 'win' THEN format('Bet %s won - payout at odds %s', id, odds)
+        END
+    FROM settled
+    ORDER BY id
+    RETURNING *
+), changes_audit AS (
+    INSERT INTO audit_log (table_name, operation, row_id, new_data)
+    SELECT 'balance_changes', 'INSERT', id, to_jsonb(changes) FROM changes
+), balances AS (
+    SELECT customer_id, SUM((delta).amount) AS total FROM changes GROUP BY customer_id
+)
+SELECT
+    (SELECT array_agg(customer_id ORDER BY customer_id) FROM balances) AS balance_customers,
+    (SELECT array_agg(total ORDER BY customer_id) FROM balances) AS balance_totals,
+    (SELECT COUNT(*) FROM settled) AS settled,
+    (SELECT COUNT(*) FROM settled WHERE outcome = 'win') AS won,
+    (SELECT COUNT(*) FROM settled WHERE outcome = 'lose') AS lost,
+    (SELECT COUNT(*) FROM settled WHERE outcome = 'void') AS voided,
+    (SELECT COUNT(*) FROM targets WHERE outcome IS NULL) AS unmatched,
+    (SELECT COALESCE(SUM((delta).amount), 0) FROM changes) AS total_payout
+"""
+
+
+# Explicit outcomes naming bets that are not on the event
+_FOREIGN_BETS = """
+SELECT array_agg(x.id ORDER BY x.id)
+FROM unnest($2::bigint[]) AS x(id)
+WHERE NOT EXISTS (SELECT 1 FROM bets b WHERE b.id = x.id AND b.event_id = $1)
+"""
+
+
+def _result_rules(score_a: int, score_b: int) -> list[SettlementRule]:
+    if score_a > score_b:
+        winner = "home_win"
+    elif score_a < score_b:
+        winner = "away_win"
+    else:
+        winner = "draw"
+    return [
+        SettlementRule(bet_type="match_winner", selection=winner, outcome="win"),
+        SettlementRule(bet_type="match_winner", outcome="lose"),
+    ]
+
+
+@router.post("/events/{event_id}/settle", response_model=SettlementResult)
+async def settle_event(event_id: int, payload: EventSettlement) -> SettlementResult:
+    rules = list(payload.rules)
+    async with db.acquire() as conn:
+        async with conn.transaction():
+            if not await conn.fetchval("SELECT 1 FROM events WHERE id=$1", event_id):
+                raise HTTPException(404, "Event not found")
+            if payload.outcomes:
+                foreign = await conn.fetchval(_FOREIGN_BETS, event_id, list(payload.outcomes))
+                if foreign:
+                    raise HTTPException(
+                        422, f"Bets not on event {event_id}: {', '.join(str(i) for i in foreign)}"
+                    )
+            if payload.from_result:
+                result = await conn.fetchrow(
+                    "SELECT score_a, score_b FROM results WHERE event_id=$1", event_id
+                )
+                if not result:
+                    raise HTTPException(409, "Event has no result to settle from")
+                rules.extend(_result_rules(result["score_a"], result["score_b"]))
+
+            await conn.execute("SET LOCAL app.bulk_write = 'on'")
+            row = await conn.fetchrow(
+                _SETTLE_EVENT,
+                event_id,
+                [r.bet_type for r in rules],
+                [r.selection for r in rules],
+                [r.outcome for r in rules],
+                list(payload.outcomes.keys()),
+                list(payload.outcomes.values()),
+            )
+            data = dict(row)
+            await conn.execute(
+                _APPLY_BALANCE_DELTAS,
+                data.pop("balance_customers") or [],
+                data.pop("balance_totals") or [],
+            )
+    data["total_payout"] = float(data["total_payout"])
+    return SettlementResult(event_id=event_id, **data)
@@ -0,0 +1,140 @@
+"""Read-through cache for rarely changing reference data.
+
+Rendered responses are kept in process memory per (namespace, variant), e.g.
+("competitions", "active=True"). Each namespace has a version number held by
+a pluggable backend; writes bump it, which invalidates every cached variant
+of that namespace. With the local backend versions live in this process only;
+with Redis (``CACHE_BACKEND=redis``, ``REDIS_URL``) every uvicorn worker sees
+the same versions and drops its copies as soon as any worker writes.
+
+Responses carry an ETag, so a client revalidating with If-None-Match gets a
+304 straight from the cache without a database round trip.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Protocol, Sequence
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from .conditional import etag_matches
+
+try:
+    from redis import asyncio as redis_asyncio
+except ImportError:  # optional dependency, only needed for CACHE_BACKEND=redis
+    redis_asyncio = None
+
+
+class CacheBackend(Protocol):
+    async def version(self, namespace: str) -> int: ...
+
+    async def bump(self, namespace: str) -> int: ...
+
+
+class LocalCacheBackend:
+    """Versions held in this process: coherent for a single worker only."""
+
+    def __init__(self) -> None:
+        self._versions: dict[str, int] = {}
+
+    async def version(self, namespace: str) -> int:
+        return self._versions.get(namespace, 0)
+
+    async def bump(self, namespace: str) -> int:
+        self._versions[namespace] = self._versions.get(namespace, 0) + 1
+        return self._versions[namespace]
+
+
+class RedisCacheBackend:
+    """Versions shared through Redis counters, one key per namespace."""
+
+    def __init__(self, url: str, prefix: str = "cache:version:") -> None:
+        if redis_asyncio is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package")
+        self._redis = redis_asyncio.from_url(url)
+        self._prefix = prefix
+
+    async def version(self, namespace: str) -> int:
+        value = await self._redis.get(self._prefix + namespace)
+        return int(value or 0)
+
+    async def bump(self, namespace: str) -> int:
+        return int(await self._redis.incr(self._prefix + namespace))
+
+
+@dataclass
+class _Entry:
+    version: int
+    expires_at: float
+    etag: str
+    body: bytes
+
+
+class ResponseCache:
+    def __init__(self, backend: CacheBackend, ttl: float) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self._entries: dict[tuple[str, str], _Entry] = {}
+        self._locks: dict[tuple[str, str], asyncio.Lock] = {}
+
+    async def respond(
+        self,
+        request: Request,
+        namespace: str,
+        load: Callable[[], Awaitable[Sequence[Any]]],
+        adapter: TypeAdapter[Any],
+        variant: str = "",
+    ) -> Response:
+        key = (namespace, variant)
+        entry = await self._fresh_entry(key)
+        if entry is None:
+            # One load per key at a time; concurrent misses wait for it
+            async with self._locks.setdefault(key, asyncio.Lock()):
+                entry = await self._fresh_entry(key)
+                if entry is None:
+                    version = await self.backend.version(namespace)
+                    body = adapter.dump_json(await load())
+                    entry = _Entry(
+                        version=version,
+                        expires_at=time.monotonic() + self.ttl,
+                        etag=f'"{hashlib.sha1(body).hexdigest()}"',
+                        body=body,
+                    )
+                    if self.ttl > 0:
+                        self._entries[key] = entry
+
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    async def invalidate(self, *namespaces: str) -> None:
+        for namespace in namespaces:
+            await self.backend.bump(namespace)
+            for key in [k for k in self._entries if k[0] == namespace]:
+                self._entries.pop(key, None)
+
+    async def _fresh_entry(self, key: tuple[str, str]) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            return None
+        if entry.version != await self.backend.version(key[0]):
+            return None
+        return entry
+
+
+def _backend_from_env() -> CacheBackend:
+    if os.getenv("CACHE_BACKEND", "local") == "redis":
+        return RedisCacheBackend(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    return LocalCacheBackend()
+
+
+reference_cache = ResponseCache(
+    backend=_backend_from_env(),
+    ttl=float(os.getenv("REFERENCE_CACHE_TTL", "300")),
+)
@@ -0,0 +1,244 @@
+"""Real-time change feed over server-sent events.
+
+The notify_changes trigger on audit_log, once switched on with
+set_change_feed(true), publishes every committed change on the
+``change_feed`` channel as compact ``[table, op, row_id, event_id,
+customer_id]`` entries. One dedicated connection to the primary LISTENs and
+hands each entry to every matching subscriber without awaiting anything, so
+a slow client can never hold up the listener: each subscriber has a bounded
+buffer keyed by (table, row id) that coalesces repeated changes to the same
+row, and when it overflows (or the listener reconnects and may have missed
+notifications) the buffer is dropped and the client is told to reload.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+from dataclasses import dataclass, replace
+from typing import Any, AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from .db import db
+from .security import STREAM_TOKEN_SECONDS, issue_stream_token, require_api_key
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "change_feed"
+CHANGE_TABLES = ("events", "results", "customers", "balance_changes", "bets")
+CHANGE_FEED_BUFFER = int(os.getenv("CHANGE_FEED_BUFFER", "1000"))
+CHANGE_FEED_COALESCE_MS = float(os.getenv("CHANGE_FEED_COALESCE_MS", "100"))
+HEARTBEAT_SECONDS = 15.0
+RECONNECT_SECONDS = 2.0
+
+router = APIRouter()
+
+
+@dataclass(frozen=True)
+class Change:
+    table: str
+    op: str  # "I", "U" or "D"
+    id: int
+    event_id: Optional[int] = None
+    customer_id: Optional[int] = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "table": self.table, "op": self.op, "id": self.id,
+            "event_id": self.event_id, "customer_id": self.customer_id,
+        }
+
+
+def parse_payload(payload: str) -> list[Change]:
+    return [Change(*entry) for entry in json.loads(payload)]
+
+
+@dataclass(frozen=True)
+class ChangeFilter:
+    # Empty means no restriction on that dimension
+    tables: frozenset[str] = frozenset()
+    event_ids: frozenset[int] = frozenset()
+    customer_ids: frozenset[int] = frozenset()
+
+    def matches(self, change: Change) -> bool:
+        return (
+            (not self.tables or change.table in self.tables)
+            and (not self.event_ids or change.event_id in self.event_ids)
+            and (not self.customer_ids or change.customer_id in self.customer_ids)
+        )
+
+
+class Subscriber:
+    def __init__(self, change_filter: ChangeFilter, max_pending: int) -> None:
+        self.filter = change_filter
+        self.max_pending = max_pending
+        self._pending: dict[tuple[str, int], Change] = {}
+        self._overflowed = False
+        self._ready = asyncio.Event()
+
+    def offer(self, change: Change) -> None:
+        if self._overflowed or not self.filter.matches(change):
+            return
+        key = (change.table, change.id)
+        previous = self._pending.pop(key, None)
+        if previous is not None and previous.op == "I":
+            if change.op == "D":  # created and deleted before the client saw it
+                return
+            change = replace(change, op="I")
+        elif previous is None and len(self._pending) >= self.max_pending:
+            self.reset()
+            return
+        self._pending[key] = change
+        self._ready.set()
+
+    def reset(self) -> None:
+        self._pending.clear()
+        self._overflowed = True
+        self._ready.set()
+
+    async def next_batch(self, timeout: float, coalesce: float = 0.0) -> Optional[list[Change]]:
+        # [] on timeout, None when the client has to reload everything
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        if coalesce > 0 and not self._overflowed:
+            await asyncio.sleep(coalesce)
+        self._ready.clear()
+        if self._overflowed:
+            self._overflowed = False
+            return None
+        batch = list(self._pending.values())
+        self._pending.clear()
+        return batch
+
+
+class ChangeFeed:
+    def __init__(self, max_pending: int) -> None:
+        self.max_pending = max_pending
+        self.subscribers: set[Subscriber] = set()
+
+    def subscribe(self, change_filter: ChangeFilter) -> Subscriber:
+        subscriber = Subscriber(change_filter, self.max_pending)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self.subscribers.discard(subscriber)
+
+    def publish(self, changes: list[Change]) -> None:
+        for change in changes:
+            for subscriber in self.subscribers:
+                subscriber.offer(change)
+
+    def reset_all(self) -> None:
+        for subscriber in self.subscribers:
+            subscriber.reset()
+
+    def _on_notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        try:
+            changes = parse_payload(payload)
+        except (ValueError, TypeError):
+            logger.warning("Ignoring malformed %s payload: %.200s", CHANNEL, payload)
+            return
+        self.publish(changes)
+
+    async def listen(self) -> None:
+        while True:
+            lost = asyncio.Event()
+            conn = None
+            try:
+                conn = await db.connect_dedicated("listener")
+                conn.add_termination_listener(lambda _conn: lost.set())
+                await conn.add_listener(CHANNEL, self._on_notify)
+                await lost.wait()
+                logger.warning("Change feed connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Change feed listener failed, reconnecting")
+            finally:
+                if conn is not None and not conn.is_closed():
+                    with contextlib.suppress(Exception):
+                        await conn.close()
+            # Notifications sent while disconnected are gone
+            self.reset_all()
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+
+change_feed = ChangeFeed(max_pending=CHANGE_FEED_BUFFER)
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+@router.post("/changes/token", dependencies=[Depends(require_api_key)])
+async def create_stream_token() -> dict[str, Any]:
+    # For EventSource clients, which cannot send the API key header
+    return {"token": issue_stream_token(), "expires_in": STREAM_TOKEN_SECONDS}
+
+
+@router.get("/changes/stream", response_class=StreamingResponse)
+async def stream_changes(
+    request: Request,
+    table: Optional[list[str]] = Query(None),
+    event_id: Optional[list[int]] = Query(None),
+    customer_id: Optional[list[int]] = Query(None),
+) -> StreamingResponse:
+    unknown = set(table or ()) - set(CHANGE_TABLES)
+    if unknown:
+        raise HTTPException(400, f"Unknown table(s): {', '.join(sorted(unknown))}")
+    async with db.acquire(replica=False) as conn:
+        if not await conn.fetchval("SELECT change_feed_enabled()"):
+            raise HTTPException(
+                503, "The change feed is switched off; enable it with python -m app.maintenance change-feed --enable"
+            )
+    subscriber = change_feed.subscribe(
+        ChangeFilter(
+            tables=frozenset(table or ()),
+            event_ids=frozenset(event_id or ()),
+            customer_ids=frozenset(customer_id or ()),
+        )
+    )
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                batch = await subscriber.next_batch(HEARTBEAT_SECONDS, CHANGE_FEED_COALESCE_MS / 1000)
+                if batch is None:
+                    yield _sse("reset", {})
+                elif batch:
+                    yield _sse("changes", [c.as_dict() for c in batch])
+                else:
+                    yield ": keepalive\n\n"
+        finally:
+            change_feed.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def setup_change_feed(app: FastAPI) -> None:
+    tasks: list[asyncio.Task[None]] = []
+
+    @app.on_event("startup")
+    async def _start() -> None:  # noqa: ANN202
+        tasks.append(asyncio.create_task(change_feed.listen()))
+
+    @app.on_event("shutdown")
+    async def _stop() -> None:  # noqa: ANN202
+        for task in tasks:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        tasks.clear()
@@ -0,0 +1,76 @@
+"""Validators and conditional request checks for single records.
+
+A record's version is its ``updated_at``, which ``update_updated_at_column``
+moves on every UPDATE. The ETag encodes it to the microsecond and
+Last-Modified to the second (HTTP dates have no finer resolution), so
+If-None-Match is the exact check and takes precedence when both are sent.
+For writes, If-Match names the versions the client last saw; the tags decode
+back to updated_at values, so the check is part of the UPDATE itself.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    # Weak comparison, as If-None-Match uses
+    if not header:
+        return False
+    candidates = [c.strip().removeprefix("W/") for c in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def etag_for(updated_at: datetime) -> str:
+    return f'"{(updated_at - _EPOCH) // timedelta(microseconds=1):x}"'
+
+
+def if_match_versions(header: str) -> list[datetime] | None:
+    # The updated_at values an If-Match header accepts, or None for "*".
+    # If-Match compares strongly, so weak tags never match; tags that are
+    # not ours are skipped
+    versions: list[datetime] = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return None
+        if len(tag) < 3 or tag[0] != '"' or tag[-1] != '"':
+            continue
+        try:
+            versions.append(_EPOCH + timedelta(microseconds=int(tag[1:-1], 16)))
+        except ValueError:
+            continue
+    return versions
+
+
+def validators(updated_at: datetime) -> dict[str, str]:
+    return {
+        "ETag": etag_for(updated_at),
+        "Last-Modified": format_datetime(updated_at.astimezone(timezone.utc), usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def not_modified(request: Request, updated_at: datetime) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag_for(updated_at))
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False  # an invalid date is ignored
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return updated_at.replace(microsecond=0) <= since
@@ -1,50 +1,449 @@
 from __future__ import annotations
 
+import asyncio
+import dataclasses
+import itertools
+import json
+import logging
 import os
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from http.cookies import SimpleCookie
 from typing import AsyncIterator, Any
 
 try:  # asyncpg is optional for non-DB runs (ENABLE_DB_EVENTS=0)
     import asyncpg  # type: ignore
 except Exception:  # pragma: no cover - only on environments without build tools
     asyncpg = None  # type: ignore[assignment]
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import Sample, current_timings, record_phase, registry as metrics_registry
+from .security import require_api_key
+
+
+logger = logging.getLogger(__name__)
+
+# Whether the current request may read from a replica; set per request by
+# ReadRoutingMiddleware, so background tasks and writes use the primary
+read_from_replica: ContextVar[bool] = ContextVar("read_from_replica", default=False)
+
+READ_YOUR_WRITES_COOKIE = "db_primary_until"
+
+
+def _env_float(name: str, default: float | None) -> float | None:
+    # Unset, empty or "0" means no limit where None is the default
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    number = float(value)
+    return number if number > 0 else None
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    min_size: int = 1
+    max_size: int = 10
+    statement_cache_size: int = 100
+    max_cached_statement_lifetime: float = 300
+    max_queries: int = 50000
+    max_inactive_connection_lifetime: float = 300
+    # Default per-query timeout in seconds; a query can pass its own timeout=
+    command_timeout: float | None = None
+    # How long a request may wait for a free connection before failing with 503
+    acquire_timeout: float | None = None
+    application_name: str = "analyst-backend"
+    # How long a replica that failed to connect is skipped before it is tried again
+    replica_retry_seconds: float = 10
+
+    @classmethod
+    def from_env(cls) -> PoolConfig:
+        return cls(
+            min_size=int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+            max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            statement_cache_size=int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100")),
+            max_cached_statement_lifetime=float(os.getenv("DB_MAX_CACHED_STATEMENT_LIFETIME", "300")),
+            max_queries=int(os.getenv("DB_POOL_MAX_QUERIES", "50000")),
+            max_inactive_connection_lifetime=float(os.getenv("DB_POOL_MAX_INACTIVE_LIFETIME", "300")),
+            command_timeout=_env_float("DB_COMMAND_TIMEOUT", None),
+            acquire_timeout=_env_float("DB_POOL_ACQUIRE_TIMEOUT", None),
+            application_name=os.getenv("DB_APPLICATION_NAME", "analyst-backend"),
+            replica_retry_seconds=float(os.getenv("DB_REPLICA_RETRY_SECONDS", "10")),
+        )
+
+
+class PoolTimeoutError(RuntimeError):
+    """No connection became free within the acquire timeout."""
+
+
+# Errors meaning the server cannot be reached, as opposed to a failing query
+if asyncpg is not None:
+    _CONNECTION_ERRORS: tuple[type[BaseException], ...] = (
+        OSError, asyncpg.PostgresConnectionError, asyncpg.CannotConnectNowError
+    )
+else:  # pragma: no cover
+    _CONNECTION_ERRORS = (OSError,)
+
+# Any error raised by the server; other modules catch this rather than
+# importing asyncpg, which stays optional
+if asyncpg is not None:
+    PostgresError: type[Exception] = asyncpg.PostgresError
+else:  # pragma: no cover
+
+    class PostgresError(Exception):  # type: ignore[no-redef]
+        """Stands in for asyncpg.PostgresError when asyncpg is not installed."""
+
+
+@dataclass
+class PoolMetrics:
+    acquisitions: int = 0
+    acquire_timeouts: int = 0
+    waiting: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    statement_cache_hits: int = 0
+    statement_cache_misses: int = 0
+
+    def record_wait(self, seconds: float) -> None:
+        self.acquisitions += 1
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self) -> dict[str, Any]:
+        lookups = self.statement_cache_hits + self.statement_cache_misses
+        return {
+            "acquisitions": self.acquisitions,
+            "acquire_timeouts": self.acquire_timeouts,
+            "waiting": self.waiting,
+            "wait_ms_avg": round(self.wait_seconds_total / self.acquisitions * 1000, 3) if self.acquisitions else 0.0,
+            "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+            "statement_cache_hits": self.statement_cache_hits,
+            "statement_cache_misses": self.statement_cache_misses,
+            "statement_cache_hit_rate": round(self.statement_cache_hits / lookups, 4) if lookups else None,
+        }
+
+
+metrics = PoolMetrics()
+
+
+def _replica_hosts() -> list[tuple[str, int]]:
+    # POSTGRES_REPLICA_HOSTS=replica1,replica2:5433 (same user, password and database)
+    hosts: list[tuple[str, int]] = []
+    for item in os.getenv("POSTGRES_REPLICA_HOSTS", "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.rpartition(":") if ":" in item else (item, "", "")
+        hosts.append((host, int(port or os.getenv("POSTGRES_PORT", "5432"))))
+    return hosts
+
+
+def _connect_kwargs(host: str, port: int) -> dict[str, Any]:
+    return {
+        "user": os.getenv("POSTGRES_USER", "analyst_user"),
+        "password": os.getenv("POSTGRES_PASSWORD", "analyst_password"),
+        "database": os.getenv("POSTGRES_DB", "analyst_platform"),
+        "host": host,
+        "port": port,
+    }
+
+
+async def _init_connection(connection: Any) -> None:
+    # Decode json/jsonb to Python objects (and accept dicts as parameters)
+    for typename in ("json", "jsonb"):
+        await connection.set_type_codec(
+            typename, encoder=json.dumps, decoder=json.loads, schema="pg_catalog"
+        )
+
+
+if asyncpg is not None:
+
+    # Statement cache hits are counted by hooking asyncpg's private
+    # Connection._get_statement (asyncpg 0.29, pinned in requirements.txt).
+    # Without that method the hook is not installed and nothing is counted;
+    # the override passes its arguments through untouched so a changed
+    # signature still works.
+    _COUNT_STATEMENT_CACHE = hasattr(asyncpg.Connection, "_get_statement")
+
+    def _count_statement_cache(connection: Any, query: str, kwargs: dict[str, Any]) -> None:
+        if not kwargs.get("use_cache", True) or kwargs.get("named"):
+            return
+        cache = getattr(connection, "_stmt_cache", None)
+        protocol = getattr(connection, "_protocol", None)
+        if cache is None or protocol is None:
+            return
+        try:
+            record_class = kwargs.get("record_class") or protocol.get_record_class()
+            hit = cache.get((query, record_class, kwargs.get("ignore_custom_codec", False))) is not None
+        except (AttributeError, TypeError):
+            return
+        if hit:
+            metrics.statement_cache_hits += 1
+        else:
+            metrics.statement_cache_misses += 1
+
+    class _InstrumentedConnection(asyncpg.Connection):  # type: ignore[misc]
+        if _COUNT_STATEMENT_CACHE:
+
+            async def _get_statement(self, query: str, *args: Any, **kwargs: Any) -> Any:
+                _count_statement_cache(self, query, kwargs)
+                return await super()._get_statement(query, *args, **kwargs)
+
+        # Query time per request for the "db" phase of the request metrics
+        async def execute(self, *args: Any, **kwargs: Any) -> Any:
+            return await _timed_query(super().execute(*args, **kwargs))
+
+        async def executemany(self, *args: Any, **kwargs: Any) -> Any:
+            return await _timed_query(super().executemany(*args, **kwargs))
+
+        async def fetch(self, *args: Any, **kwargs: Any) -> Any:
+            return await _timed_query(super().fetch(*args, **kwargs))
+
+        async def fetchrow(self, *args: Any, **kwargs: Any) -> Any:
+            return await _timed_query(super().fetchrow(*args, **kwargs))
+
+        async def fetchval(self, *args: Any, **kwargs: Any) -> Any:
+            return await _timed_query(super().fetchval(*args, **kwargs))
+
+
+async def _timed_query(query: Any) -> Any:
+    if current_timings.get() is None:
+        return await query
+    started = time.perf_counter()
+    try:
+        return await query
+    finally:
+        record_phase("db", time.perf_counter() - started)
 
 
 class Database:
     def __init__(self) -> None:
         # Use Any to avoid hard dependency on asyncpg types at import time
         self._pool: Any | None = None
+        self._replicas: list[Any] = []
+        self._next_replica = itertools.count()
+        # Replica pool -> "host:port" (for logs), its position in
+        # POSTGRES_REPLICA_HOSTS, and until when (monotonic) it is skipped
+        self._replica_names: dict[Any, str] = {}
+        self._replica_positions: dict[Any, int] = {}
+        self._replica_down_until: dict[Any, float] = {}
+        self.config = PoolConfig.from_env()
+        self.metrics = metrics
 
-    async def connect(self) -> None:
+    async def connect(self, **overrides: Any) -> None:
         if asyncpg is None:
             raise RuntimeError(
                 "asyncpg is not installed. Install it or set ENABLE_DB_EVENTS=0 to run without DB."
             )
-        self._pool = await asyncpg.create_pool(
-            user=os.getenv("POSTGRES_USER", "analyst_user"),
-            password=os.getenv("POSTGRES_PASSWORD", "analyst_password"),
-            database=os.getenv("POSTGRES_DB", "analyst_platform"),
-            host=os.getenv("POSTGRES_HOST", "postgres"),
-            port=int(os.getenv("POSTGRES_PORT", "5432")),
-            min_size=1,
-            max_size=10,
+        self.config = dataclasses.replace(PoolConfig.from_env(), **overrides)
+        self._pool = await self._create_pool(
+            os.getenv("POSTGRES_HOST", "postgres"), int(os.getenv("POSTGRES_PORT", "5432")), "primary"
+        )
+        for position, (host, port) in enumerate(_replica_hosts()):
+            try:
+                pool = await self._create_pool(host, port, "replica")
+                self._replicas.append(pool)
+                self._replica_names[pool] = f"{host}:{port}"
+                self._replica_positions[pool] = position
+            except (OSError, asyncpg.PostgresError):
+                # Reads fall back to the primary rather than failing startup
+                logger.exception("Could not connect to replica %s:%s, skipping it", host, port)
+
+    async def _create_pool(self, host: str, port: int, role: str) -> Any:
+        return await asyncpg.create_pool(
+            **_connect_kwargs(host, port),
+            min_size=self.config.min_size,
+            max_size=self.config.max_size,
+            max_queries=self.config.max_queries,
+            max_inactive_connection_lifetime=self.config.max_inactive_connection_lifetime,
+            statement_cache_size=self.config.statement_cache_size,
+            max_cached_statement_lifetime=self.config.max_cached_statement_lifetime,
+            command_timeout=self.config.command_timeout,
+            server_settings={"application_name": f"{self.config.application_name} ({role})"},
+            connection_class=_InstrumentedConnection,
+            init=_init_connection,
+        )
+
+    async def connect_dedicated(self, role: str) -> Any:
+        # A connection of its own to the primary, outside the pool, for
+        # long-lived sessions such as LISTEN
+        if asyncpg is None:
+            raise RuntimeError("asyncpg is not installed")
+        return await asyncpg.connect(
+            **_connect_kwargs(os.getenv("POSTGRES_HOST", "postgres"), int(os.getenv("POSTGRES_PORT", "5432"))),
+            server_settings={"application_name": f"{self.config.application_name} ({role})"},
         )
 
     async def disconnect(self) -> None:
+        for pool in self._replicas:
+            await pool.close()
+        self._replicas.clear()
+        self._replica_names.clear()
+        self._replica_positions.clear()
+        self._replica_down_until.clear()
         if self._pool is not None:
             await self._pool.close()
             self._pool = None
 
-    async def acquire(self) -> AsyncIterator[Any]:
+    def _choose_pool(self, replica: bool | None) -> Any:
+        if replica is None:
+            replica = read_from_replica.get()
+        if replica and self._replicas:
+            now = time.monotonic()
+            for _ in range(len(self._replicas)):
+                pool = self._replicas[next(self._next_replica) % len(self._replicas)]
+                if self._replica_down_until.get(pool, 0.0) <= now:
+                    return pool
+        return self._pool
+
+    def _replica_failed(self, pool: Any, exc: BaseException) -> None:
+        # Reads go to the other replicas, or the primary, until the retry
+        # interval has passed
+        self._replica_down_until[pool] = time.monotonic() + self.config.replica_retry_seconds
+        logger.warning(
+            "Replica %s unavailable (%s), skipping it for %ss",
+            self._replica_names.get(pool, "?"), exc, self.config.replica_retry_seconds,
+        )
+
+    @asynccontextmanager
+    async def acquire(self, timeout: float | None = None, *, replica: bool | None = None) -> AsyncIterator[Any]:
+        # replica=None follows the request (GETs read from a replica when one
+        # is configured); True/False force a replica or the primary
         assert self._pool is not None, "Database pool not initialized"
-        async with self._pool.acquire() as connection:
+        pool = self._choose_pool(replica)
+        self.metrics.waiting += 1
+        started = time.perf_counter()
+        try:
+            try:
+                connection = await pool.acquire(timeout=timeout or self.config.acquire_timeout)
+            except _CONNECTION_ERRORS as exc:
+                # A replica that went away after startup: read from the primary
+                if pool is self._pool:
+                    raise
+                self._replica_failed(pool, exc)
+                pool = self._pool
+                connection = await pool.acquire(timeout=timeout or self.config.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.metrics.acquire_timeouts += 1
+            raise PoolTimeoutError("timed out waiting for a database connection") from None
+        finally:
+            self.metrics.waiting -= 1
+        waited = time.perf_counter() - started
+        self.metrics.record_wait(waited)
+        record_phase("pool_wait", waited)
+        try:
             yield connection
+        except _CONNECTION_ERRORS as exc:
+            # The query already ran, so it cannot be retried here, but the
+            # next reads skip the replica
+            if pool is not self._pool:
+                self._replica_failed(pool, exc)
+            raise
+        finally:
+            await pool.release(connection)
+
+    def pool_stats(self) -> dict[str, Any]:
+        stats: dict[str, Any] = {"min_size": self.config.min_size, "max_size": self.config.max_size}
+        if self._pool is not None:
+            stats.update(_pool_occupancy(self._pool))
+        now = time.monotonic()
+        # Replicas by position in POSTGRES_REPLICA_HOSTS; hosts only go to the log
+        stats["replicas"] = [
+            {
+                "replica": self._replica_positions.get(pool),
+                "available": self._replica_down_until.get(pool, 0.0) <= now,
+                **_pool_occupancy(pool),
+            }
+            for pool in self._replicas
+        ]
+        stats.update(self.metrics.snapshot())
+        return stats
+
+
+def _pool_samples() -> list[Sample]:
+    samples: list[Sample] = [
+        ("db_pool_acquisitions_total", "counter", "Connections checked out of the pool", metrics.acquisitions),
+        ("db_pool_acquire_timeouts_total", "counter", "Checkouts that hit the acquire timeout", metrics.acquire_timeouts),
+        ("db_pool_wait_seconds_total", "counter", "Time spent waiting for a connection", metrics.wait_seconds_total),
+        ("db_pool_waiting", "gauge", "Requests currently waiting for a connection", metrics.waiting),
+        ("db_statement_cache_hits_total", "counter", "Prepared statement cache hits", metrics.statement_cache_hits),
+        ("db_statement_cache_misses_total", "counter", "Prepared statement cache misses", metrics.statement_cache_misses),
+    ]
+    if db._pool is not None:
+        occupancy = _pool_occupancy(db._pool)
+        samples.append(("db_pool_size", "gauge", "Open connections in the primary pool", occupancy["size"]))
+        samples.append(("db_pool_in_use", "gauge", "Checked out connections in the primary pool", occupancy["in_use"]))
+    return samples
+
+
+def _pool_occupancy(pool: Any) -> dict[str, int]:
+    size = pool.get_size()
+    idle = pool.get_idle_size()
+    return {"size": size, "idle": idle, "in_use": size - idle}
+
+
+def _primary_until(scope: Scope) -> float:
+    for name, value in scope.get("headers", ()):
+        if name == b"cookie":
+            morsel = SimpleCookie(value.decode("latin-1")).get(READ_YOUR_WRITES_COOKIE)
+            if morsel is not None:
+                try:
+                    return float(morsel.value)
+                except ValueError:
+                    return 0.0
+    return 0.0
+
+
+class ReadRoutingMiddleware:
+    """Routes GET/HEAD requests to replicas, except right after the client's own writes.
+
+    After a successful mutation the response sets a cookie holding the time
+    until which this client keeps reading from the primary, so it sees its
+    own writes even while the replicas lag behind.
+    """
+
+    def __init__(self, app: ASGIApp, window: float) -> None:
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["method"] in ("GET", "HEAD"):
+            token = read_from_replica.set(_primary_until(scope) <= time.time())
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                read_from_replica.reset(token)
+            return
+        if self.window <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = (
+                    f"{READ_YOUR_WRITES_COOKIE}={time.time() + self.window:.3f}; "
+                    f"Max-Age={int(self.window) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
 
 
 db = Database()
 
 
 def setup_database_events(app: FastAPI) -> None:
+    if _replica_hosts():
+        app.add_middleware(ReadRoutingMiddleware, window=float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5")))
+    metrics_registry.add_collector(_pool_samples)
+
     @app.on_event("startup")
     async def _startup() -> None:  # noqa: ANN202
         await db.connect()
@@ -53,4 +452,18 @@ def setup_database_events(app: FastAPI) -> None:
     async def _shutdown() -> None:  # noqa: ANN202
         await db.disconnect()
 
+    @app.exception_handler(PoolTimeoutError)
+    async def _pool_timeout(request: Request, exc: PoolTimeoutError) -> JSONResponse:  # noqa: ANN202
+        return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
 
+    @app.get("/health/db", dependencies=[Depends(require_api_key)])
+    async def health_db() -> dict:
+        # Pool occupancy and checkout wait, plus one round trip to the database
+        started = time.perf_counter()
+        async with db.acquire() as conn:
+            await conn.fetchval("SELECT 1")
+        return {
+            "status": "ok",
+            "ping_ms": round((time.perf_counter() - started) * 1000, 3),
+            "pool": db.pool_stats(),
+        }
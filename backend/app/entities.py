@@ -0,0 +1,118 @@
+"""Columns of the API entities, for sparse field selection.
+
+List endpoints take ``fields=a,b,c`` and narrow the SQL projection to those
+columns, so large values that are not asked for (``placement_data``,
+``preferences``, audit snapshots) are never read or detoasted rather than
+fetched and dropped. The key columns an endpoint orders or pages by are
+always returned. A partial row does not fit the response model, so responses
+with ``fields`` are encoded straight from the rows as in ``fast``
+serialization mode (or built by Postgres in ``postgres`` mode).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+
+from fastapi import HTTPException
+
+from .serialization import json_object_sql
+
+
+FIELDS_DESCRIPTION = "Comma-separated subset of the fields to return, e.g. id,name"
+
+
+def select_fields(fields: str | None, known: Iterable[str], always: Iterable[str] = ()) -> list[str]:
+    # Parses a comma-separated fields= parameter, keeping the order of known
+    if fields is None:
+        return list(known)
+    wanted = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = wanted.difference(known)
+    if unknown:
+        raise HTTPException(400, f"Unknown fields: {', '.join(sorted(unknown))}")
+    wanted.update(always)
+    return [f for f in known if f in wanted]
+
+
+@dataclass(frozen=True)
+class Entity:
+    table: str
+    columns: tuple[str, ...]
+    # Always selected; the first is the primary key
+    key: tuple[str, ...]
+    money_fields: tuple[str, ...] = ()
+    text_fields: tuple[str, ...] = ()
+    timestamp_fields: tuple[str, ...] = ()
+
+    def select(self, fields: str | None) -> list[str]:
+        return select_fields(fields, self.columns, self.key)
+
+    def money(self, selected: Sequence[str]) -> tuple[str, ...]:
+        return tuple(f for f in self.money_fields if f in selected)
+
+    def json_object(self, selected: Sequence[str]) -> str:
+        return json_object_sql(
+            selected,
+            money_fields=self.money_fields,
+            text_fields=self.text_fields,
+            timestamp_fields=self.timestamp_fields,
+        )
+
+
+SPORT = Entity(table="sports", columns=("name",), key=("name",))
+TEAM = Entity(table="teams", columns=("id", "name", "country", "sport", "created_at", "updated_at"), key=("id",))
+COMPETITION = Entity(table="competitions", columns=("id", "name", "country", "sport", "active"), key=("id",))
+EVENT = Entity(
+    table="events",
+    columns=("id", "date", "competition_id", "team_a_id", "team_b_id", "status", "created_at", "updated_at"),
+    key=("id",),
+    timestamp_fields=("date", "created_at", "updated_at"),
+)
+RESULT = Entity(
+    table="results",
+    columns=("event_id", "score_a", "score_b", "created_at", "updated_at"),
+    key=("event_id",),
+)
+CUSTOMER = Entity(
+    table="customers",
+    columns=(
+        "id", "username", "password", "real_name", "currency", "status", "balance", "preferences",
+        "created_at", "updated_at",
+    ),
+    key=("id",),
+    money_fields=("balance",),
+    timestamp_fields=("created_at", "updated_at"),
+)
+BOOKIE = Entity(table="bookies", columns=("name", "description", "preferences"), key=("name",))
+BET = Entity(
+    table="bets",
+    columns=(
+        "id", "bookie", "customer_id", "bookie_bet_id", "bet_type", "event_id", "sport",
+        "placement_status", "outcome", "stake", "odds", "placement_data", "created_at", "updated_at",
+    ),
+    key=("id", "created_at"),
+    money_fields=("stake",),
+    text_fields=("odds",),
+    timestamp_fields=("created_at", "updated_at"),
+)
+BALANCE_CHANGE = Entity(
+    table="balance_changes",
+    columns=("id", "customer_id", "change_type", "delta", "reference_id", "description", "created_at"),
+    key=("id",),
+    money_fields=("delta",),
+    timestamp_fields=("created_at",),
+)
+AUDIT = Entity(
+    table="audit_log",
+    columns=(
+        "id", "table_name", "operation", "username", "changed_at", "row_id", "old_data", "new_data", "changes",
+    ),
+    key=("id", "changed_at"),
+)
+CUSTOMER_STATS = Entity(
+    table="customer_stats",
+    columns=(
+        "customer_id", "username", "currency", "total_bets", "won_bets", "lost_bets", "void_bets",
+        "total_staked", "total_won", "net_profit", "current_balance",
+    ),
+    key=("customer_id",),
+)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Literal
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+
+from .db import db
+
+
+router = APIRouter()
+
+ExportFormat = Literal["ndjson", "csv"]
+
+# Rows pulled from the server-side cursor per round trip, and the buffered
+# payload size at which a chunk is flushed to the client.
+EXPORT_PREFETCH = 2000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    table: str
+    columns: tuple[str, ...]
+    money_fields: tuple[str, ...]
+    json_fields: tuple[str, ...]
+    timestamp_column: str
+
+
+EXPORTS: dict[str, ExportSpec] = {
+    "bets": ExportSpec(
+        table="bets",
+        columns=(
+            "id", "bookie", "customer_id", "bookie_bet_id", "bet_type", "event_id", "sport",
+            "placement_status", "outcome", "stake", "odds", "placement_data", "created_at", "updated_at",
+        ),
+        money_fields=("stake",),
+        json_fields=("placement_data",),
+        timestamp_column="created_at",
+    ),
+    "balance_changes": ExportSpec(
+        table="balance_changes",
+        columns=("id", "customer_id", "change_type", "delta", "reference_id", "description", "created_at"),
+        money_fields=("delta",),
+        json_fields=(),
+        timestamp_column="created_at",
+    ),
+    "audit_log": ExportSpec(
+        table="audit_log",
+        columns=("id", "table_name", "operation", "username", "changed_at", "row_id", "old_data", "new_data"),
+        money_fields=(),
+        json_fields=("old_data", "new_data"),
+        timestamp_column="changed_at",
+    ),
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        # Exact decimal string; float() would round money amounts
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def _ndjson_line(spec: ExportSpec, record: Any) -> str:
+    data = dict(record)
+    for f in spec.money_fields:
+        if data[f] is not None:
+            amount, currency = data[f]
+            data[f] = {"amount": str(amount), "currency": currency}
+    return json.dumps(data, default=_json_default, separators=(",", ":")) + "\n"
+
+
+def _csv_header(spec: ExportSpec) -> list[str]:
+    header: list[str] = []
+    for c in spec.columns:
+        if c in spec.money_fields:
+            header.extend((f"{c}_amount", f"{c}_currency"))
+        else:
+            header.append(c)
+    return header
+
+
+def _csv_values(spec: ExportSpec, record: Any) -> list[Any]:
+    values: list[Any] = []
+    for c in spec.columns:
+        value = record[c]
+        if c in spec.money_fields:
+            values.extend(value if value is not None else (None, None))
+        elif c in spec.json_fields and value is not None:
+            values.append(json.dumps(value, separators=(",", ":")))
+        elif isinstance(value, datetime):
+            values.append(value.isoformat())
+        else:
+            values.append(value)
+    return values
+
+
+def export_query(spec: ExportSpec, since: datetime | None, until: datetime | None) -> tuple[str, list[Any]]:
+    conditions: list[str] = []
+    args: list[Any] = []
+    if since is not None:
+        args.append(since)
+        conditions.append(f"{spec.timestamp_column} >= ${len(args)}")
+    if until is not None:
+        args.append(until)
+        conditions.append(f"{spec.timestamp_column} < ${len(args)}")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    # Ordered like the ({timestamp}, id) indexes, so the range is read in
+    # index order and streamed instead of sorted before the first row
+    order = f"ORDER BY {spec.timestamp_column}, id"
+    return f"SELECT {', '.join(spec.columns)} FROM {spec.table} {where} {order}", args
+
+
+async def _stream_rows(
+    spec: ExportSpec,
+    fmt: ExportFormat,
+    since: datetime | None,
+    until: datetime | None,
+) -> AsyncIterator[bytes]:
+    query, args = export_query(spec, since, until)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer is not None:
+        writer.writerow(_csv_header(spec))
+
+    first = True
+    async with db.acquire() as conn:
+        # Server-side cursor inside a read-only snapshot: rows are pulled in
+        # EXPORT_PREFETCH batches, so memory stays flat regardless of table size.
+        async with conn.transaction(isolation="repeatable_read", readonly=True):
+            async for record in conn.cursor(query, *args, prefetch=EXPORT_PREFETCH):
+                if writer is not None:
+                    writer.writerow(_csv_values(spec, record))
+                else:
+                    buffer.write(_ndjson_line(spec, record))
+                # Flush the first row straight away so clients see bytes
+                # while the rest of the scan is still running
+                if first or buffer.tell() >= EXPORT_CHUNK_BYTES:
+                    first = False
+                    yield buffer.getvalue().encode()
+                    buffer.seek(0)
+                    buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+@router.get("/export/{table}", response_class=StreamingResponse)
+async def export_table(
+    table: Literal["bets", "balance_changes", "audit_log"],
+    fmt: ExportFormat = Query("ndjson", alias="format"),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+) -> StreamingResponse:
+    spec = EXPORTS[table]
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_rows(spec, fmt, since, until),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table}.{fmt}"'},
+    )
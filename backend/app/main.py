@@ -1,14 +1,30 @@
 import os
 from fastapi import FastAPI, Depends
+from .batch import router as batch_router
+from .bulk import router as bulk_router
+from .changes import router as changes_router, setup_change_feed
 from .db import setup_database_events
+from .exports import router as exports_router
+from .maintenance import setup_maintenance_tasks
+from .metrics import TimedJSONResponse, setup_metrics
+from .pnl import router as pnl_router
+from .positions import router as positions_router
 from .routers import router
-from .security import require_api_key
+from .security import require_api_key, require_api_key_or_stream_token
 
-app = FastAPI(title="Sports Betting Admin API", version="0.1.0")
+app = FastAPI(title="Sports Betting Admin API", version="0.1.0", default_response_class=TimedJSONResponse)
 if os.getenv("ENABLE_DB_EVENTS", "1") == "1":
     setup_database_events(app)
+    setup_maintenance_tasks(app)
+    setup_change_feed(app)
 
 app.include_router(router, prefix="/api", dependencies=[Depends(require_api_key)])
+app.include_router(bulk_router, prefix="/api", dependencies=[Depends(require_api_key)])
+app.include_router(batch_router, prefix="/api", dependencies=[Depends(require_api_key)])
+app.include_router(exports_router, prefix="/api", dependencies=[Depends(require_api_key)])
+app.include_router(positions_router, prefix="/api", dependencies=[Depends(require_api_key)])
+app.include_router(pnl_router, prefix="/api", dependencies=[Depends(require_api_key)])
+app.include_router(changes_router, prefix="/api", dependencies=[Depends(require_api_key_or_stream_token)])
 
 
 @app.get("/health")
@@ -16,3 +32,4 @@ async def health() -> dict:
     return {"status": "ok"}
 
 
+setup_metrics(app)
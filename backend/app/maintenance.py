@@ -0,0 +1,452 @@
+"""Background and command-line maintenance jobs.
+
+Run from the backend directory, e.g.::
+
+    python -m app.maintenance reconcile-stats
+    python -m app.maintenance reconcile-stats --rebuild
+    python -m app.maintenance reconcile-positions
+    python -m app.maintenance enable-ledger --customer 42 --lanes 8
+    python -m app.maintenance disable-ledger --customer 42
+    python -m app.maintenance snapshot-balances
+    python -m app.maintenance ensure-partitions
+    python -m app.maintenance archive-partitions --older-than-months 12 --output-dir ./archive
+    python -m app.maintenance backfill-pnl --workers 4 --chunk-hours 168
+    python -m app.maintenance change-feed --enable
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import gzip
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from fastapi import FastAPI
+
+from .db import db
+
+
+logger = logging.getLogger(__name__)
+
+STATS_COLUMNS = (
+    "total_bets", "won_bets", "lost_bets", "void_bets",
+    "total_staked", "total_won", "net_profit", "current_balance",
+)
+
+
+async def fold_customer_stats(conn: Any) -> int:
+    return await conn.fetchval("SELECT fold_customer_stats()")
+
+
+async def check_customer_stats(conn: Any) -> list[dict[str, Any]]:
+    # One entry per customer whose maintained figures differ from a full
+    # recompute. Both sides are read from one snapshot, otherwise in-flight
+    # bets would show up as spurious mismatches.
+    columns = ", ".join(STATS_COLUMNS)
+    async with conn.transaction(isolation="repeatable_read", readonly=True):
+        rows = await conn.fetch(
+            f"""
+            SELECT customer_id,
+                   to_jsonb(m) - 'customer_id' AS maintained,
+                   to_jsonb(r) - 'customer_id' AS expected
+            FROM (SELECT customer_id, {columns} FROM customer_stats) m
+            FULL JOIN (SELECT customer_id, {columns} FROM customer_stats_recomputed) r
+                USING (customer_id)
+            WHERE (m.*) IS DISTINCT FROM (r.*)
+            ORDER BY customer_id
+            """
+        )
+    return [dict(r) for r in rows]
+
+
+async def rebuild_customer_stats(conn: Any) -> None:
+    async with conn.transaction():
+        await conn.execute("SELECT rebuild_customer_stats()")
+
+
+POSITION_KEY = ("event_id", "bet_type", "bookie", "currency")
+POSITION_COLUMNS = (
+    "open_bets", "open_stake", "potential_payout", "liability",
+    "settled_bets", "settled_stake", "settled_payout",
+)
+
+
+async def fold_event_positions(conn: Any) -> int:
+    return await conn.fetchval("SELECT fold_event_positions()")
+
+
+async def check_event_positions(conn: Any) -> list[dict[str, Any]]:
+    # Same approach as check_customer_stats, one entry per mismatched position
+    key = ", ".join(POSITION_KEY)
+    columns = ", ".join(POSITION_COLUMNS)
+    async with conn.transaction(isolation="repeatable_read", readonly=True):
+        rows = await conn.fetch(
+            f"""
+            SELECT {key},
+                   to_jsonb(m) - ARRAY[{", ".join(f"'{k}'" for k in POSITION_KEY)}] AS maintained,
+                   to_jsonb(r) - ARRAY[{", ".join(f"'{k}'" for k in POSITION_KEY)}] AS expected
+            FROM (SELECT {key}, {columns} FROM event_positions) m
+            FULL JOIN (SELECT {key}, {columns} FROM event_positions_recomputed) r
+                USING ({key})
+            WHERE (m.*) IS DISTINCT FROM (r.*)
+            ORDER BY {key}
+            """
+        )
+    return [dict(r) for r in rows]
+
+
+async def rebuild_event_positions(conn: Any) -> None:
+    async with conn.transaction():
+        await conn.execute("SELECT rebuild_event_positions()")
+
+
+async def fold_pnl_hourly(conn: Any) -> int:
+    return await conn.fetchval("SELECT fold_pnl_hourly()")
+
+
+def pnl_chunks(start: datetime, end: datetime, chunk_hours: int) -> list[tuple[datetime, datetime]]:
+    # Hour-aligned [from, to) ranges covering start..end, matching the buckets
+    start, end = (t if t.tzinfo else t.replace(tzinfo=timezone.utc) for t in (start, end))
+    current = start.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    step = timedelta(hours=chunk_hours)
+    chunks: list[tuple[datetime, datetime]] = []
+    while current <= end:
+        chunks.append((current, current + step))
+        current += step
+    return chunks
+
+
+async def backfill_pnl(
+    since: datetime | None, until: datetime | None, chunk_hours: int, workers: int
+) -> tuple[int, int]:
+    # Rebuilds pnl_hourly_totals from bets, one transaction per chunk spread
+    # over up to `workers` pooled connections. Returns (chunks, bucket rows).
+    async with db.acquire() as conn:
+        bounds = await conn.fetchrow("SELECT min(created_at) AS first, max(created_at) AS last FROM bets")
+    since = since or bounds["first"]
+    until = until or bounds["last"]
+    if since is None or until is None:
+        return 0, 0
+    chunks = pnl_chunks(since, until, chunk_hours)
+    limit = asyncio.Semaphore(workers)
+
+    async def run(chunk: tuple[datetime, datetime]) -> int:
+        async with limit, db.acquire() as conn, conn.transaction():
+            return await conn.fetchval("SELECT backfill_pnl_hourly($1, $2)", *chunk)
+
+    counts = await asyncio.gather(*(run(c) for c in chunks))
+    return len(chunks), sum(counts)
+
+
+async def snapshot_balances(conn: Any) -> int:
+    # One short transaction per ledger customer, so a snapshot never holds
+    # more than one hot customer's lanes at a time
+    customer_ids = await conn.fetch("SELECT DISTINCT customer_id FROM balance_lanes ORDER BY customer_id")
+    for r in customer_ids:
+        async with conn.transaction():
+            await conn.execute("SELECT snapshot_balance_ledger($1)", r["customer_id"])
+    return len(customer_ids)
+
+
+PARTITIONED_TABLES = ("audit_log", "balance_changes")
+PARTITION_MONTHS_AHEAD = 3
+
+
+async def ensure_partitions(conn: Any) -> int:
+    created = 0
+    for table in PARTITIONED_TABLES:
+        created += await conn.fetchval(
+            "SELECT ensure_monthly_partitions($1, $2)", table, PARTITION_MONTHS_AHEAD
+        )
+    return created
+
+
+def _months_before(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+async def archivable_partitions(conn: Any, older_than_months: int) -> list[tuple[str, str]]:
+    # (parent, partition) for monthly partitions that end on or before the
+    # start of the month older_than_months ago, oldest first
+    cutoff = _months_before(datetime.now(timezone.utc).date(), older_than_months)
+    rows = await conn.fetch(
+        """
+        SELECT parent.relname AS parent, child.relname AS partition
+        FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relname = ANY($1::text[])
+        ORDER BY child.relname
+        """,
+        list(PARTITIONED_TABLES),
+    )
+    result: list[tuple[str, str]] = []
+    for r in rows:
+        match = re.fullmatch(rf"{r['parent']}_y(\d{{4}})m(\d{{2}})", r["partition"])
+        if match is None:  # the default partition
+            continue
+        month_end = _months_before(date(int(match[1]), int(match[2]), 1), -1)
+        if month_end <= cutoff:
+            result.append((r["parent"], r["partition"]))
+    return result
+
+
+async def archive_partition(conn: Any, parent: str, partition: str, output_dir: Path) -> Path:
+    # Export, detach and drop in one transaction: the partition is locked
+    # against writes first, and nothing is dropped unless the export was
+    # fully written. The file is only renamed into place once complete.
+    path = output_dir / f"{partition}.csv.gz"
+    partial = path.with_name(path.name + ".partial")
+    async with conn.transaction():
+        await conn.execute(f'LOCK TABLE "{partition}" IN SHARE MODE')
+        with gzip.open(partial, "wb") as f:
+            await conn.copy_from_table(partition, output=f, format="csv", header=True)
+        await conn.execute(f'ALTER TABLE "{parent}" DETACH PARTITION "{partition}"')
+        await conn.execute(f'DROP TABLE "{partition}"')
+        partial.replace(path)
+    return path
+
+
+async def _run_periodically(name: str, interval: float, job: Any) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with db.acquire() as conn:
+                await job(conn)
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # keep the loop alive; the next run retries
+            logger.exception("Maintenance job %s failed", name)
+
+
+def setup_maintenance_tasks(app: FastAPI) -> None:
+    tasks: list[asyncio.Task[None]] = []
+
+    @app.on_event("startup")
+    async def _start() -> None:  # noqa: ANN202
+        interval = float(os.getenv("STATS_FOLD_INTERVAL", "5"))
+        if interval > 0:
+            tasks.append(
+                asyncio.create_task(_run_periodically("fold_customer_stats", interval, fold_customer_stats))
+            )
+            tasks.append(
+                asyncio.create_task(_run_periodically("fold_event_positions", interval, fold_event_positions))
+            )
+            tasks.append(asyncio.create_task(_run_periodically("fold_pnl_hourly", interval, fold_pnl_hourly)))
+        interval = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL", "3600"))
+        if interval > 0:
+            tasks.append(
+                asyncio.create_task(_run_periodically("ensure_partitions", interval, ensure_partitions))
+            )
+        interval = float(os.getenv("BALANCE_SNAPSHOT_INTERVAL", "30"))
+        if interval > 0:
+            tasks.append(
+                asyncio.create_task(_run_periodically("snapshot_balances", interval, snapshot_balances))
+            )
+
+    @app.on_event("shutdown")
+    async def _stop() -> None:  # noqa: ANN202
+        for task in tasks:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        tasks.clear()
+
+
+async def _reconcile_stats(rebuild: bool) -> int:
+    await db.connect(command_timeout=None)
+    try:
+        async with db.acquire() as conn:
+            if rebuild:
+                await rebuild_customer_stats(conn)
+                print("customer_stats rebuilt from bets")
+            mismatches = await check_customer_stats(conn)
+    finally:
+        await db.disconnect()
+    for m in mismatches:
+        print(f"customer {m['customer_id']}: maintained={m['maintained']} expected={m['expected']}")
+    print(f"{len(mismatches)} mismatched customer(s)")
+    return 1 if mismatches else 0
+
+
+async def _reconcile_positions(rebuild: bool) -> int:
+    await db.connect(command_timeout=None)
+    try:
+        async with db.acquire() as conn:
+            if rebuild:
+                await rebuild_event_positions(conn)
+                print("event_positions rebuilt from bets")
+            mismatches = await check_event_positions(conn)
+    finally:
+        await db.disconnect()
+    for m in mismatches:
+        key = "/".join(str(m[k]) for k in POSITION_KEY)
+        print(f"position {key}: maintained={m['maintained']} expected={m['expected']}")
+    print(f"{len(mismatches)} mismatched position(s)")
+    return 1 if mismatches else 0
+
+
+async def _ledger_command(command: str, customer_id: int | None, lanes: int) -> int:
+    await db.connect(command_timeout=None)
+    try:
+        async with db.acquire() as conn:
+            if command == "enable-ledger":
+                await conn.execute("SELECT enable_balance_ledger($1, $2)", customer_id, lanes)
+                print(f"customer {customer_id}: ledger balance mode")
+            elif command == "disable-ledger":
+                await conn.execute("SELECT disable_balance_ledger($1)", customer_id)
+                print(f"customer {customer_id}: direct balance mode")
+            else:
+                count = await snapshot_balances(conn)
+                print(f"{count} ledger balance(s) snapshotted")
+    finally:
+        await db.disconnect()
+    return 0
+
+
+async def _partitions_command(command: str, older_than_months: int, output_dir: str, dry_run: bool) -> int:
+    await db.connect(command_timeout=None)
+    try:
+        async with db.acquire() as conn:
+            if command == "ensure-partitions":
+                print(f"{await ensure_partitions(conn)} partition(s) created")
+                return 0
+            candidates = await archivable_partitions(conn, older_than_months)
+            directory = Path(output_dir)
+            if not dry_run:
+                directory.mkdir(parents=True, exist_ok=True)
+            for parent, partition in candidates:
+                if dry_run:
+                    print(f"would archive {partition}")
+                else:
+                    print(f"archived {partition} to {await archive_partition(conn, parent, partition, directory)}")
+    finally:
+        await db.disconnect()
+    return 0
+
+
+async def _bet_validation_command(mode: str | None) -> int:
+    await db.connect(command_timeout=None)
+    try:
+        async with db.acquire() as conn:
+            if mode is not None:
+                await conn.execute("SELECT set_bet_validation($1)", mode)
+            print(f"bet validation: {await conn.fetchval('SELECT bet_validation_mode()')}")
+    finally:
+        await db.disconnect()
+    return 0
+
+
+async def _change_feed_command(enabled: bool | None) -> int:
+    await db.connect(command_timeout=None)
+    try:
+        async with db.acquire() as conn:
+            if enabled is not None:
+                await conn.execute("SELECT set_change_feed($1)", enabled)
+            state = "enabled" if await conn.fetchval("SELECT change_feed_enabled()") else "disabled"
+            print(f"change feed: {state}")
+    finally:
+        await db.disconnect()
+    return 0
+
+
+async def _backfill_pnl_command(since: datetime | None, until: datetime | None, chunk_hours: int, workers: int) -> int:
+    await db.connect(command_timeout=None, min_size=1, max_size=workers)
+    try:
+        chunks, rows = await backfill_pnl(since, until, chunk_hours, workers)
+    finally:
+        await db.disconnect()
+    print(f"pnl_hourly rebuilt: {chunks} chunk(s), {rows} bucket row(s)")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reconcile = commands.add_parser(
+        "reconcile-stats", help="check customer_stats against a full recompute from bets"
+    )
+    reconcile.add_argument(
+        "--rebuild", action="store_true", help="rebuild the totals from scratch before checking"
+    )
+
+    positions = commands.add_parser(
+        "reconcile-positions", help="check event_positions against a full recompute from bets"
+    )
+    positions.add_argument(
+        "--rebuild", action="store_true", help="rebuild the totals from scratch before checking"
+    )
+
+    enable = commands.add_parser(
+        "enable-ledger", help="split a hot customer's balance into lanes to avoid row-lock contention"
+    )
+    enable.add_argument("--customer", type=int, required=True)
+    enable.add_argument("--lanes", type=int, default=8)
+    disable = commands.add_parser("disable-ledger", help="fold a customer's lanes back into customers.balance")
+    disable.add_argument("--customer", type=int, required=True)
+    commands.add_parser("snapshot-balances", help="write ledger balances back to customers.balance")
+
+    commands.add_parser("ensure-partitions", help="create monthly audit_log/balance_changes partitions ahead")
+    archive = commands.add_parser(
+        "archive-partitions", help="export old monthly partitions to gzipped CSV, then detach and drop them"
+    )
+    archive.add_argument("--older-than-months", type=int, default=12)
+    archive.add_argument("--output-dir", default="archive")
+    archive.add_argument("--dry-run", action="store_true", help="only list the partitions that would be archived")
+
+    backfill = commands.add_parser(
+        "backfill-pnl", help="rebuild pnl_hourly from bets in parallel chunks (all history by default)"
+    )
+    backfill.add_argument("--since", type=datetime.fromisoformat, help="first bet time to include (ISO 8601)")
+    backfill.add_argument("--until", type=datetime.fromisoformat, help="last bet time to include (ISO 8601)")
+    backfill.add_argument("--chunk-hours", type=int, default=24 * 7)
+    backfill.add_argument("--workers", type=int, default=4)
+
+    validation = commands.add_parser(
+        "bet-validation", help="show or switch between consolidated and separate bet validation triggers"
+    )
+    validation.add_argument("--mode", choices=("consolidated", "separate"))
+
+    feed = commands.add_parser(
+        "change-feed", help="show or switch the NOTIFY trigger behind GET /api/changes/stream"
+    )
+    switch = feed.add_mutually_exclusive_group()
+    switch.add_argument("--enable", dest="enabled", action="store_true", default=None)
+    switch.add_argument("--disable", dest="enabled", action="store_false")
+
+    args = parser.parse_args(argv)
+    if args.command == "reconcile-stats":
+        return asyncio.run(_reconcile_stats(args.rebuild))
+    if args.command == "reconcile-positions":
+        return asyncio.run(_reconcile_positions(args.rebuild))
+    if args.command in ("ensure-partitions", "archive-partitions"):
+        return asyncio.run(
+            _partitions_command(
+                args.command,
+                getattr(args, "older_than_months", 0),
+                getattr(args, "output_dir", ""),
+                getattr(args, "dry_run", False),
+            )
+        )
+    if args.command == "bet-validation":
+        return asyncio.run(_bet_validation_command(args.mode))
+    if args.command == "change-feed":
+        return asyncio.run(_change_feed_command(args.enabled))
+    if args.command == "backfill-pnl":
+        return asyncio.run(_backfill_pnl_command(args.since, args.until, args.chunk_hours, args.workers))
+    if args.command in ("enable-ledger", "disable-ledger", "snapshot-balances"):
+        return asyncio.run(
+            _ledger_command(args.command, getattr(args, "customer", None), getattr(args, "lanes", 0))
+        )
+    return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,258 @@
+"""Per-route latency histograms broken into request phases.
+
+MetricsMiddleware puts a RequestTimings in a context variable for every HTTP
+request; the pieces of the stack that know what they are doing add to it:
+
+* pool_wait: waiting for a pooled connection (Database.acquire)
+* db: asyncpg calls, including decoding the returned rows
+* handler: the rest of the endpoint function, e.g. turning rows into models
+* validate: FastAPI checking/serialising the return value against response_model
+* encode: rendering the JSON body
+* other: everything else (routing, dependencies such as the API key, sending)
+
+Histograms are kept in process and exposed in the Prometheus text format by
+``GET /metrics``, which takes the API key unless ``METRICS_PUBLIC=1``. With
+several uvicorn workers each process reports its own. Responses built by
+hand (the fast and postgres serialization modes, exports) skip FastAPI's
+validation and rendering, so their encoding counts as handler.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional
+
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import profiling
+from .security import require_api_key
+
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PHASES = ("pool_wait", "db", "handler", "validate", "encode", "other")
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# For scrapers that cannot send the X-API-Key header
+METRICS_PUBLIC = os.getenv("METRICS_PUBLIC", "0") == "1"
+
+# (name, type, help, value) for series owned by other modules, e.g. the pool
+Sample = tuple[str, str, str, float]
+
+
+@dataclass
+class RequestTimings:
+    route: Optional[str] = None
+    phases: dict[str, float] = field(default_factory=dict)
+    endpoint_returned_at: Optional[float] = None
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_timings", default=None)
+
+
+def record_phase(phase: str, seconds: float) -> None:
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(phase, seconds)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        result: list[tuple[str, int]] = []
+        running = 0
+        for bound, count in zip((*map(repr, self.buckets), "+Inf"), self.counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+
+def _labels(**labels: str) -> str:
+    escaped = (
+        f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), " ")}"'
+        for k, v in labels.items()
+    )
+    return ",".join(escaped)
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self.requests: dict[tuple[str, str, str], Histogram] = {}
+        self.phases: dict[tuple[str, str, str], Histogram] = {}
+        self.collectors: list[Callable[[], Iterable[Sample]]] = []
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        self.collectors.append(collector)
+
+    def observe_request(self, method: str, route: str, status: int, total: float, timings: RequestTimings) -> None:
+        key = (method, route, str(status))
+        self.requests.setdefault(key, Histogram()).observe(total)
+        phases = dict(timings.phases)
+        phases["other"] = max(total - sum(phases.values()), 0.0)
+        for phase in PHASES:
+            self.phases.setdefault((method, route, phase), Histogram()).observe(phases.get(phase, 0.0))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for name, help_text, series, label in (
+            ("http_request_duration_seconds", "Request latency by route", self.requests, "status"),
+            ("http_request_phase_seconds", "Time per request spent in each phase", self.phases, "phase"),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route, extra), histogram in sorted(series.items()):
+                labels = _labels(method=method, route=route, **{label: extra})
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        for name, kind, help_text, value in (s for c in self.collectors for s in c()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry = registry) -> None:
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        sampler = profiling.start_for(scope) if profiling.enabled else None
+        status = 500
+        streaming = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = message.get("headers", [])
+                streaming = any(k == b"content-type" and v.startswith(b"text/event-stream") for k, v in headers)
+                if sampler is not None:
+                    message["headers"] = [*headers, (b"x-profile-file", sampler.path.encode())]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            total = time.perf_counter() - started
+            current_timings.reset(token)
+            if sampler is not None:
+                await sampler.stop()
+            # Long-lived streams would only pile up in the +Inf bucket
+            if not streaming:
+                self.registry.observe_request(
+                    scope["method"], timings.route or "unmatched", status, total, timings
+                )
+
+
+def _timed_endpoint(call: Callable[..., Any], route: str) -> Callable[..., Any]:
+    if inspect.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def timed(*args: Any, **kwargs: Any) -> Any:
+            timings = current_timings.get()
+            if timings is None:
+                return await call(*args, **kwargs)
+            timings.route = route
+            before = sum(timings.phases.values())
+            started = time.perf_counter()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                _endpoint_done(timings, started, before)
+
+        return timed
+
+    @functools.wraps(call)
+    def timed_sync(*args: Any, **kwargs: Any) -> Any:
+        timings = current_timings.get()
+        if timings is None:
+            return call(*args, **kwargs)
+        timings.route = route
+        before = sum(timings.phases.values())
+        started = time.perf_counter()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            _endpoint_done(timings, started, before)
+
+    return timed_sync
+
+
+def _endpoint_done(timings: RequestTimings, started: float, before: float) -> None:
+    # handler is the endpoint's own time: pool_wait and db recorded while it
+    # ran are already counted
+    now = time.perf_counter()
+    timings.endpoint_returned_at = now
+    nested = sum(timings.phases.values()) - before
+    timings.add("handler", max(now - started - nested, 0.0))
+
+
+def instrument_routes(app: FastAPI) -> None:
+    # The request handler of each route looks up dependant.call per request,
+    # so wrapping it here also covers routes copied in by include_router
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            route.dependant.call = _timed_endpoint(route.dependant.call, route.path_format)
+
+
+class TimedJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        timings = current_timings.get()
+        if timings is None:
+            return super().render(content)
+        started = time.perf_counter()
+        if timings.endpoint_returned_at is not None:
+            timings.add("validate", started - timings.endpoint_returned_at)
+            timings.endpoint_returned_at = None
+        body = super().render(content)
+        timings.add("encode", time.perf_counter() - started)
+        return body
+
+
+def setup_metrics(app: FastAPI) -> None:
+    # Call after every router is included
+    if not METRICS_ENABLED:
+        return
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get(
+        "/metrics",
+        response_class=PlainTextResponse,
+        include_in_schema=False,
+        dependencies=[] if METRICS_PUBLIC else [Depends(require_api_key)],
+    )
+    async def prometheus_metrics() -> PlainTextResponse:
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    instrument_routes(app)
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, Literal, Optional
+from typing import Any, ClassVar, Literal, Optional
 
-from pydantic import BaseModel, Field, constr, condecimal
+from pydantic import BaseModel, ConfigDict, Field, constr, condecimal, model_validator
 
 
 CurrencyCode = Literal["USD", "GBP", "EUR"]
@@ -19,6 +19,24 @@ class MoneyAmount(BaseModel):
     currency: CurrencyCode
 
 
+class PatchModel(BaseModel):
+    # Partial update: only the fields sent are written. null is accepted
+    # only for the nullable columns, and fields that cannot be patched (such
+    # as a customer's balance) are rejected rather than ignored
+    model_config = ConfigDict(extra="forbid")
+    nullable: ClassVar[frozenset[str]] = frozenset()
+
+    @model_validator(mode="after")
+    def _reject_nulls(self) -> "PatchModel":
+        for name in self.model_fields_set:
+            if getattr(self, name) is None and name not in self.nullable:
+                raise ValueError(f"{name} cannot be null")
+        return self
+
+    def changes(self) -> dict[str, Any]:
+        return self.model_dump(exclude_unset=True)
+
+
 class Sport(BaseModel):
     name: constr(min_length=1)
 
@@ -35,6 +53,12 @@ class Team(TeamCreate):
     updated_at: datetime
 
 
+class TeamPatch(PatchModel):
+    name: Optional[str] = None
+    country: Optional[str] = None
+    sport: Optional[str] = None
+
+
 class CompetitionCreate(BaseModel):
     name: str
     country: str
@@ -46,6 +70,13 @@ class Competition(CompetitionCreate):
     id: int
 
 
+class CompetitionPatch(PatchModel):
+    name: Optional[str] = None
+    country: Optional[str] = None
+    sport: Optional[str] = None
+    active: Optional[bool] = None
+
+
 class EventCreate(BaseModel):
     date: datetime
     competition_id: int
@@ -60,6 +91,14 @@ class Event(EventCreate):
     updated_at: datetime
 
 
+class EventPatch(PatchModel):
+    date: Optional[datetime] = None
+    competition_id: Optional[int] = None
+    team_a_id: Optional[int] = None
+    team_b_id: Optional[int] = None
+    status: Optional[EventStatus] = None
+
+
 class ResultCreate(BaseModel):
     event_id: int
     score_a: int
@@ -71,6 +110,13 @@ class Result(ResultCreate):
     updated_at: datetime
 
 
+class ResultPatch(PatchModel):
+    nullable = frozenset({"score_a", "score_b"})
+
+    score_a: Optional[int] = None
+    score_b: Optional[int] = None
+
+
 class CustomerCreate(BaseModel):
     username: str
     password: str
@@ -87,6 +133,16 @@ class Customer(CustomerCreate):
     updated_at: datetime
 
 
+class CustomerPatch(PatchModel):
+    # No balance (it moves through balance_changes) and no currency, which
+    # the balance carries
+    username: Optional[str] = None
+    password: Optional[str] = None
+    real_name: Optional[str] = None
+    status: Optional[CustomerStatus] = None
+    preferences: Optional[dict[str, Any]] = None
+
+
 class BookieCreate(BaseModel):
     name: str
     description: str
@@ -117,6 +173,97 @@ class Bet(BetCreate):
     updated_at: datetime
 
 
+class BetPatch(PatchModel):
+    nullable = frozenset({"outcome"})
+
+    bookie: Optional[str] = None
+    customer_id: Optional[int] = None
+    bookie_bet_id: Optional[str] = None
+    bet_type: Optional[str] = None
+    event_id: Optional[int] = None
+    sport: Optional[str] = None
+    placement_status: Optional[PlacementStatus] = None
+    outcome: Optional[BetOutcome] = None
+    stake: Optional[MoneyAmount] = None
+    odds: Optional[condecimal(max_digits=20, decimal_places=10)] = Field(None, ge=1.01, le=999.0)
+    placement_data: Optional[dict[str, Any]] = None
+
+
+class EnrichedBet(Bet):
+    customer_username: str
+    event_date: datetime
+    event_status: EventStatus
+    competition_id: int
+    competition_name: str
+    team_a_name: str
+    team_b_name: str
+
+
+class BulkRowError(BaseModel):
+    index: int
+    error: str
+
+
+class BulkBetResult(BaseModel):
+    inserted: int
+    # Aligned with the submitted rows; None where the row was rejected
+    ids: list[Optional[int]]
+    errors: list[BulkRowError]
+
+
+BatchEntity = Literal["teams", "competitions", "events", "results", "customers", "bets"]
+
+
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    entity: BatchEntity
+    # The record to update or delete; the event id for results
+    id: Optional[int] = None
+    # The fields of the record for create, the fields to change for update
+    data: dict[str, Any] = Field(default_factory=dict)
+
+
+class BatchRequest(BaseModel):
+    operations: list[BatchOperation]
+
+
+class BatchOperationResult(BaseModel):
+    index: int
+    status: Literal["created", "updated", "unchanged", "deleted", "not_found"]
+    id: Optional[int] = None
+
+
+class BatchResult(BaseModel):
+    results: list[BatchOperationResult]
+
+
+class SettlementRule(BaseModel):
+    bet_type: str
+    # Matched against placement_data->>'selection'; None matches any selection
+    selection: Optional[str] = None
+    outcome: BetOutcome
+
+
+class EventSettlement(BaseModel):
+    # Rules are tried in order, first match wins; explicit per-bet outcomes
+    # take precedence over rules
+    rules: list[SettlementRule] = Field(default_factory=list)
+    outcomes: dict[int, BetOutcome] = Field(default_factory=dict)
+    # Append match_winner rules (home_win/draw/away_win) derived from the
+    # event's posted result
+    from_result: bool = False
+
+
+class SettlementResult(BaseModel):
+    event_id: int
+    settled: int
+    won: int
+    lost: int
+    voided: int
+    unmatched: int
+    total_payout: float
+
+
 class BalanceChangeCreate(BaseModel):
     customer_id: int
     change_type: BalanceChangeType
@@ -139,6 +286,8 @@ class AuditLog(BaseModel):
     row_id: Optional[int] = None
     old_data: Optional[dict[str, Any]] = None
     new_data: Optional[dict[str, Any]] = None
+    # Only with diff=true: {field: {"old": ..., "new": ...}} for changed fields
+    changes: Optional[dict[str, Any]] = None
 
 
 class CustomerStats(BaseModel):
@@ -155,3 +304,31 @@ class CustomerStats(BaseModel):
     current_balance: float
 
 
+class EventPosition(BaseModel):
+    event_id: int
+    bet_type: str
+    bookie: str
+    currency: CurrencyCode
+    open_bets: int
+    open_stake: float
+    potential_payout: float
+    liability: float
+    settled_bets: int
+    settled_stake: float
+    settled_payout: float
+
+
+class PnlBucket(BaseModel):
+    bucket: datetime
+    bookie: Optional[str] = None
+    sport: Optional[str] = None
+    competition_id: Optional[int] = None
+    event_id: Optional[int] = None
+    currency: CurrencyCode
+    bets: int
+    turnover: float
+    settled_bets: int
+    settled_stake: float
+    payout: float
+    ggr: float
+    hold: Optional[float] = None
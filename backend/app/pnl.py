@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from .db import db
+from .models import CurrencyCode, PnlBucket
+
+
+router = APIRouter()
+
+PnlDimension = Literal["bookie", "sport", "competition", "event"]
+
+_DIMENSIONS: dict[str, str] = {
+    "bookie": "p.bookie AS bookie",
+    "sport": "p.sport AS sport",
+    "competition": "e.competition_id AS competition_id",
+    "event": "p.event_id AS event_id",
+}
+
+
+@router.get("/pnl", response_model=list[PnlBucket])
+async def get_pnl(
+    from_: datetime = Query(..., alias="from"),
+    to: Optional[datetime] = Query(None),
+    bucket: Literal["hour", "day"] = Query("day"),
+    group_by: Optional[list[PnlDimension]] = Query(None),
+    bookie: Optional[list[str]] = Query(None),
+    sport: Optional[list[str]] = Query(None),
+    competition_id: Optional[list[int]] = Query(None),
+    event_id: Optional[list[int]] = Query(None),
+    currency: Optional[CurrencyCode] = Query(None),
+) -> list[PnlBucket]:
+    # Reads the hourly rollups only (bets by placement hour, UTC); always
+    # split by currency since amounts in different currencies do not add up.
+    # Times without an offset are UTC.
+    from_ = from_ if from_.tzinfo else from_.replace(tzinfo=timezone.utc)
+    to = to if to is None or to.tzinfo else to.replace(tzinfo=timezone.utc)
+    if to is not None and to <= from_:
+        raise HTTPException(400, "to must be after from")
+    dimensions = list(dict.fromkeys(group_by or ()))
+    args: list[Any] = [bucket, from_]
+    conditions = ["p.bucket >= date_trunc('hour', $2::timestamptz, 'UTC')"]
+    if to is not None:
+        args.append(to)
+        conditions.append(f"p.bucket < ${len(args)}")
+    for column, values in (
+        ("p.bookie", bookie),
+        ("p.sport", sport),
+        ("e.competition_id", competition_id),
+        ("p.event_id", event_id),
+    ):
+        if values:
+            args.append(values)
+            conditions.append(f"{column} = ANY(${len(args)})")
+    if currency is not None:
+        args.append(currency)
+        conditions.append(f"p.currency = ${len(args)}")
+    join = "JOIN events e ON e.id = p.event_id" if "competition" in dimensions or competition_id else ""
+    selected = "".join(f"{_DIMENSIONS[d]}, " for d in dimensions)
+    grouped = "".join(f", {i + 2}" for i in range(len(dimensions)))
+
+    async with db.acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT date_trunc($1, p.bucket, 'UTC') AS bucket, {selected}p.currency,
+                   SUM(p.bets)::bigint AS bets,
+                   SUM(p.turnover) AS turnover,
+                   SUM(p.settled_bets)::bigint AS settled_bets,
+                   SUM(p.settled_stake) AS settled_stake,
+                   SUM(p.payout) AS payout,
+                   SUM(p.settled_stake) - SUM(p.payout) AS ggr,
+                   (SUM(p.settled_stake) - SUM(p.payout)) / NULLIF(SUM(p.settled_stake), 0) AS hold
+            FROM pnl_hourly p {join}
+            WHERE {' AND '.join(conditions)}
+            GROUP BY 1{grouped}, p.currency
+            ORDER BY 1{grouped}, p.currency
+            """,
+            *args,
+        )
+    return [PnlBucket(**dict(r)) for r in rows]
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from .db import db
+from .models import EventPosition, EventStatus
+
+
+router = APIRouter()
+
+_POSITION_COLUMNS = """
+    p.event_id, p.bet_type, p.bookie, p.currency, p.open_bets, p.open_stake,
+    p.potential_payout, p.liability, p.settled_bets, p.settled_stake, p.settled_payout
+"""
+
+
+@router.get("/events/{event_id}/positions", response_model=list[EventPosition])
+async def get_event_positions(event_id: int) -> list[EventPosition]:
+    async with db.acquire() as conn:
+        if not await conn.fetchval("SELECT 1 FROM events WHERE id=$1", event_id):
+            raise HTTPException(404, "Event not found")
+        rows = await conn.fetch(
+            f"""
+            SELECT {_POSITION_COLUMNS}
+            FROM event_positions p
+            WHERE p.event_id = $1
+            ORDER BY p.bet_type, p.bookie, p.currency
+            """,
+            event_id,
+        )
+    return [EventPosition(**dict(r)) for r in rows]
+
+
+def positions_query(status: Optional[str], event_ids: Optional[list[int]]) -> tuple[str, list[Any]]:
+    # Both filters are on event_id, so Postgres pushes them through the
+    # view's GROUP BY into the totals and deltas scans instead of
+    # aggregating every event first; the status is resolved to event ids
+    # up front rather than joined afterwards
+    conditions: list[str] = []
+    args: list[Any] = []
+    if status is not None:
+        args.append(status)
+        conditions.append(f"p.event_id = ANY(ARRAY(SELECT id FROM events WHERE status = ${len(args)}))")
+    if event_ids:
+        args.append(event_ids)
+        conditions.append(f"p.event_id = ANY(${len(args)}::bigint[])")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"""
+        SELECT {_POSITION_COLUMNS}
+        FROM event_positions p
+        {where}
+        ORDER BY p.event_id, p.bet_type, p.bookie, p.currency
+    """
+    return query, args
+
+
+@router.get("/positions", response_model=list[EventPosition])
+async def list_positions(
+    status: Optional[EventStatus] = Query(None),
+    event_id: Optional[list[int]] = Query(None),
+) -> list[EventPosition]:
+    # Reads maintained totals only, so dashboards can poll this cheaply
+    query, args = positions_query(status, event_id)
+    async with db.acquire() as conn:
+        rows = await conn.fetch(query, *args)
+    return [EventPosition(**dict(r)) for r in rows]
@@ -0,0 +1,128 @@
+"""Opt-in sampling profiler that writes flame-graph input.
+
+With ``PROFILING_ENABLED=1`` a request sent with ``X-Profile: 1`` and a valid
+``X-API-Key`` (or a random ``PROFILE_SAMPLE_RATE`` fraction of all requests)
+is profiled: a background thread samples the event loop thread's Python
+stack every ``PROFILE_INTERVAL_MS`` for as long as the request runs, and the
+counts are written from a worker thread in the folded format
+(``outer;inner;leaf count`` per line) to ``PROFILE_DIR``. The file name is
+returned in the ``X-Profile-File`` header; render it with ``flamegraph.pl``
+or speedscope.
+
+Samples are wall clock and cover the whole event loop, so requests running
+concurrently show up too, and time spent waiting on the database appears as
+the loop's selector poll. The thread only runs while a profiled request is
+in flight; when profiling is disabled the cost is one boolean check.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Optional
+
+from starlette.types import Scope
+
+from .security import api_key_valid
+
+
+enabled = os.getenv("PROFILING_ENABLED", "0") == "1"
+SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "profiles"))
+
+
+def frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = "/".join(code.co_filename.rsplit("/", 2)[-2:])
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+
+
+def fold_stack(frame: Optional[FrameType]) -> str:
+    labels: list[str] = []
+    while frame is not None:
+        labels.append(frame_label(frame).replace(";", ":"))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def format_folded(counts: Counter[str]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(counts.items()))
+
+
+class Session:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.counts: Counter[str] = Counter()
+
+    async def stop(self) -> None:
+        sampler.remove(self)
+        await asyncio.to_thread(self._write)
+
+    def _write(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as f:
+            f.write(format_folded(self.counts))
+
+
+class Sampler:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sessions: set[Session] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._target = 0
+
+    def add(self, session: Session) -> None:
+        with self._lock:
+            self._sessions.add(session)
+            if self._thread is None:
+                # Requests are served on the event loop thread, which is the caller
+                self._target = threading.get_ident()
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+
+    def remove(self, session: Session) -> None:
+        with self._lock:
+            self._sessions.discard(session)
+
+    def _run(self) -> None:
+        while True:
+            frame = sys._current_frames().get(self._target)
+            stack = fold_stack(frame) if frame is not None else None
+            with self._lock:
+                if not self._sessions:
+                    self._thread = None
+                    return
+                if stack:
+                    for session in self._sessions:
+                        session.counts[stack] += 1
+            time.sleep(INTERVAL)
+
+
+sampler = Sampler()
+
+
+def _requested(scope: Scope) -> bool:
+    # The header makes the server write a file, so it needs the API key
+    headers = dict(scope.get("headers", ()))
+    if headers.get(b"x-profile", b"0") not in (b"", b"0"):
+        api_key = headers.get(b"x-api-key")
+        return api_key is not None and api_key_valid(api_key.decode("latin-1"))
+    return SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE
+
+
+def start_for(scope: Scope) -> Optional[Session]:
+    if not _requested(scope):
+        return None
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}-{time.perf_counter_ns() % 10**9:09d}-{scope['method']}-{slug}.folded"
+    session = Session(os.path.join(PROFILE_DIR, name))
+    sampler.add(session)
+    return session
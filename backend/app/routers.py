@@ -1,35 +1,77 @@
 from __future__ import annotations
 
-from typing import Any, Iterable
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterable
 
-from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import BaseModel, TypeAdapter
 
+from .cache import reference_cache
+from .conditional import if_match_versions, is_conditional, not_modified, validators
 from .db import db
+from .entities import (
+    AUDIT,
+    BALANCE_CHANGE,
+    BET,
+    BOOKIE,
+    COMPETITION,
+    CUSTOMER,
+    CUSTOMER_STATS,
+    EVENT,
+    FIELDS_DESCRIPTION,
+    RESULT,
+    SPORT,
+    TEAM,
+    Entity,
+    select_fields,
+)
 from .models import (
     AuditLog,
     BalanceChange,
     BalanceChangeCreate,
     Bet,
     BetCreate,
+    BetOutcome,
+    BetPatch,
     Bookie,
     BookieCreate,
     Competition,
     CompetitionCreate,
     Customer,
     CustomerCreate,
+    CustomerPatch,
     CustomerStats,
+    EnrichedBet,
     Event,
     EventCreate,
+    EventPatch,
+    PlacementStatus,
     Result,
     ResultCreate,
+    ResultPatch,
     Sport,
     Team,
     TeamCreate,
+    TeamPatch,
 )
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from .serialization import SERIALIZATION_MODE, body_response, json_array_sql, record_response, rows_response
 
 
 router = APIRouter()
 
+_SPORTS = TypeAdapter(list[Sport])
+_TEAMS = TypeAdapter(list[Team])
+_COMPETITIONS = TypeAdapter(list[Competition])
+_BOOKIES = TypeAdapter(list[Bookie])
+
+_ROWS = TypeAdapter(list[dict[str, Any]])
+
+# Response body built by Postgres for SERIALIZATION_MODE=postgres
+_BET_JSON = BET.json_object(BET.columns)
+
 
 def _row_to_money(row: Any, field: str) -> dict[str, Any]:
     amount, currency = row[field]
@@ -44,43 +86,172 @@ def _convert_money_fields(row: dict[str, Any], fields: Iterable[str]) -> dict[st
     return row
 
 
+def _where(conditions: list[str]) -> str:
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def _partial(rows: Any, entity: Entity, selected: list[str], headers: dict[str, str] | None = None) -> Response:
+    # Rows for a fields= request, encoded directly: they lack model fields
+    return rows_response(rows, entity.money(selected), headers=headers)
+
+
+async def _get_record(
+    request: Request,
+    response: Response,
+    entity: Entity,
+    key: Any,
+    fields: str | None,
+    model: type[BaseModel],
+    name: str,
+) -> Any:
+    # One row by primary key, with ETag/Last-Modified from its updated_at. A
+    # conditional request checks the version alone first, so revalidating an
+    # unchanged record is one index lookup and no row body
+    selected = entity.select(fields)
+    where = f"FROM {entity.table} WHERE {entity.key[0]} = $1"
+    async with db.acquire() as conn:
+        if is_conditional(request):
+            updated_at = await conn.fetchval(f"SELECT updated_at {where}", key)
+            if updated_at is None:
+                raise HTTPException(404, f"{name} not found")
+            if not_modified(request, updated_at):
+                return Response(status_code=304, headers=validators(updated_at))
+        columns = selected if "updated_at" in selected else [*selected, "updated_at"]
+        row = await conn.fetchrow(f"SELECT {', '.join(columns)} {where}", key)
+    if row is None:
+        raise HTTPException(404, f"{name} not found")
+    headers = validators(row["updated_at"])
+    if SERIALIZATION_MODE in ("fast", "postgres") or fields is not None:
+        item = {c: row[c] for c in selected}
+        return record_response(item, entity.money(selected), headers=headers)
+    response.headers.update(headers)
+    return model(**_convert_money_fields(dict(row), entity.money_fields))
+
+
+async def _current_row(conn: Any, entity: Entity, key: Any) -> Any:
+    # An UPDATE that changes nothing is skipped by the table's
+    # skip_noop_update trigger and returns no row: read the row as it is
+    return await conn.fetchrow(
+        f"SELECT {', '.join(entity.columns)} FROM {entity.table} WHERE {entity.key[0]} = $1", key
+    )
+
+
+async def _patch_record(
+    request: Request,
+    response: Response,
+    entity: Entity,
+    key: Any,
+    changes: dict[str, Any],
+    model: type[BaseModel],
+    name: str,
+) -> Any:
+    # Writes only the columns sent. With If-Match the version check is part
+    # of the UPDATE, so a concurrent write in between cannot be overwritten
+    if_match = request.headers.get("if-match")
+    versions = if_match_versions(if_match) if if_match is not None else None
+    args: list[Any] = [key]
+    assignments: list[str] = []
+    for column, value in changes.items():
+        if column in entity.money_fields:
+            args.extend((value["amount"], value["currency"]))
+            assignments.append(f"{column} = ROW(${len(args) - 1}::decimal, ${len(args)})::money_amount")
+        else:
+            args.append(value)
+            assignments.append(f"{column} = ${len(args)}")
+    conditions = [f"{entity.key[0]} = $1"]
+    if versions is not None:
+        args.append(versions)
+        conditions.append(f"updated_at = ANY(${len(args)}::timestamptz[])")
+    async with db.acquire() as conn:
+        row = None
+        if assignments:
+            row = await conn.fetchrow(
+                f"""
+                UPDATE {entity.table} SET {", ".join(assignments)}
+                WHERE {" AND ".join(conditions)}
+                RETURNING {", ".join(entity.columns)}
+                """,
+                *args,
+            )
+        if row is None:
+            # Missing, a stale If-Match, or nothing to change
+            row = await _current_row(conn, entity, key)
+            if row is None:
+                raise HTTPException(404, f"{name} not found")
+            if versions is not None and row["updated_at"] not in versions:
+                raise HTTPException(412, f"{name} was modified since it was read")
+    response.headers.update(validators(row["updated_at"]))
+    return model(**_convert_money_fields(dict(row), entity.money_fields))
+
+
+def _page_headers(response: Response) -> dict[str, str]:
+    # Headers set on the injected response are not copied onto a Response
+    # returned directly, so carry the pagination cursor over by hand
+    cursor = response.headers.get(NEXT_CURSOR_HEADER)
+    return {NEXT_CURSOR_HEADER: cursor} if cursor else {}
+
+
 # Sports
 @router.get("/sports", response_model=list[Sport])
-async def list_sports() -> list[Sport]:
-    async for conn in db.acquire():
-        rows = await conn.fetch("SELECT name FROM sports ORDER BY name")
-    return [Sport(name=r["name"]) for r in rows]
+async def list_sports(request: Request, fields: str | None = Query(None, description=FIELDS_DESCRIPTION)) -> Response:
+    SPORT.select(fields)
+
+    async def load() -> list[Sport]:
+        # Primary: a lagging replica would put stale data back into the cache
+        async with db.acquire(replica=False) as conn:
+            rows = await conn.fetch("SELECT name FROM sports ORDER BY name")
+        return [Sport(name=r["name"]) for r in rows]
+
+    # A sport is only its name, so every selection is the full row
+    return await reference_cache.respond(request, "sports", load, _SPORTS)
 
 
 @router.post("/sports", response_model=Sport, status_code=201)
 async def create_sport(sport: Sport) -> Sport:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         await conn.execute("INSERT INTO sports(name) VALUES($1)", sport.name)
+    await reference_cache.invalidate("sports")
     return sport
 
 
 @router.delete("/sports/{name}", status_code=200, response_class=Response)
 async def delete_sport(name: str) -> None:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         await conn.execute("DELETE FROM sports WHERE name=$1", name)
+    # Teams and competitions of the sport are deleted with it
+    await reference_cache.invalidate("sports", "teams", "competitions")
 
 
 # Teams
 @router.get("/teams", response_model=list[Team])
-async def list_teams() -> list[Team]:
-    async for conn in db.acquire():
-        rows = await conn.fetch(
-            """
-            SELECT id, name, country, sport, created_at, updated_at
-            FROM teams ORDER BY id
-            """
-        )
-    return [Team(**dict(r)) for r in rows]
+async def list_teams(request: Request, fields: str | None = Query(None, description=FIELDS_DESCRIPTION)) -> Response:
+    selected = TEAM.select(fields)
+
+    async def load() -> list[Any]:
+        async with db.acquire(replica=False) as conn:
+            rows = await conn.fetch(f"SELECT {', '.join(selected)} FROM teams ORDER BY id")
+        if fields is not None:
+            return [dict(r) for r in rows]
+        return [Team(**dict(r)) for r in rows]
+
+    if fields is None:
+        return await reference_cache.respond(request, "teams", load, _TEAMS)
+    return await reference_cache.respond(request, "teams", load, _ROWS, variant=f"fields={','.join(selected)}")
+
+
+@router.get("/teams/{team_id}", response_model=Team)
+async def get_team(
+    request: Request,
+    response: Response,
+    team_id: int,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+) -> Team | Response:
+    return await _get_record(request, response, TEAM, team_id, fields, Team, "Team")
 
 
 @router.post("/teams", response_model=Team, status_code=201)
 async def create_team(payload: TeamCreate) -> Team:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         row = await conn.fetchrow(
             """
             INSERT INTO teams(name, country, sport)
@@ -91,12 +262,13 @@ async def create_team(payload: TeamCreate) -> Team:
             payload.country,
             payload.sport,
         )
+    await reference_cache.invalidate("teams")
     return Team(**dict(row))
 
 
 @router.put("/teams/{team_id}", response_model=Team)
 async def update_team(team_id: int, payload: TeamCreate) -> Team:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         row = await conn.fetchrow(
             """
             UPDATE teams SET name=$1, country=$2, sport=$3
@@ -108,36 +280,63 @@ async def update_team(team_id: int, payload: TeamCreate) -> Team:
             payload.sport,
             team_id,
         )
+        if row is None:
+            row = await _current_row(conn, TEAM, team_id)
     if not row:
         raise HTTPException(404, "Team not found")
+    await reference_cache.invalidate("teams")
     return Team(**dict(row))
 
 
+@router.patch("/teams/{team_id}", response_model=Team)
+async def patch_team(request: Request, response: Response, team_id: int, payload: TeamPatch) -> Team:
+    team = await _patch_record(request, response, TEAM, team_id, payload.changes(), Team, "Team")
+    await reference_cache.invalidate("teams")
+    return team
+
+
 @router.delete("/teams/{team_id}", status_code=200, response_class=Response)
 async def delete_team(team_id: int) -> None:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         await conn.execute("DELETE FROM teams WHERE id=$1", team_id)
+    await reference_cache.invalidate("teams")
 
 
 # Competitions
 @router.get("/competitions", response_model=list[Competition])
-async def list_competitions(active: bool | None = Query(None)) -> list[Competition]:
-    async for conn in db.acquire():
-        if active is None:
-            rows = await conn.fetch(
-                "SELECT id, name, country, sport, active FROM competitions ORDER BY id"
-            )
-        else:
-            rows = await conn.fetch(
-                "SELECT id, name, country, sport, active FROM competitions WHERE active=$1 ORDER BY id",
-                active,
-            )
-    return [Competition(**dict(r)) for r in rows]
+async def list_competitions(
+    request: Request,
+    active: bool | None = Query(None),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+) -> Response:
+    selected = COMPETITION.select(fields)
+
+    async def load() -> list[Any]:
+        columns = ", ".join(selected)
+        async with db.acquire(replica=False) as conn:
+            if active is None:
+                rows = await conn.fetch(f"SELECT {columns} FROM competitions ORDER BY id")
+            else:
+                rows = await conn.fetch(
+                    f"SELECT {columns} FROM competitions WHERE active=$1 ORDER BY id",
+                    active,
+                )
+        if fields is not None:
+            return [dict(r) for r in rows]
+        return [Competition(**dict(r)) for r in rows]
+
+    if fields is None:
+        return await reference_cache.respond(
+            request, "competitions", load, _COMPETITIONS, variant=f"active={active}"
+        )
+    return await reference_cache.respond(
+        request, "competitions", load, _ROWS, variant=f"active={active};fields={','.join(selected)}"
+    )
 
 
 @router.post("/competitions", response_model=Competition, status_code=201)
 async def create_competition(payload: CompetitionCreate) -> Competition:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         row = await conn.fetchrow(
             """
             INSERT INTO competitions(name, country, sport, active)
@@ -149,12 +348,13 @@ async def create_competition(payload: CompetitionCreate) -> Competition:
             payload.sport,
             payload.active,
         )
+    await reference_cache.invalidate("competitions")
     return Competition(**dict(row))
 
 
 @router.put("/competitions/{competition_id}", response_model=Competition)
 async def update_competition(competition_id: int, payload: CompetitionCreate) -> Competition:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         row = await conn.fetchrow(
             """
             UPDATE competitions SET name=$1, country=$2, sport=$3, active=$4
@@ -169,31 +369,47 @@ async def update_competition(competition_id: int, payload: CompetitionCreate) ->
         )
     if not row:
         raise HTTPException(404, "Competition not found")
+    await reference_cache.invalidate("competitions")
     return Competition(**dict(row))
 
 
 @router.delete("/competitions/{competition_id}", status_code=200, response_class=Response)
 async def delete_competition(competition_id: int) -> None:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         await conn.execute("DELETE FROM competitions WHERE id=$1", competition_id)
+    await reference_cache.invalidate("competitions")
 
 
 # Events
 @router.get("/events", response_model=list[Event])
-async def list_events() -> list[Event]:
-    async for conn in db.acquire():
-        rows = await conn.fetch(
-            """
-            SELECT id, date, competition_id, team_a_id, team_b_id, status, created_at, updated_at
-            FROM events ORDER BY date DESC
-            """
-        )
+async def list_events(fields: str | None = Query(None, description=FIELDS_DESCRIPTION)) -> list[Event] | Response:
+    selected = EVENT.select(fields)
+    if SERIALIZATION_MODE == "postgres":
+        async with db.acquire() as conn:
+            body = await conn.fetchval(
+                f"SELECT {json_array_sql(EVENT.json_object(selected), 'date DESC')} FROM events"
+            )
+        return body_response(body)
+    async with db.acquire() as conn:
+        rows = await conn.fetch(f"SELECT {', '.join(selected)} FROM events ORDER BY date DESC")
+    if SERIALIZATION_MODE == "fast" or fields is not None:
+        return _partial(rows, EVENT, selected)
     return [Event(**dict(r)) for r in rows]
 
 
+@router.get("/events/{event_id}", response_model=Event)
+async def get_event(
+    request: Request,
+    response: Response,
+    event_id: int,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+) -> Event | Response:
+    return await _get_record(request, response, EVENT, event_id, fields, Event, "Event")
+
+
 @router.post("/events", response_model=Event, status_code=201)
 async def create_event(payload: EventCreate) -> Event:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         row = await conn.fetchrow(
             """
             INSERT INTO events(date, competition_id, team_a_id, team_b_id, status)
@@ -211,7 +427,7 @@ async def create_event(payload: EventCreate) -> Event:
 
 @router.put("/events/{event_id}", response_model=Event)
 async def update_event(event_id: int, payload: EventCreate) -> Event:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         row = await conn.fetchrow(
             """
             UPDATE events SET date=$1, competition_id=$2, team_a_id=$3, team_b_id=$4, status=$5
@@ -225,30 +441,48 @@ async def update_event(event_id: int, payload: EventCreate) -> Event:
             payload.status,
             event_id,
         )
+        if row is None:
+            row = await _current_row(conn, EVENT, event_id)
     if not row:
         raise HTTPException(404, "Event not found")
     return Event(**dict(row))
 
 
+@router.patch("/events/{event_id}", response_model=Event)
+async def patch_event(request: Request, response: Response, event_id: int, payload: EventPatch) -> Event:
+    return await _patch_record(request, response, EVENT, event_id, payload.changes(), Event, "Event")
+
+
 @router.delete("/events/{event_id}", status_code=200, response_class=Response)
 async def delete_event(event_id: int) -> None:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         await conn.execute("DELETE FROM events WHERE id=$1", event_id)
 
 
 # Results
 @router.get("/results", response_model=list[Result])
-async def list_results() -> list[Result]:
-    async for conn in db.acquire():
-        rows = await conn.fetch(
-            "SELECT event_id, score_a, score_b, created_at, updated_at FROM results ORDER BY event_id"
-        )
+async def list_results(fields: str | None = Query(None, description=FIELDS_DESCRIPTION)) -> list[Result] | Response:
+    selected = RESULT.select(fields)
+    async with db.acquire() as conn:
+        rows = await conn.fetch(f"SELECT {', '.join(selected)} FROM results ORDER BY event_id")
+    if SERIALIZATION_MODE in ("fast", "postgres") or fields is not None:
+        return _partial(rows, RESULT, selected)
     return [Result(**dict(r)) for r in rows]
 
 
+@router.get("/results/{event_id}", response_model=Result)
+async def get_result(
+    request: Request,
+    response: Response,
+    event_id: int,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+) -> Result | Response:
+    return await _get_record(request, response, RESULT, event_id, fields, Result, "Result")
+
+
 @router.post("/results", response_model=Result, status_code=201)
 async def create_result(payload: ResultCreate) -> Result:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         row = await conn.fetchrow(
             """
             INSERT INTO results(event_id, score_a, score_b)
@@ -264,7 +498,7 @@ async def create_result(payload: ResultCreate) -> Result:
 
 @router.put("/results/{event_id}", response_model=Result)
 async def update_result(event_id: int, payload: ResultCreate) -> Result:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         row = await conn.fetchrow(
             """
             UPDATE results SET score_a=$1, score_b=$2
@@ -275,27 +509,40 @@ async def update_result(event_id: int, payload: ResultCreate) -> Result:
             payload.score_b,
             event_id,
         )
+        if row is None:
+            row = await _current_row(conn, RESULT, event_id)
     if not row:
         raise HTTPException(404, "Result not found")
     return Result(**dict(row))
 
 
+@router.patch("/results/{event_id}", response_model=Result)
+async def patch_result(request: Request, response: Response, event_id: int, payload: ResultPatch) -> Result:
+    return await _patch_record(request, response, RESULT, event_id, payload.changes(), Result, "Result")
+
+
 @router.delete("/results/{event_id}", status_code=200, response_class=Response)
 async def delete_result(event_id: int) -> None:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         await conn.execute("DELETE FROM results WHERE event_id=$1", event_id)
 
 
 # Customers
 @router.get("/customers", response_model=list[Customer])
-async def list_customers() -> list[Customer]:
-    async for conn in db.acquire():
-        rows = await conn.fetch(
-            """
-            SELECT id, username, password, real_name, currency, status, balance, preferences, created_at, updated_at
-            FROM customers ORDER BY id
-            """
-        )
+async def list_customers(
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+) -> list[Customer] | Response:
+    selected = CUSTOMER.select(fields)
+    if SERIALIZATION_MODE == "postgres":
+        async with db.acquire() as conn:
+            body = await conn.fetchval(
+                f"SELECT {json_array_sql(CUSTOMER.json_object(selected), 'id')} FROM customers"
+            )
+        return body_response(body)
+    async with db.acquire() as conn:
+        rows = await conn.fetch(f"SELECT {', '.join(selected)} FROM customers ORDER BY id")
+    if SERIALIZATION_MODE == "fast" or fields is not None:
+        return _partial(rows, CUSTOMER, selected)
     result: list[Customer] = []
     for r in rows:
         data = dict(r)
@@ -304,9 +551,19 @@ async def list_customers() -> list[Customer]:
     return result
 
 
+@router.get("/customers/{customer_id}", response_model=Customer)
+async def get_customer(
+    request: Request,
+    response: Response,
+    customer_id: int,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+) -> Customer | Response:
+    return await _get_record(request, response, CUSTOMER, customer_id, fields, Customer, "Customer")
+
+
 @router.post("/customers", response_model=Customer, status_code=201)
 async def create_customer(payload: CustomerCreate) -> Customer:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         row = await conn.fetchrow(
             """
             INSERT INTO customers(username, password, real_name, currency, status, balance, preferences)
@@ -328,13 +585,14 @@ async def create_customer(payload: CustomerCreate) -> Customer:
 
 @router.put("/customers/{customer_id}", response_model=Customer)
 async def update_customer(customer_id: int, payload: CustomerCreate) -> Customer:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         row = await conn.fetchrow(
             """
             UPDATE customers SET
               username=$1, password=$2, real_name=$3,
               currency=$4, status=$5, balance=ROW($6::decimal, $4)::money_amount, preferences=$7
             WHERE id=$8
+              AND ((balance).amount = $6 OR NOT EXISTS (SELECT 1 FROM balance_lanes WHERE customer_id=$8))
             RETURNING id, username, password, real_name, currency, status, balance, preferences, created_at, updated_at
             """,
             payload.username,
@@ -346,6 +604,14 @@ async def update_customer(customer_id: int, payload: CustomerCreate) -> Customer
             payload.preferences or {},
             customer_id,
         )
+        if row is None:
+            row = await _current_row(conn, CUSTOMER, customer_id)
+            # Not updated although it exists: unchanged, or a new balance for
+            # a ledger mode customer, whose next snapshot would overwrite it
+            if row is not None and row["balance"][0] != payload.balance.amount:
+                raise HTTPException(
+                    409, "Customer is in ledger balance mode; change its balance through balance_changes"
+                )
     if not row:
         raise HTTPException(404, "Customer not found")
     data = dict(row)
@@ -353,37 +619,52 @@ async def update_customer(customer_id: int, payload: CustomerCreate) -> Customer
     return Customer(**data)
 
 
+@router.patch("/customers/{customer_id}", response_model=Customer)
+async def patch_customer(
+    request: Request, response: Response, customer_id: int, payload: CustomerPatch
+) -> Customer:
+    return await _patch_record(request, response, CUSTOMER, customer_id, payload.changes(), Customer, "Customer")
+
+
 @router.delete("/customers/{customer_id}", status_code=200, response_class=Response)
 async def delete_customer(customer_id: int) -> None:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         await conn.execute("DELETE FROM customers WHERE id=$1", customer_id)
 
 
 # Bookies
 @router.get("/bookies", response_model=list[Bookie])
-async def list_bookies() -> list[Bookie]:
-    async for conn in db.acquire():
-        rows = await conn.fetch(
-            "SELECT name, description, preferences FROM bookies ORDER BY name"
-        )
-    return [Bookie(**dict(r)) for r in rows]
+async def list_bookies(request: Request, fields: str | None = Query(None, description=FIELDS_DESCRIPTION)) -> Response:
+    selected = BOOKIE.select(fields)
+
+    async def load() -> list[Any]:
+        async with db.acquire(replica=False) as conn:
+            rows = await conn.fetch(f"SELECT {', '.join(selected)} FROM bookies ORDER BY name")
+        if fields is not None:
+            return [dict(r) for r in rows]
+        return [Bookie(**dict(r)) for r in rows]
+
+    if fields is None:
+        return await reference_cache.respond(request, "bookies", load, _BOOKIES)
+    return await reference_cache.respond(request, "bookies", load, _ROWS, variant=f"fields={','.join(selected)}")
 
 
 @router.post("/bookies", response_model=Bookie, status_code=201)
 async def create_bookie(payload: BookieCreate) -> Bookie:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         await conn.execute(
             "INSERT INTO bookies(name, description, preferences) VALUES($1, $2, $3)",
             payload.name,
             payload.description,
             payload.preferences or {},
         )
+    await reference_cache.invalidate("bookies")
     return Bookie(**payload.model_dump())
 
 
 @router.put("/bookies/{name}", response_model=Bookie)
 async def update_bookie(name: str, payload: BookieCreate) -> Bookie:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         cmd = await conn.execute(
             "UPDATE bookies SET name=$1, description=$2, preferences=$3 WHERE name=$4",
             payload.name,
@@ -393,26 +674,247 @@ async def update_bookie(name: str, payload: BookieCreate) -> Bookie:
         )
     if cmd.endswith("UPDATE 0"):
         raise HTTPException(404, "Bookie not found")
+    await reference_cache.invalidate("bookies")
     return Bookie(**payload.model_dump())
 
 
 @router.delete("/bookies/{name}", status_code=200, response_class=Response)
 async def delete_bookie(name: str) -> None:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         await conn.execute("DELETE FROM bookies WHERE name=$1", name)
+    await reference_cache.invalidate("bookies")
 
 
 # Bets
 @router.get("/bets", response_model=list[Bet])
-async def list_bets() -> list[Bet]:
-    async for conn in db.acquire():
+async def list_bets(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+    bookie: str | None = Query(None),
+    customer_id: int | None = Query(None),
+    event_id: int | None = Query(None),
+    sport: str | None = Query(None),
+    placement_status: PlacementStatus | None = Query(None),
+    outcome: BetOutcome | None = Query(None),
+    created_from: datetime | None = Query(None),
+    created_to: datetime | None = Query(None),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+) -> list[Bet] | Response:
+    conditions, args = _bet_filters(
+        bookie, customer_id, event_id, sport, placement_status, outcome, created_from, created_to
+    )
+    return await _bets_page(response, conditions, args, limit, cursor, fields)
+
+
+def _bet_filters(
+    bookie: str | None,
+    customer_id: int | None,
+    event_id: int | None,
+    sport: str | None,
+    placement_status: PlacementStatus | None,
+    outcome: BetOutcome | None,
+    created_from: datetime | None,
+    created_to: datetime | None,
+) -> tuple[list[str], list[Any]]:
+    conditions: list[str] = []
+    args: list[Any] = []
+    for column, value in (
+        ("bookie", bookie),
+        ("customer_id", customer_id),
+        ("event_id", event_id),
+        ("sport", sport),
+        ("placement_status", placement_status),
+        ("outcome", outcome),
+    ):
+        if value is not None:
+            args.append(value)
+            conditions.append(f"{column} = ${len(args)}")
+    if created_from is not None:
+        args.append(created_from)
+        conditions.append(f"created_at >= ${len(args)}")
+    if created_to is not None:
+        args.append(created_to)
+        conditions.append(f"created_at < ${len(args)}")
+    return conditions, args
+
+
+# Postgres errors for a malformed jsonpath
+_INVALID_JSONPATH_SQLSTATES = ("42601", "22P02")
+
+
+def _like_prefix(prefix: str) -> str:
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+@router.get("/bets/search", response_model=list[Bet])
+async def search_bets(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+    bet_type: list[str] | None = Query(None),
+    placement: str | None = Query(None, description='JSON object the placement_data must contain, e.g. {"market": "1X2"}'),
+    placement_path: str | None = Query(None, description='jsonpath predicate on placement_data, e.g. $.selection == "over"'),
+    bookie_bet_id_prefix: str | None = Query(None, min_length=1),
+    bookie: str | None = Query(None),
+    customer_id: int | None = Query(None),
+    event_id: int | None = Query(None),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+) -> list[Bet] | Response:
+    # Each filter maps onto an index: placement/placement_path onto the GIN
+    # jsonb_path_ops index, bet_type and bookie_bet_id_prefix onto btrees
+    conditions: list[str] = []
+    args: list[Any] = []
+    for column, value in (("bookie", bookie), ("customer_id", customer_id), ("event_id", event_id)):
+        if value is not None:
+            args.append(value)
+            conditions.append(f"{column} = ${len(args)}")
+    if bet_type:
+        args.append(bet_type)
+        conditions.append(f"bet_type = ANY(${len(args)}::text[])")
+    if placement is not None:
+        try:
+            contained = json.loads(placement)
+        except ValueError as exc:
+            raise HTTPException(400, f"placement is not valid JSON: {exc}") from exc
+        if not isinstance(contained, dict):
+            raise HTTPException(400, "placement must be a JSON object")
+        args.append(contained)
+        conditions.append(f"placement_data @> ${len(args)}::jsonb")
+    if placement_path is not None:
+        args.append(placement_path)
+        conditions.append(f"placement_data @@ ${len(args)}::jsonpath")
+    if bookie_bet_id_prefix is not None:
+        args.append(_like_prefix(bookie_bet_id_prefix))
+        conditions.append(f"bookie_bet_id LIKE ${len(args)}")
+    try:
+        return await _bets_page(response, conditions, args, limit, cursor, fields, custom_plans=True)
+    except Exception as exc:
+        # The path is parsed when the query binds it, so a malformed one
+        # fails the page query itself rather than costing a round trip first
+        if placement_path is None or getattr(exc, "sqlstate", None) not in _INVALID_JSONPATH_SQLSTATES:
+            raise
+        raise HTTPException(400, f"Invalid placement_path: {exc}") from exc
+
+
+# Output field -> expression over the page of bets (b) and the rows it joins
+_ENRICHED_BET_FIELDS = {
+    **{c: f"b.{c}" for c in BET.columns},
+    "customer_username": "cu.username",
+    "event_date": "e.date",
+    "event_status": "e.status",
+    "competition_id": "e.competition_id",
+    "competition_name": "co.name",
+    "team_a_name": "ta.name",
+    "team_b_name": "tb.name",
+}
+
+
+@router.get("/bets/enriched", response_model=list[EnrichedBet])
+async def list_enriched_bets(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+    bookie: str | None = Query(None),
+    customer_id: int | None = Query(None),
+    event_id: int | None = Query(None),
+    sport: str | None = Query(None),
+    placement_status: PlacementStatus | None = Query(None),
+    outcome: BetOutcome | None = Query(None),
+    created_from: datetime | None = Query(None),
+    created_to: datetime | None = Query(None),
+) -> list[EnrichedBet] | Response:
+    # Bets with the customer, event, competition and team names resolved.
+    # The page of bets is cut first on the same indexes as GET /bets, then
+    # joined by primary key, so the joins cost `limit` lookups per table
+    selected = select_fields(fields, _ENRICHED_BET_FIELDS, BET.key)
+    conditions, args = _bet_filters(
+        bookie, customer_id, event_id, sport, placement_status, outcome, created_from, created_to
+    )
+    if cursor is not None:
+        args.extend(decode_cursor(cursor))
+        conditions.append(f"(created_at, id) < (${len(args) - 1}, ${len(args)})")
+    args.append(limit + 1)
+    # Only the bet columns asked for leave the heap, so skipping
+    # placement_data also skips detoasting it
+    bet_columns = {"id", "created_at", "customer_id", "event_id"}
+    bet_columns.update(f for f in selected if _ENRICHED_BET_FIELDS[f].startswith("b."))
+    async with db.acquire() as conn:
         rows = await conn.fetch(
-            """
-            SELECT id, bookie, customer_id, bookie_bet_id, bet_type, event_id, sport,
-                   placement_status, outcome, stake, odds, placement_data, created_at, updated_at
-            FROM bets ORDER BY created_at DESC
-            """
+            f"""
+            SELECT {", ".join(f"{_ENRICHED_BET_FIELDS[f]} AS {f}" for f in selected)}
+            FROM (
+                SELECT {", ".join(sorted(bet_columns))}
+                FROM bets {_where(conditions)}
+                ORDER BY created_at DESC, id DESC
+                LIMIT ${len(args)}
+            ) b
+            JOIN customers cu ON cu.id = b.customer_id
+            JOIN events e ON e.id = b.event_id
+            JOIN competitions co ON co.id = e.competition_id
+            JOIN teams ta ON ta.id = e.team_a_id
+            JOIN teams tb ON tb.id = e.team_b_id
+            ORDER BY b.created_at DESC, b.id DESC
+            """,
+            *args,
+        )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    money_fields = ("stake",) if "stake" in selected else ()
+    if SERIALIZATION_MODE != "models" or fields is not None:
+        # A partial row is not an EnrichedBet, so field selection always
+        # encodes the rows directly, as in fast mode
+        return rows_response(rows, money_fields, headers=_page_headers(response))
+    return [EnrichedBet(**_convert_money_fields(dict(r), money_fields)) for r in rows]
+
+
+@asynccontextmanager
+async def _custom_plans(conn: Any, enabled: bool) -> AsyncIterator[None]:
+    # Search filters range from one bet to most of the table. A cached generic
+    # plan would guess one selectivity for all of them and tends to walk
+    # (created_at, id) instead of the GIN index, so plan each query afresh
+    if not enabled:
+        yield
+        return
+    async with conn.transaction():
+        await conn.execute("SET LOCAL plan_cache_mode = force_custom_plan")
+        yield
+
+
+async def _bets_page(
+    response: Response,
+    conditions: list[str],
+    args: list[Any],
+    limit: int,
+    cursor: str | None,
+    fields: str | None = None,
+    custom_plans: bool = False,
+) -> list[Bet] | Response:
+    selected = BET.select(fields)
+    if cursor is not None:
+        args.extend(decode_cursor(cursor))
+        conditions.append(f"(created_at, id) < (${len(args) - 1}, ${len(args)})")
+    args.append(limit + 1)
+
+    if SERIALIZATION_MODE == "postgres":
+        return await _list_bets_json(conditions, args, limit, selected, custom_plans)
+    async with db.acquire() as conn, _custom_plans(conn, custom_plans):
+        rows = await conn.fetch(
+            f"""
+            SELECT {", ".join(selected)}
+            FROM bets {_where(conditions)}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ${len(args)}
+            """,
+            *args,
         )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    if SERIALIZATION_MODE == "fast" or fields is not None:
+        return _partial(rows, BET, selected, headers=_page_headers(response))
     result: list[Bet] = []
     for r in rows:
         data = dict(r)
@@ -421,9 +923,51 @@ async def list_bets() -> list[Bet]:
     return result
 
 
+async def _list_bets_json(
+    conditions: list[str], args: list[Any], limit: int, selected: list[str], custom_plans: bool = False
+) -> Response:
+    # The last parameter is limit + 1: one extra row tells whether there is
+    # a next page, and the limit-th row is where that page starts
+    n = f"${len(args)}"
+    async with db.acquire() as conn, _custom_plans(conn, custom_plans):
+        row = await conn.fetchrow(
+            f"""
+            WITH page AS (
+                SELECT *, row_number() OVER (ORDER BY created_at DESC, id DESC) AS rn
+                FROM (
+                    SELECT {", ".join(selected)} FROM bets {_where(conditions)}
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT {n}
+                ) p
+            )
+            SELECT {json_array_sql(BET.json_object(selected), "rn", f"rn < {n}")} AS body,
+                   (array_agg(created_at) FILTER (WHERE rn = {n} - 1))[1] AS last_created_at,
+                   (array_agg(id) FILTER (WHERE rn = {n} - 1))[1] AS last_id,
+                   COUNT(*) = {n} AS has_more
+            FROM page
+            """,
+            *args,
+        )
+    headers = {}
+    if row["has_more"]:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(row["last_created_at"], row["last_id"])
+    return body_response(row["body"], headers=headers)
+
+
+# Declared after /bets/search and /bets/enriched, which it would shadow
+@router.get("/bets/{bet_id}", response_model=Bet)
+async def get_bet(
+    request: Request,
+    response: Response,
+    bet_id: int,
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+) -> Bet | Response:
+    return await _get_record(request, response, BET, bet_id, fields, Bet, "Bet")
+
+
 @router.post("/bets", response_model=Bet, status_code=201)
 async def create_bet(payload: BetCreate) -> Bet:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         row = await conn.fetchrow(
             """
             INSERT INTO bets(
@@ -455,7 +999,7 @@ async def create_bet(payload: BetCreate) -> Bet:
 
 @router.put("/bets/{bet_id}", response_model=Bet)
 async def update_bet(bet_id: int, payload: BetCreate) -> Bet:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         row = await conn.fetchrow(
             """
             UPDATE bets SET
@@ -479,6 +1023,8 @@ async def update_bet(bet_id: int, payload: BetCreate) -> Bet:
             payload.placement_data,
             bet_id,
         )
+        if row is None:
+            row = await _current_row(conn, BET, bet_id)
     if not row:
         raise HTTPException(404, "Bet not found")
     data = dict(row)
@@ -486,19 +1032,33 @@ async def update_bet(bet_id: int, payload: BetCreate) -> Bet:
     return Bet(**data)
 
 
+@router.patch("/bets/{bet_id}", response_model=Bet)
+async def patch_bet(request: Request, response: Response, bet_id: int, payload: BetPatch) -> Bet:
+    return await _patch_record(request, response, BET, bet_id, payload.changes(), Bet, "Bet")
+
+
 @router.delete("/bets/{bet_id}", status_code=200, response_class=Response)
 async def delete_bet(bet_id: int) -> None:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         await conn.execute("DELETE FROM bets WHERE id=$1", bet_id)
 
 
 # Balance changes
 @router.get("/balance_changes", response_model=list[BalanceChange])
-async def list_balance_changes() -> list[BalanceChange]:
-    async for conn in db.acquire():
-        rows = await conn.fetch(
-            "SELECT id, customer_id, change_type, delta, reference_id, description, created_at FROM balance_changes ORDER BY created_at DESC"
-        )
+async def list_balance_changes(
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+) -> list[BalanceChange] | Response:
+    selected = BALANCE_CHANGE.select(fields)
+    if SERIALIZATION_MODE == "postgres":
+        async with db.acquire() as conn:
+            body = await conn.fetchval(
+                f"SELECT {json_array_sql(BALANCE_CHANGE.json_object(selected), 'created_at DESC')} FROM balance_changes"
+            )
+        return body_response(body)
+    async with db.acquire() as conn:
+        rows = await conn.fetch(f"SELECT {', '.join(selected)} FROM balance_changes ORDER BY created_at DESC")
+    if SERIALIZATION_MODE == "fast" or fields is not None:
+        return _partial(rows, BALANCE_CHANGE, selected)
     result: list[BalanceChange] = []
     for r in rows:
         data = dict(r)
@@ -509,7 +1069,7 @@ async def list_balance_changes() -> list[BalanceChange]:
 
 @router.post("/balance_changes", response_model=BalanceChange, status_code=201)
 async def create_balance_change(payload: BalanceChangeCreate) -> BalanceChange:
-    async for conn in db.acquire():
+    async with db.acquire() as conn:
         row = await conn.fetchrow(
             """
             INSERT INTO balance_changes(customer_id, change_type, delta, reference_id, description)
@@ -529,37 +1089,75 @@ async def create_balance_change(payload: BalanceChangeCreate) -> BalanceChange:
 
 
 # Audit and stats
+# Field-level diff of an audit row: keys whose value differs between the two
+# snapshots (all keys for INSERT/DELETE, where one side is NULL)
+_AUDIT_CHANGES = """
+(
+    SELECT jsonb_object_agg(k, jsonb_build_object('old', old_data->k, 'new', new_data->k))
+    FROM jsonb_object_keys(COALESCE(old_data, '{}') || COALESCE(new_data, '{}')) AS k
+    WHERE old_data->k IS DISTINCT FROM new_data->k
+)
+"""
+
+
 @router.get("/audit", response_model=list[AuditLog])
-async def list_audit(table: str | None = Query(None)) -> list[AuditLog]:
-    async for conn in db.acquire():
-        if table:
-            rows = await conn.fetch(
-                """
-                SELECT id, table_name, operation, username, changed_at, row_id, old_data, new_data
-                FROM audit_log WHERE table_name=$1 ORDER BY changed_at DESC
-                """,
-                table,
-            )
-        else:
-            rows = await conn.fetch(
-                """
-                SELECT id, table_name, operation, username, changed_at, row_id, old_data, new_data
-                FROM audit_log ORDER BY changed_at DESC
-                """
-            )
+async def list_audit(
+    response: Response,
+    table: str | None = Query(None),
+    row_id: int | None = Query(None),
+    diff: bool = Query(False, description="Return only changed fields instead of full snapshots"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+) -> list[AuditLog] | Response:
+    selected = AUDIT.select(fields)
+    if row_id is not None and table is None:
+        raise HTTPException(400, "row_id requires table")
+    conditions: list[str] = []
+    args: list[Any] = []
+    if table is not None:
+        args.append(table)
+        conditions.append(f"table_name = ${len(args)}")
+    if row_id is not None:
+        args.append(row_id)
+        conditions.append(f"row_id = ${len(args)}")
+    if cursor is not None:
+        args.extend(decode_cursor(cursor))
+        conditions.append(f"(changed_at, id) < (${len(args) - 1}, ${len(args)})")
+    args.append(limit + 1)
+
+    if diff:
+        data_columns = {"old_data": "NULL::jsonb", "new_data": "NULL::jsonb", "changes": _AUDIT_CHANGES}
+    else:
+        data_columns = {"changes": "NULL::jsonb"}
+    columns = ", ".join(f"{data_columns[c]} AS {c}" if c in data_columns else c for c in selected)
+    async with db.acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            SELECT {columns}
+            FROM audit_log {_where(conditions)}
+            ORDER BY changed_at DESC, id DESC
+            LIMIT ${len(args)}
+            """,
+            *args,
+        )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1]["changed_at"], rows[-1]["id"])
+    if SERIALIZATION_MODE in ("fast", "postgres") or fields is not None:
+        return _partial(rows, AUDIT, selected, headers=_page_headers(response))
     return [AuditLog(**dict(r)) for r in rows]
 
 
 @router.get("/customer_stats", response_model=list[CustomerStats])
-async def list_customer_stats() -> list[CustomerStats]:
-    async for conn in db.acquire():
-        rows = await conn.fetch(
-            """
-            SELECT customer_id, username, currency, total_bets, won_bets, lost_bets, void_bets,
-                   total_staked, total_won, net_profit, current_balance
-            FROM customer_stats ORDER BY customer_id
-            """
-        )
+async def list_customer_stats(
+    fields: str | None = Query(None, description=FIELDS_DESCRIPTION),
+) -> list[CustomerStats] | Response:
+    selected = CUSTOMER_STATS.select(fields)
+    async with db.acquire() as conn:
+        rows = await conn.fetch(f"SELECT {', '.join(selected)} FROM customer_stats ORDER BY customer_id")
+    if fields is not None:
+        return _partial(rows, CUSTOMER_STATS, selected)
     return [CustomerStats(**dict(r)) for r in rows]
 
 
@@ -1,17 +1,59 @@
 from __future__ import annotations
 
+import hashlib
+import hmac
 import os
+import time
 from fastapi import Depends, HTTPException
-from fastapi.security import APIKeyHeader
+from fastapi.security import APIKeyHeader, APIKeyQuery
 
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+stream_token_query = APIKeyQuery(name="token", auto_error=False)
+
+# Lifetime of a stream token; it only has to last until the stream is opened
+STREAM_TOKEN_SECONDS = int(os.getenv("STREAM_TOKEN_SECONDS", "60"))
+
+
+def _expected_key() -> str:
+    return os.getenv("API_KEY", "dev-key")
+
+
+def api_key_valid(api_key: str | None) -> bool:
+    return api_key is not None and hmac.compare_digest(api_key.encode(), _expected_key().encode())
 
 
 async def require_api_key(api_key: str | None = Depends(api_key_header)) -> None:
     # Simple demo guard; in production integrate proper auth
-    expected = os.getenv("API_KEY", "dev-key")
-    if api_key is None or api_key != expected:
+    if not api_key_valid(api_key):
         raise HTTPException(status_code=401, detail="Invalid or missing API key")
 
 
+def _sign(expires: int) -> str:
+    return hmac.new(_expected_key().encode(), f"stream:{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def issue_stream_token(now: float | None = None) -> str:
+    expires = int(now if now is not None else time.time()) + STREAM_TOKEN_SECONDS
+    return f"{expires}.{_sign(expires)}"
+
+
+def stream_token_valid(token: str, now: float | None = None) -> bool:
+    expires, _, signature = token.partition(".")
+    if not expires.isdigit() or not hmac.compare_digest(signature, _sign(int(expires))):
+        return False
+    return int(expires) >= (now if now is not None else time.time())
+
+
+async def require_api_key_or_stream_token(
+    api_key: str | None = Depends(api_key_header),
+    token: str | None = Depends(stream_token_query),
+) -> None:
+    # Browsers' EventSource cannot send headers. Rather than the API key,
+    # which would end up in access logs, streams take ?token= from
+    # POST /api/changes/token, which expires after STREAM_TOKEN_SECONDS
+    if token is not None and api_key is None:
+        if not stream_token_valid(token):
+            raise HTTPException(status_code=401, detail="Invalid or expired stream token")
+        return
+    await require_api_key(api_key)
@@ -0,0 +1,114 @@
+"""Response serialization modes for the large list endpoints.
+
+``SERIALIZATION_MODE=models`` (default) builds a pydantic model per row and
+lets FastAPI validate and serialise the list. ``SERIALIZATION_MODE=fast``
+encodes the asyncpg records straight to JSON bytes with orjson (falling back
+to the standard json module when it is not installed), skipping both model
+passes. ``SERIALIZATION_MODE=postgres`` has Postgres build the whole body
+with json_agg for the endpoints that support it (bets, events, customers,
+balance_changes) and passes the bytes through; the others behave as fast.
+All produce the same JSON shape, except that money amounts outside models
+mode are exact decimal strings ("50.0000") rather than float-rounded ones.
+
+Run ``python -m bench.bench_serialization`` to compare them.
+"""
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Sequence
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # optional dependency, the json fallback is slower
+    orjson = None
+
+
+SERIALIZATION_MODE = os.getenv("SERIALIZATION_MODE", "models")
+
+# ISO 8601 in UTC with a Z suffix, like the other modes (always with microseconds)
+_TIMESTAMP_FORMAT = 'YYYY-MM-DD"T"HH24:MI:SS.US"Z"'
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        # Same as pydantic's JSON output for Decimal fields, without rounding
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat().replace("+00:00", "Z")
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def _item(row: Any, money_fields: Sequence[str]) -> dict[str, Any]:
+    item = dict(row)
+    for f in money_fields:
+        money = item[f]
+        if money is not None:
+            item[f] = {"amount": str(money[0]), "currency": money[1]}
+    return item
+
+
+def _dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_UTC_Z)
+    return json.dumps(value, default=_default, separators=(",", ":")).encode()
+
+
+def encode_rows(rows: Sequence[Any], money_fields: Sequence[str] = ()) -> bytes:
+    if not rows:
+        return b"[]"
+    return _dumps([_item(r, money_fields) for r in rows])
+
+
+def rows_response(
+    rows: Sequence[Any],
+    money_fields: Sequence[str] = (),
+    headers: dict[str, str] | None = None,
+) -> Response:
+    return Response(content=encode_rows(rows, money_fields), media_type="application/json", headers=headers)
+
+
+def record_response(
+    row: Any,
+    money_fields: Sequence[str] = (),
+    headers: dict[str, str] | None = None,
+) -> Response:
+    return Response(content=_dumps(_item(row, money_fields)), media_type="application/json", headers=headers)
+
+
+def json_object_sql(
+    columns: Sequence[str],
+    money_fields: Sequence[str] = (),
+    text_fields: Sequence[str] = (),
+    timestamp_fields: Sequence[str] = (),
+) -> str:
+    # json_build_object() for one row. Money composites become
+    # {amount, currency} with the amount as an exact string, and numerics in
+    # text_fields become strings, matching pydantic's Decimal output.
+    parts: list[str] = []
+    for c in columns:
+        if c in money_fields:
+            expr = f"json_build_object('amount', ({c}).amount::text, 'currency', ({c}).currency)"
+        elif c in text_fields:
+            expr = f"{c}::text"
+        elif c in timestamp_fields:
+            expr = f"to_char({c} AT TIME ZONE 'UTC', '{_TIMESTAMP_FORMAT}')"
+        else:
+            expr = c
+        parts.append(f"'{c}', {expr}")
+    return f"json_build_object({', '.join(parts)})"
+
+
+def json_array_sql(json_object: str, order_by: str, filter_: str | None = None) -> str:
+    # The aggregate as UTF-8 bytea, so asyncpg hands back bytes without
+    # decoding the body into a Python str first
+    where = f" FILTER (WHERE {filter_})" if filter_ else ""
+    return f"convert_to(COALESCE(json_agg({json_object} ORDER BY {order_by}){where}, '[]')::text, 'UTF8')"
+
+
+def body_response(body: bytes, headers: dict[str, str] | None = None) -> Response:
+    return Response(content=body, media_type="application/json", headers=headers)
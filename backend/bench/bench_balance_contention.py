@@ -0,0 +1,172 @@
+"""Concurrent bet placement against one hot customer, direct vs ledger mode.
+
+Each worker places single bets in its own transaction, the way the API does,
+through the normal trigger path. ``--hold-ms`` keeps every transaction open a
+little longer after the balance is touched (standing in for network latency
+between statements), which is where row-lock queueing on customers hurts.
+
+Run from the backend directory against a scratch database::
+
+    python -m bench.bench_balance_contention --workers 32 --seconds 10 --hold-ms 5
+
+After each run the hot customer's balance is checked against the top-up minus
+the stakes actually placed.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from decimal import Decimal
+
+import asyncpg
+
+
+STAKE = Decimal("1.0000")
+
+
+async def _connect() -> asyncpg.Connection:
+    return await asyncpg.connect(
+        user=os.getenv("POSTGRES_USER", "analyst_user"),
+        password=os.getenv("POSTGRES_PASSWORD", "analyst_password"),
+        database=os.getenv("POSTGRES_DB", "analyst_platform"),
+        host=os.getenv("POSTGRES_HOST", "postgres"),
+        port=int(os.getenv("POSTGRES_PORT", "5432")),
+    )
+
+
+async def _setup(conn: asyncpg.Connection, top_up: Decimal, lanes: int) -> tuple[int, int, str]:
+    event = await conn.fetchrow(
+        """
+        SELECT e.id, c.sport FROM events e
+        JOIN competitions c ON c.id = e.competition_id
+        WHERE e.status <> 'finished'
+        ORDER BY e.id LIMIT 1
+        """
+    )
+    if event is None:
+        raise SystemExit("need at least one event that is not finished")
+    customer_id = await conn.fetchval(
+        """
+        INSERT INTO customers (username, password, real_name, currency, status, balance)
+        VALUES ($1, 'x', 'Bench Hot Customer', 'USD', 'active', ROW(0, 'USD')::money_amount)
+        RETURNING id
+        """,
+        f"bench_hot_{uuid.uuid4().hex[:8]}",
+    )
+    await conn.execute(
+        """
+        INSERT INTO balance_changes (customer_id, change_type, delta, description)
+        VALUES ($1, 'top_up', ROW($2, 'USD')::money_amount, 'Benchmark top-up')
+        """,
+        customer_id,
+        top_up,
+    )
+    if lanes:
+        await conn.execute("SELECT enable_balance_ledger($1, $2)", customer_id, lanes)
+    return customer_id, event["id"], event["sport"]
+
+
+async def _worker(
+    worker: int,
+    customer_id: int,
+    event_id: int,
+    sport: str,
+    hold_ms: float,
+    deadline: float,
+) -> tuple[int, int, list[float]]:
+    conn = await _connect()
+    placed = failed = 0
+    latencies: list[float] = []
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with conn.transaction():
+                    await conn.execute(
+                        """
+                        INSERT INTO bets (
+                            bookie, customer_id, bookie_bet_id, bet_type, event_id, sport,
+                            placement_status, stake, odds, placement_data
+                        ) VALUES (
+                            'QuickBet', $1, $2, 'match_winner', $3, $4,
+                            'placed', ROW($5, 'USD')::money_amount, 2.0, '{}'
+                        )
+                        """,
+                        customer_id,
+                        f"bench-{customer_id}-{worker}-{placed + failed}",
+                        event_id,
+                        sport,
+                        STAKE,
+                    )
+                    if hold_ms:
+                        await conn.execute("SELECT pg_sleep($1)", hold_ms / 1000)
+                placed += 1
+            except asyncpg.PostgresError:
+                failed += 1
+            latencies.append(time.perf_counter() - started)
+    finally:
+        await conn.close()
+    return placed, failed, latencies
+
+
+async def _run(mode: str, args: argparse.Namespace) -> None:
+    conn = await _connect()
+    try:
+        lanes = args.lanes if mode == "ledger" else 0
+        customer_id, event_id, sport = await _setup(conn, args.top_up, lanes)
+
+        deadline = time.perf_counter() + args.seconds
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(
+                _worker(w, customer_id, event_id, sport, args.hold_ms, deadline)
+                for w in range(args.workers)
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+        if lanes:
+            await conn.execute("SELECT snapshot_balance_ledger($1)", customer_id)
+        balance = await conn.fetchval("SELECT (balance).amount FROM customers WHERE id = $1", customer_id)
+        staked = await conn.fetchval(
+            """
+            SELECT COALESCE(SUM((stake).amount), 0) FROM bets
+            WHERE customer_id = $1 AND placement_status = 'placed'
+            """,
+            customer_id,
+        )
+    finally:
+        await conn.close()
+
+    placed = sum(r[0] for r in results)
+    failed = sum(r[1] for r in results)
+    latencies = sorted(t for r in results for t in r[2])
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0.0
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0
+    ok = balance == args.top_up - staked and balance >= 0
+    print(
+        f"{mode:>6}: {placed / elapsed:8.0f} bets/s  placed={placed} failed={failed}  "
+        f"p50={p50:.1f}ms p99={p99:.1f}ms  balance={balance} "
+        f"invariant={'ok' if ok else 'BROKEN'}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bench.bench_balance_contention")
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--hold-ms", type=float, default=0)
+    parser.add_argument("--lanes", type=int, default=16)
+    parser.add_argument("--top-up", type=Decimal, default=Decimal("1000000"))
+    parser.add_argument("--mode", choices=("direct", "ledger", "both"), default="both")
+    args = parser.parse_args()
+
+    for mode in ("direct", "ledger") if args.mode == "both" else (args.mode,):
+        await _run(mode, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""Per-record requests against one POST /api/batch.
+
+Drives a running backend (``--base-url``). Creates a scratch competition with
+``--events`` prematch events, then moves every event to ``live`` and back
+the way a client without the batch endpoint would (one ``PATCH`` per event,
+``--concurrency`` at a time) and with one batch each way, and prints the
+wall time and events per second of both. The scratch rows are deleted
+afterwards (events with their competition)::
+
+    python -m bench.bench_batch --events 500
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import httpx
+
+
+async def _batch(client: httpx.AsyncClient, operations: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    res = await client.post("/api/batch", json={"operations": operations})
+    res.raise_for_status()
+    return res.json()["results"]
+
+
+async def _setup(client: httpx.AsyncClient, events: int) -> tuple[int, list[int], list[int]]:
+    tag = f"bench-batch-{time.time_ns():x}"
+    created = await _batch(
+        client,
+        [
+            {"op": "create", "entity": "competitions", "data": {"name": tag, "country": "-", "sport": "Football"}},
+            *(
+                {"op": "create", "entity": "teams", "data": {"name": f"{tag}-{side}", "country": "-", "sport": "Football"}}
+                for side in ("a", "b")
+            ),
+        ],
+    )
+    competition_id, team_a, team_b = (r["id"] for r in created)
+    date = (datetime.now(timezone.utc) + timedelta(days=30)).isoformat()
+    created = await _batch(
+        client,
+        [
+            {
+                "op": "create", "entity": "events",
+                "data": {
+                    "date": date, "competition_id": competition_id, "team_a_id": team_a, "team_b_id": team_b,
+                    "status": "prematch",
+                },
+            }
+            for _ in range(events)
+        ],
+    )
+    return competition_id, [team_a, team_b], [r["id"] for r in created]
+
+
+async def _patch_each(client: httpx.AsyncClient, ids: list[int], status: str, concurrency: int) -> float:
+    queue = list(ids)
+
+    async def worker() -> None:
+        while queue:
+            res = await client.patch(f"/api/events/{queue.pop()}", json={"status": status})
+            res.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started
+
+
+async def _patch_batch(client: httpx.AsyncClient, ids: list[int], status: str) -> float:
+    started = time.perf_counter()
+    await _batch(client, [{"op": "update", "entity": "events", "id": i, "data": {"status": status}} for i in ids])
+    return time.perf_counter() - started
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bench.bench_batch")
+    parser.add_argument("--base-url", default=os.getenv("BENCH_BASE_URL", "http://localhost:8000"))
+    parser.add_argument("--api-key", default=os.getenv("API_KEY", "dev-key"))
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8, help="parallel per-record requests")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, headers={"X-API-Key": args.api_key}, limits=limits, timeout=120
+    ) as client:
+        competition_id, team_ids, ids = await _setup(client, args.events)
+        try:
+            each: list[float] = []
+            batched: list[float] = []
+            for _ in range(args.rounds):
+                each.append(await _patch_each(client, ids, "live", args.concurrency))
+                each.append(await _patch_each(client, ids, "prematch", args.concurrency))
+                batched.append(await _patch_batch(client, ids, "live"))
+                batched.append(await _patch_batch(client, ids, "prematch"))
+        finally:
+            await _batch(
+                client,
+                [
+                    {"op": "delete", "entity": "competitions", "id": competition_id},
+                    *({"op": "delete", "entity": "teams", "id": i} for i in team_ids),
+                ],
+            )
+
+    print(f"{'mode':<28} {'best s':>8} {'events/s':>10}")
+    for name, times in ((f"PATCH each (x{args.concurrency})", each), ("POST /api/batch", batched)):
+        best = min(times)
+        print(f"{name:<28} {best:>8.3f} {len(ids) / best:>10.0f}")
+    print(f"speedup {min(each) / min(batched):.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,162 @@
+"""Bet search with and without the search indexes.
+
+Builds a scratch copy of the bets table (schema ``bench_search``, no
+triggers or foreign keys) filled with synthetic bets, runs the queries
+``GET /api/bets/search`` issues for typical filters before and after creating
+the search indexes from init/01-schema.sql, and reports the best execution
+time of each. Only the ``(created_at, id)`` index exists in the "before" run,
+as in the schema without the search indexes.
+
+Run from the backend directory against a scratch database::
+
+    python -m bench.bench_bet_search --rows 10000000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any
+
+import asyncpg
+
+
+SCHEMA = "bench_search"
+BATCH = 1_000_000
+
+# A rare market, a popular one and per-bet references inside placement_data
+FILL_SQL = f"""
+INSERT INTO {SCHEMA}.bets (
+    id, bookie, customer_id, bookie_bet_id, bet_type, event_id, sport,
+    placement_status, outcome, stake, odds, placement_data, created_at, updated_at
+)
+SELECT g,
+       (ARRAY['BetMaster', 'QuickBet', 'OddsKing'])[g % 3 + 1],
+       g % 50000 + 1,
+       (ARRAY['BM', 'QB', 'OK'])[g % 3 + 1] || '-' || lpad(g::text, 9, '0'),
+       CASE WHEN g % 200 = 0 THEN 'exact_score'
+            ELSE (ARRAY['match_winner', 'total_points', 'handicap', 'both_score'])[g % 4 + 1] END,
+       g % 20000 + 1,
+       'Football',
+       'placed'::placement_status,
+       NULL,
+       ROW(10 + g % 90, 'USD')::money_amount,
+       1.5 + (g % 100) / 100.0,
+       jsonb_build_object(
+           'market', CASE WHEN g % 100 = 0 THEN 'correct_score' ELSE '1X2' END,
+           'selection', (ARRAY['home_win', 'draw', 'away_win'])[g % 3 + 1],
+           'bookie_ref', 'REF-' || g,
+           'channel', (ARRAY['web', 'app', 'retail'])[g % 3 + 1]
+       ),
+       timestamptz '2025-01-01' + g * interval '3 seconds',
+       timestamptz '2025-01-01' + g * interval '3 seconds'
+FROM generate_series($1::bigint, $2::bigint) g
+"""
+
+SEARCH_INDEXES = (
+    f"CREATE INDEX ON {SCHEMA}.bets (bet_type, created_at, id)",
+    f"CREATE INDEX ON {SCHEMA}.bets USING GIN (placement_data jsonb_path_ops)",
+    f"CREATE INDEX ON {SCHEMA}.bets (bookie_bet_id text_pattern_ops)",
+)
+
+PAGE_SQL = f"""
+SELECT id, bookie, customer_id, bookie_bet_id, bet_type, event_id, sport,
+       placement_status, outcome, stake, odds, placement_data, created_at, updated_at
+FROM {SCHEMA}.bets WHERE {{where}}
+ORDER BY created_at DESC, id DESC
+LIMIT 101
+"""
+
+
+def _cases(rows: int) -> list[tuple[str, str, list[Any]]]:
+    middle = rows // 2
+    return [
+        ("placement={market: correct_score}", "placement_data @> $1::jsonb", [{"market": "correct_score"}]),
+        ("placement={bookie_ref: one bet}", "placement_data @> $1::jsonb", [{"bookie_ref": f"REF-{middle}"}]),
+        ("placement_path bookie_ref ==", "placement_data @@ $1::jsonpath", [f'$.bookie_ref == "REF-{middle}"']),
+        ("bet_type=exact_score", "bet_type = ANY($1::text[])", [["exact_score"]]),
+        (
+            "bet_type + placement",
+            "bet_type = ANY($1::text[]) AND placement_data @> $2::jsonb",
+            [["exact_score"], {"market": "correct_score", "selection": "draw"}],
+        ),
+        ("bookie_bet_id_prefix", "bookie_bet_id LIKE $1", [f"QB-{middle // 100:07d}%"]),
+    ]
+
+
+async def _connect() -> asyncpg.Connection:
+    conn = await asyncpg.connect(
+        user=os.getenv("POSTGRES_USER", "analyst_user"),
+        password=os.getenv("POSTGRES_PASSWORD", "analyst_password"),
+        database=os.getenv("POSTGRES_DB", "analyst_platform"),
+        host=os.getenv("POSTGRES_HOST", "postgres"),
+        port=int(os.getenv("POSTGRES_PORT", "5432")),
+        command_timeout=None,
+    )
+    await conn.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+    # As in the search endpoint: no generic plans for the cached statements
+    await conn.execute("SET plan_cache_mode = force_custom_plan")
+    return conn
+
+
+async def _build(conn: asyncpg.Connection, rows: int) -> None:
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+    await conn.execute(f"CREATE TABLE {SCHEMA}.bets (LIKE public.bets INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    started = time.perf_counter()
+    for first in range(1, rows + 1, BATCH):
+        await conn.execute(FILL_SQL, first, min(first + BATCH - 1, rows))
+    await conn.execute(f"CREATE INDEX ON {SCHEMA}.bets (created_at, id)")
+    await conn.execute(f"VACUUM ANALYZE {SCHEMA}.bets")
+    print(f"loaded {rows} bets in {time.perf_counter() - started:.1f}s")
+
+
+async def _time_cases(conn: asyncpg.Connection, rows: int, repeats: int) -> dict[str, tuple[float, int]]:
+    results: dict[str, tuple[float, int]] = {}
+    for name, where, args in _cases(rows):
+        sql = PAGE_SQL.format(where=where)
+        best = float("inf")
+        found = 0
+        for _ in range(repeats):
+            started = time.perf_counter()
+            found = len(await conn.fetch(sql, *args))
+            best = min(best, time.perf_counter() - started)
+        results[name] = (best, found)
+    return results
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bench.bench_bet_search")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--keep", action="store_true", help="keep the bench_search schema afterwards")
+    args = parser.parse_args()
+
+    conn = await _connect()
+    try:
+        await _build(conn, args.rows)
+        before = await _time_cases(conn, args.rows, args.repeats)
+
+        base_size = await conn.fetchval("SELECT pg_indexes_size($1::regclass)", f"{SCHEMA}.bets")
+        started = time.perf_counter()
+        for statement in SEARCH_INDEXES:
+            await conn.execute(statement)
+        await conn.execute(f"ANALYZE {SCHEMA}.bets")
+        size = await conn.fetchval("SELECT pg_indexes_size($1::regclass)", f"{SCHEMA}.bets") - base_size
+        print(f"search indexes built in {time.perf_counter() - started:.1f}s ({size / 2**20:.0f} MB)")
+        after = await _time_cases(conn, args.rows, args.repeats)
+    finally:
+        if not args.keep:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+    print(f"{'query':<36} {'rows':>5} {'no index':>12} {'indexed':>12} {'speedup':>8}")
+    for name, (plain, found) in before.items():
+        indexed = after[name][0]
+        print(f"{name:<36} {found:>5} {plain * 1000:>10.1f}ms {indexed * 1000:>10.2f}ms {plain / indexed:>7.0f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
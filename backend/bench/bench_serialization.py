@@ -0,0 +1,134 @@
+"""Python-side cost of turning a page of bets into a JSON response body.
+
+Fetches synthetic rows with exactly the bets column types (generated in SQL,
+nothing is written) and times, per serialization mode, everything between
+``conn.fetch`` returning and the response body being ready:
+
+* models: dict + _convert_money_fields + Bet(**data) per row, then FastAPI's
+  response_model validation/serialisation and JSONResponse rendering
+* fast: app.serialization.encode_rows (orjson, or json when unavailable)
+
+The postgres mode has no Python-side step, so it is timed end to end (the
+json_agg query over the same rows) and compared against fetch + each of the
+above.
+
+Run from the backend directory::
+
+    python -m bench.bench_serialization --rows 100000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Any, Callable
+
+import asyncpg
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app import serialization
+from app.db import _init_connection
+from app.models import Bet
+from app.routers import _BET_JSON, _convert_money_fields
+
+
+ROWS_SQL = """
+SELECT g AS id,
+       'BetMaster'::text AS bookie,
+       (g % 500 + 1)::bigint AS customer_id,
+       'BM-' || g AS bookie_bet_id,
+       'match_winner'::text AS bet_type,
+       (g % 50 + 1)::bigint AS event_id,
+       'Football'::text AS sport,
+       'placed'::placement_status AS placement_status,
+       (ARRAY['win', 'lose', NULL])[g % 3 + 1]::bet_outcome AS outcome,
+       ROW((g % 1000) + 0.25, 'USD')::money_amount AS stake,
+       (1.5 + (g % 100) / 100.0)::decimal(20, 10) AS odds,
+       jsonb_build_object('market', '1X2', 'selection', 'home_win') AS placement_data,
+       now() - g * interval '1 second' AS created_at,
+       now() AS updated_at
+FROM generate_series(1, $1) g
+"""
+
+JSON_SQL = f"""
+SELECT {serialization.json_array_sql(_BET_JSON, "created_at DESC, id DESC")}
+FROM ({ROWS_SQL}) bets
+"""
+
+
+async def _models_body(rows: list[Any]) -> bytes:
+    result: list[Bet] = []
+    for r in rows:
+        data = dict(r)
+        data = _convert_money_fields(data, ["stake"])
+        result.append(Bet(**data))
+    field = create_model_field(name="Response", type_=list[Bet], mode="serialization")
+    content = await serialize_response(field=field, response_content=result)
+    return JSONResponse(content).body
+
+
+async def _fast_body(rows: list[Any]) -> bytes:
+    return serialization.encode_rows(rows, ("stake",))
+
+
+async def _time(label: str, fn: Callable[[list[Any]], Any], rows: list[Any], repeats: int) -> float:
+    best = float("inf")
+    size = 0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        body = await fn(rows)
+        best = min(best, time.perf_counter() - started)
+        size = len(body)
+    print(f"{label:>12}: {best * 1000:8.1f} ms  {len(rows) / best:10.0f} rows/s  {size / 1e6:6.1f} MB")
+    return best
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bench.bench_serialization")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(
+        user=os.getenv("POSTGRES_USER", "analyst_user"),
+        password=os.getenv("POSTGRES_PASSWORD", "analyst_password"),
+        database=os.getenv("POSTGRES_DB", "analyst_platform"),
+        host=os.getenv("POSTGRES_HOST", "postgres"),
+        port=int(os.getenv("POSTGRES_PORT", "5432")),
+    )
+    try:
+        await _init_connection(conn)
+        fetch = float("inf")
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            rows = await conn.fetch(ROWS_SQL, args.rows)
+            fetch = min(fetch, time.perf_counter() - started)
+        print(f"{'fetch':>12}: {fetch * 1000:8.1f} ms  ({len(rows)} rows)")
+
+        async def _postgres_body(rows: list[Any]) -> bytes:
+            return await conn.fetchval(JSON_SQL, len(rows))
+
+        postgres = await _time("postgres", _postgres_body, rows, args.repeats)
+    finally:
+        await conn.close()
+
+    models = await _time("models", _models_body, rows, args.repeats)
+    fast = await _time("fast", _fast_body, rows, args.repeats)
+    if serialization.orjson is not None:
+        orjson, serialization.orjson = serialization.orjson, None
+        try:
+            await _time("fast (json)", _fast_body, rows, args.repeats)
+        finally:
+            serialization.orjson = orjson
+    print(f"fast is {models / fast:.1f}x faster than models")
+    print(
+        f"end to end: models {(fetch + models) * 1000:.0f} ms, fast {(fetch + fast) * 1000:.0f} ms, "
+        f"postgres {postgres * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,188 @@
+"""Per-trigger cost of the single-bet write path.
+
+Places bets one INSERT at a time, the way ``POST /api/bets`` does, then
+settles each with an UPDATE, and times every statement from the client. The
+run is repeated with each user trigger on bets, balance_changes and audit_log
+disabled in turn (a placed bet also writes a balance change, and every
+audited row notifies the change feed), with all of them disabled, and with
+the consolidated validate_bet trigger in place of the three separate
+validation triggers. The difference to the baseline is roughly what that
+trigger costs per bet.
+
+Every configuration runs in its own transaction that is rolled back, so the
+triggers are back as they were afterwards and nothing is written; commit
+and WAL flush time is not part of the numbers. ALTER TABLE ... DISABLE
+TRIGGER locks the tables for the duration, so use a scratch database::
+
+    python -m bench.bench_trigger_costs --bets 1000 --rounds 3
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import Optional
+
+import asyncpg
+
+
+TABLES = ("bets", "balance_changes", "audit_log")
+
+INSERT_SQL = """
+INSERT INTO bets(
+    bookie, customer_id, bookie_bet_id, bet_type, event_id, sport,
+    placement_status, outcome, stake, odds, placement_data
+) VALUES(
+    $1, $2, $3, 'match_winner', $4, $5, 'placed', NULL, ROW(5, $6)::money_amount, 2.5, $7
+)
+RETURNING id
+"""
+SETTLE_SQL = "UPDATE bets SET outcome = $2 WHERE id = $1 RETURNING id"
+
+
+async def _connect() -> asyncpg.Connection:
+    conn = await asyncpg.connect(
+        user=os.getenv("POSTGRES_USER", "analyst_user"),
+        password=os.getenv("POSTGRES_PASSWORD", "analyst_password"),
+        database=os.getenv("POSTGRES_DB", "analyst_platform"),
+        host=os.getenv("POSTGRES_HOST", "postgres"),
+        port=int(os.getenv("POSTGRES_PORT", "5432")),
+        command_timeout=None,
+    )
+    await conn.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+    return conn
+
+
+async def _user_triggers(conn: asyncpg.Connection) -> list[tuple[str, str]]:
+    # Triggers defined on the tables themselves, not the clones on partitions
+    # or the internal foreign key triggers
+    rows = await conn.fetch(
+        """
+        SELECT tgrelid::regclass::text AS table_name, tgname
+        FROM pg_trigger
+        WHERE tgrelid = ANY($1::regclass[]) AND NOT tgisinternal AND tgenabled <> 'D'
+        ORDER BY 1, 2
+        """,
+        list(TABLES),
+    )
+    return [(r["table_name"], r["tgname"]) for r in rows]
+
+
+async def _setup(conn: asyncpg.Connection, bets: int) -> tuple[int, int, str, str]:
+    event = await conn.fetchrow(
+        """
+        SELECT e.id, c.sport FROM events e JOIN competitions c ON c.id = e.competition_id
+        WHERE e.status <> 'finished' ORDER BY e.id LIMIT 1
+        """
+    )
+    if event is None:
+        raise SystemExit("need at least one event that is not finished")
+    bookie = await conn.fetchval("SELECT name FROM bookies ORDER BY name LIMIT 1")
+    customer_id = await conn.fetchval(
+        """
+        INSERT INTO customers (username, password, real_name, currency, status, balance)
+        VALUES ('bench_trigger_costs', 'x', 'Bench Customer', 'USD', 'active', ROW(0, 'USD')::money_amount)
+        RETURNING id
+        """
+    )
+    await conn.execute(
+        """
+        INSERT INTO balance_changes (customer_id, change_type, delta, description)
+        VALUES ($1, 'top_up', ROW($2, 'USD')::money_amount, 'bench')
+        """,
+        customer_id, 10 * bets,
+    )
+    return customer_id, event["id"], event["sport"], bookie
+
+
+async def _run(
+    conn: asyncpg.Connection,
+    bets: int,
+    disable: list[tuple[str, str]],
+    validation: Optional[str],
+) -> tuple[list[float], list[float]]:
+    inserts: list[float] = []
+    settles: list[float] = []
+    tr = conn.transaction()
+    await tr.start()
+    try:
+        customer_id, event_id, sport, bookie = await _setup(conn, bets)
+        if validation is not None:
+            await conn.execute("SELECT set_bet_validation($1)", validation)
+        for table, name in disable:
+            await conn.execute(f'ALTER TABLE {table} DISABLE TRIGGER "{name}"')
+        placement = {"market": "1X2", "selection": "home_win"}
+        ids: list[int] = []
+        for i in range(bets):
+            started = time.perf_counter()
+            ids.append(
+                await conn.fetchval(INSERT_SQL, bookie, customer_id, f"bench-tc-{i}", event_id, sport, "USD", placement)
+            )
+            inserts.append(time.perf_counter() - started)
+        for i, bet_id in enumerate(ids):
+            started = time.perf_counter()
+            await conn.fetchval(SETTLE_SQL, bet_id, ("win", "lose", "void")[i % 3])
+            settles.append(time.perf_counter() - started)
+    finally:
+        await tr.rollback()
+    return inserts, settles
+
+
+def _stats(samples: list[list[float]]) -> tuple[float, float]:
+    # Median over rounds of the per-round mean and p99, in microseconds
+    means = [statistics.fmean(s) for s in samples]
+    p99s = [sorted(s)[int(len(s) * 0.99) - 1] for s in samples]
+    return statistics.median(means) * 1e6, statistics.median(p99s) * 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bench.bench_trigger_costs")
+    parser.add_argument("--bets", type=int, default=1000, help="bets placed and settled per configuration")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    conn = await _connect()
+    try:
+        mode = await conn.fetchval("SELECT bet_validation_mode()")
+        # The per-trigger runs use the separate validation triggers so each
+        # check shows up on its own
+        await conn.execute("SELECT set_bet_validation('separate')")
+        triggers = await _user_triggers(conn)
+        await conn.execute("SELECT set_bet_validation($1)", mode if mode != "mixed" else "consolidated")
+
+        configs: list[tuple[str, list[tuple[str, str]], Optional[str]]] = [
+            ("all triggers, separate validation", [], "separate"),
+            ("all triggers, consolidated validation", [], "consolidated"),
+        ]
+        configs += [(f"without {table}.{name}", [(table, name)], "separate") for table, name in triggers]
+        configs.append(("without all user triggers", triggers, "separate"))
+
+        results: dict[str, tuple[list[list[float]], list[list[float]]]] = {name: ([], []) for name, _, _ in configs}
+        await _run(conn, min(args.bets, 200), [], None)  # warm up caches and plans
+        for round_no in range(args.rounds):
+            # Interleaved, so drift over the run hits every configuration alike
+            for name, disable, validation in configs:
+                inserts, settles = await _run(conn, args.bets, disable, validation)
+                results[name][0].append(inserts)
+                results[name][1].append(settles)
+            print(f"round {round_no + 1}/{args.rounds} done", flush=True)
+    finally:
+        await conn.close()
+
+    base_insert, _ = _stats(results[configs[0][0]][0])
+    base_settle, _ = _stats(results[configs[0][0]][1])
+    print(f"\n{'configuration':<64} {'insert us':>10} {'p99':>8} {'delta':>8} {'settle us':>10} {'p99':>8} {'delta':>8}")
+    for name, _, _ in configs:
+        insert_mean, insert_p99 = _stats(results[name][0])
+        settle_mean, settle_p99 = _stats(results[name][1])
+        print(
+            f"{name:<64} {insert_mean:>10.1f} {insert_p99:>8.1f} {insert_mean - base_insert:>+8.1f}"
+            f" {settle_mean:>10.1f} {settle_p99:>8.1f} {settle_mean - base_settle:>+8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,519 @@
+"""Synthetic data at configurable scale for load tests and benchmarks.
+
+Adds customers with deposits and withdrawals, events spread over the last
+``--days`` days and the next two weeks (finished ones with results), and bets
+on them with a realistic mix: about 3% failed and 1% pending placements, and
+settled bets on finished events roughly 40% won, 53% lost and 7% void.
+Everything is derived from ``--seed`` and generated inside Postgres, so runs
+are reproducible and millions of bets do not pass through Python.
+
+Two write paths:
+
+* ``--path triggers`` goes through the real per-row triggers the API uses:
+  bets are placed while their events are live, then the events finish, get
+  results and their bets are settled with UPDATEs, so validation, balance
+  changes, balances and audit rows all come from the triggers. Rows written
+  by triggers carry the load time as their timestamp.
+* ``--path bulk`` (default) uses the set-based ``app.bulk_write`` path like
+  ``POST /api/bets/bulk``: each batch writes the bets in their final state
+  together with their balance changes and audit rows, timestamped across the
+  history, and applies one balance delta per customer. Much faster, and the
+  history spreads over monthly partitions as it would in production.
+
+Both keep the statement-level rollups (customer stats, positions, P&L) in
+step and fold them at the end. Run from the backend directory against a
+scratch database, e.g.::
+
+    python -m bench.datagen --customers 50000 --events 20000 --bets 5000000
+    python -m bench.datagen --path triggers --bets 100000
+
+Generated rows are named after ``--tag`` (usernames, team and competition
+names, bookie bet ids); run again with another tag to add more.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import asyncpg
+
+from app.bulk import _APPLY_BALANCE_DELTAS
+
+
+SPORTS = ("Football", "Basketball", "Tennis")
+COUNTRIES = ("England", "Spain", "Germany", "Italy", "France", "USA")
+AHEAD_DAYS = 14
+FINISHED_AFTER = timedelta(hours=3)
+MAX_STAKE = 100
+
+
+def rand(key: str, salt: int, seed: int) -> str:
+    # SQL expression: uniform in [0, 1), fixed per (row key, salt, seed)
+    return f"((hashint8extended(({key})::bigint, {seed * 1000 + salt}) & 2147483647) / 2147483648.0)"
+
+
+def _plan_bets_sql(seed: int) -> str:
+    # One row per bet g in [$1, $2]: customer, event, market and status. An
+    # event is chosen with a skew so some events draw far more bets than others.
+    r = lambda salt: rand("g", salt, seed)  # noqa: E731
+    return f"""
+    SELECT g, c.id AS customer_id, c.currency, e.id AS event_id, e.sport, e.finished,
+           $3 || '-' || g AS bookie_bet_id,
+           $4::text[] AS bookies,
+           LEAST(e.date - ({r(3)} * 72 - 1) * interval '1 hour', now() - interval '1 minute') AS created_at,
+           e.date + interval '2 hours' AS settled_at,
+           round(2 + {r(5)} * {r(5)} * {MAX_STAKE - 2}, 2) AS stake,
+           {r(4)} AS market_r, {r(6)} AS status_r, {r(7)} AS outcome_r, {r(8)} AS odds_r,
+           {r(9)} AS bookie_r
+    FROM generate_series($1::bigint, $2::bigint) g
+    JOIN gen_customers c ON c.n = 1 + floor({r(1)} * (SELECT count(*) FROM gen_customers))::int
+    JOIN gen_events e ON e.n = 1 + floor({r(2)} * {r(2)} * (SELECT count(*) FROM gen_events))::int
+    """
+
+
+# Market, selection and odds from the plan's random draws
+_BET_COLUMNS = """
+    bookies[1 + floor(bookie_r * cardinality(bookies))::int] AS bookie,
+    customer_id,
+    bookie_bet_id,
+    CASE WHEN market_r < 0.45 THEN 'match_winner' WHEN market_r < 0.70 THEN 'total_points'
+         WHEN market_r < 0.85 THEN 'handicap' WHEN market_r < 0.95 THEN 'both_score'
+         ELSE 'exact_score' END AS bet_type,
+    event_id,
+    sport,
+    CASE WHEN status_r < 0.03 THEN 'failed' WHEN status_r < 0.04 THEN 'pending'
+         ELSE 'placed' END::placement_status AS placement_status,
+    ROW(stake, currency)::money_amount AS stake,
+    CASE WHEN market_r < 0.95 THEN round(1.2 + odds_r * odds_r * 6, 2)
+         ELSE round(6 + odds_r * 34, 2) END AS odds,
+    CASE WHEN market_r < 0.45
+            THEN jsonb_build_object('market', '1X2', 'selection',
+                (ARRAY['home_win', 'draw', 'away_win'])[1 + floor(odds_r * 3)::int])
+         WHEN market_r < 0.70
+            THEN jsonb_build_object('market', 'total_points', 'selection',
+                (ARRAY['over_', 'under_'])[1 + floor(odds_r * 2)::int] || (1.5 + floor(odds_r * 4)))
+         WHEN market_r < 0.85
+            THEN jsonb_build_object('market', 'handicap', 'selection', 'home', 'line', -1.5 + floor(odds_r * 4))
+         WHEN market_r < 0.95
+            THEN jsonb_build_object('market', 'btts', 'selection', CASE WHEN odds_r < 0.5 THEN 'yes' ELSE 'no' END)
+         ELSE jsonb_build_object('market', 'correct_score', 'selection',
+                floor(odds_r * 4)::int || '-' || floor(outcome_r * 4)::int) END
+        || jsonb_build_object('channel', (ARRAY['web', 'app', 'retail'])[1 + floor(bookie_r * 3)::int])
+        AS placement_data,
+    CASE WHEN finished AND status_r >= 0.04 THEN
+        CASE WHEN outcome_r < 0.40 THEN 'win' WHEN outcome_r < 0.93 THEN 'lose' ELSE 'void' END
+    END::bet_outcome AS final_outcome,
+    created_at,
+    settled_at
+"""
+
+# triggers path: placed open, settled later by _SETTLE_BETS
+_INSERT_BETS_TRIGGERS = f"""
+INSERT INTO bets (
+    bookie, customer_id, bookie_bet_id, bet_type, event_id, sport,
+    placement_status, stake, odds, placement_data, created_at, updated_at
+)
+SELECT bookie, customer_id, bookie_bet_id, bet_type, event_id, sport,
+       placement_status, stake, odds, placement_data, created_at, created_at
+FROM (SELECT {_BET_COLUMNS} FROM ({{plan}}) plan) bet
+"""
+
+# bulk path: final state, balance changes and audit rows in one statement,
+# returning the net balance delta per customer
+_INSERT_BETS_BULK = f"""
+WITH bet AS (
+    SELECT {_BET_COLUMNS} FROM ({{plan}}) plan
+), inserted AS (
+    INSERT INTO bets (
+        bookie, customer_id, bookie_bet_id, bet_type, event_id, sport,
+        placement_status, outcome, stake, odds, placement_data, created_at, updated_at
+    )
+    SELECT bookie, customer_id, bookie_bet_id, bet_type, event_id, sport,
+           placement_status, final_outcome, stake, odds, placement_data, created_at,
+           CASE WHEN final_outcome IS NULL THEN created_at ELSE settled_at END
+    FROM bet
+    RETURNING *
+), bets_audit AS (
+    INSERT INTO audit_log (table_name, operation, row_id, new_data, changed_at)
+    SELECT 'bets', 'INSERT', id, to_jsonb(inserted), created_at FROM inserted
+), changes AS (
+    INSERT INTO balance_changes (customer_id, change_type, delta, reference_id, description, created_at)
+    SELECT customer_id, 'bet_placed'::balance_change_type, ROW(-(stake).amount, (stake).currency)::money_amount,
+           'bet_' || id, format('Placed bet %s', bookie_bet_id), created_at
+    FROM inserted WHERE placement_status = 'placed'
+    UNION ALL
+    SELECT customer_id, 'bet_settled'::balance_change_type,
+           ROW(CASE outcome WHEN 'win' THEN (stake).amount * odds WHEN 'void' THEN (stake).amount ELSE 0 END,
+               (stake).currency)::money_amount,
+           'bet_' || id,
+           CASE outcome WHEN 'win' THEN format('Bet %s won - payout at odds %s', id, odds)
+                        WHEN 'void' THEN format('Bet %s voided - stake returned', id)
+                        ELSE format('Bet %s settled as loss', id) END,
+           updated_at
+    FROM inserted WHERE outcome IS NOT NULL
+    RETURNING *
+), changes_audit AS (
+    INSERT INTO audit_log (table_name, operation, row_id, new_data, changed_at)
+    SELECT 'balance_changes', 'INSERT', id, to_jsonb(changes), created_at FROM changes
+)
+SELECT customer_id, SUM((delta).amount) AS total FROM changes GROUP BY customer_id
+"""
+
+# triggers path: settle one slice of finished events' open bets
+_SETTLE_BETS = """
+UPDATE bets b
+SET outcome = CASE WHEN o.r < 0.40 THEN 'win' WHEN o.r < 0.93 THEN 'lose' ELSE 'void' END::bet_outcome
+FROM (
+    SELECT b.id, {r} AS r
+    FROM bets b JOIN gen_events e ON e.id = b.event_id
+    WHERE e.finished AND e.n BETWEEN $1 AND $2
+      AND b.placement_status = 'placed' AND b.outcome IS NULL AND b.bookie_bet_id LIKE $3
+) o
+WHERE b.id = o.id
+"""
+
+
+async def _connect() -> asyncpg.Connection:
+    conn = await asyncpg.connect(
+        user=os.getenv("POSTGRES_USER", "analyst_user"),
+        password=os.getenv("POSTGRES_PASSWORD", "analyst_password"),
+        database=os.getenv("POSTGRES_DB", "analyst_platform"),
+        host=os.getenv("POSTGRES_HOST", "postgres"),
+        port=int(os.getenv("POSTGRES_PORT", "5432")),
+        command_timeout=None,
+    )
+    await conn.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+    return conn
+
+
+class Loader:
+    def __init__(self, conn: asyncpg.Connection, args: argparse.Namespace) -> None:
+        self.conn = conn
+        self.args = args
+        self.seed = args.seed
+        self.tag = args.tag
+        self.bulk = args.path == "bulk"
+        self.run = f"{args.tag}{int(time.time()):x}"
+
+    def r(self, key: str, salt: int) -> str:
+        return rand(key, salt, self.seed)
+
+    async def step(self, name: str, coro) -> None:  # noqa: ANN001
+        started = time.perf_counter()
+        rows = await coro
+        elapsed = time.perf_counter() - started
+        rate = f" ({rows / elapsed:,.0f}/s)" if rows else ""
+        print(f"{name:<28} {rows or '':>10} {elapsed:>8.1f}s{rate}")
+
+    async def reference(self) -> int:
+        tag, n = self.tag, self.args.teams_per_sport
+        async with self.conn.transaction():
+            await self.conn.execute("INSERT INTO sports (name) SELECT unnest($1::text[]) ON CONFLICT DO NOTHING", SPORTS)
+            await self.conn.execute(
+                """
+                INSERT INTO bookies (name, description)
+                SELECT format('%s Bookie %s', $1::text, k), 'Generated bookie' FROM generate_series(1, 4) k
+                ON CONFLICT DO NOTHING
+                """,
+                tag,
+            )
+            await self.conn.execute(
+                """
+                INSERT INTO teams (name, country, sport)
+                SELECT format('%s Team %s', $1::text, g), ($3::text[])[1 + g % cardinality($3::text[])], s
+                FROM unnest($2::text[]) s, generate_series(1, $4) g
+                ON CONFLICT DO NOTHING
+                """,
+                tag, SPORTS, COUNTRIES, n,
+            )
+            await self.conn.execute(
+                """
+                INSERT INTO competitions (name, country, sport)
+                SELECT format('%s League %s', $1::text, g), ($3::text[])[1 + g % cardinality($3::text[])], s
+                FROM unnest($2::text[]) s, generate_series(1, $4) g
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM competitions c WHERE c.sport = s AND c.name = format('%s League %s', $1::text, g)
+                )
+                """,
+                tag, SPORTS, COUNTRIES, max(2, n // 8),
+            )
+        return 0
+
+    async def partitions(self, since: datetime) -> int:
+        # Monthly partitions back to the start of the history, so old rows do
+        # not all land in the default partitions
+        created = 0
+        month = since.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        while month < datetime.now(timezone.utc):
+            following = (month + timedelta(days=32)).replace(day=1)
+            for table in ("audit_log", "balance_changes"):
+                name = f"{table}_y{month:%Y}m{month:%m}"
+                if await self.conn.fetchval("SELECT to_regclass($1)", name) is None:
+                    try:
+                        await self.conn.execute(
+                            f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ('{month.isoformat()}') "
+                            f"TO ('{following.isoformat()}')"
+                        )
+                        created += 1
+                    except asyncpg.CheckViolationError:
+                        print(f"  {table}_default already has rows for {month:%Y-%m}, leaving them there")
+            month = following
+        await self.conn.fetchval("SELECT ensure_monthly_partitions('audit_log') + ensure_monthly_partitions('balance_changes')")
+        return created
+
+    async def customers(self) -> int:
+        r = self.r
+        await self.conn.execute(
+            "CREATE TEMP TABLE gen_customers (n INTEGER PRIMARY KEY, id BIGINT NOT NULL, currency currency_code NOT NULL)"
+        )
+        return await self.conn.fetchval(
+            f"""
+            WITH inserted AS (
+                INSERT INTO customers (username, password, real_name, currency, status, balance, preferences, created_at)
+                SELECT format('%s_customer_%s', $1::text, g), 'generated', format('Customer %s', g), currency,
+                       CASE WHEN {r('g', 2)} < 0.05 THEN 'disabled' ELSE 'active' END::customer_status,
+                       ROW(0, currency)::money_amount,
+                       jsonb_build_object('favorite_sport', ($4::text[])[1 + floor({r('g', 3)} * 3)::int]),
+                       now() - ($3 + {r('g', 4)} * 30) * interval '1 day'
+                FROM (
+                    SELECT g, CASE WHEN {r('g', 1)} < 0.6 THEN 'USD' WHEN {r('g', 1)} < 0.85 THEN 'EUR'
+                                   ELSE 'GBP' END::currency_code AS currency
+                    FROM generate_series(1, $2) g
+                ) c
+                RETURNING id, currency
+            ), numbered AS (
+                INSERT INTO gen_customers SELECT row_number() OVER (ORDER BY id), id, currency FROM inserted
+                RETURNING 1
+            )
+            SELECT count(*) FROM numbered
+            """,
+            self.run, self.args.customers, self.args.days, SPORTS,
+        )
+
+    async def deposits(self) -> int:
+        # Enough for every customer to place all of its (randomly assigned)
+        # bets up front, as the triggers path does before settling any
+        per_customer = self.args.bets / max(self.args.customers, 1)
+        amount = MAX_STAKE * math.ceil(2 * per_customer + 20)
+        return await self._balance_changes(
+            f"""
+            SELECT c.id AS customer_id, 'top_up'::balance_change_type AS change_type,
+                   ROW({amount}, c.currency)::money_amount AS delta, 'Initial deposit' AS description,
+                   cu.created_at
+            FROM gen_customers c JOIN customers cu ON cu.id = c.id
+            """
+        )
+
+    async def withdrawals(self) -> int:
+        # One customer in five takes out a tenth of the deposit, one in fifty
+        # gets a goodwill adjustment; both happen after all their bets
+        per_customer = self.args.bets / max(self.args.customers, 1)
+        amount = MAX_STAKE * math.ceil(2 * per_customer + 20) / 10
+        r = self.r
+        return await self._balance_changes(
+            f"""
+            SELECT c.id AS customer_id,
+                   CASE WHEN {r('c.n', 11)} < 0.2 THEN 'withdrawal' ELSE 'adjustment' END::balance_change_type AS change_type,
+                   ROW(CASE WHEN {r('c.n', 11)} < 0.2 THEN -{amount} ELSE 5 END, c.currency)::money_amount AS delta,
+                   CASE WHEN {r('c.n', 11)} < 0.2 THEN 'Withdrawal' ELSE 'Goodwill credit' END AS description,
+                   now() - {r('c.n', 12)} * interval '1 hour' AS created_at
+            FROM gen_customers c
+            WHERE {r('c.n', 11)} < 0.22
+            """
+        )
+
+    async def _balance_changes(self, select: str) -> int:
+        async with self.conn.transaction():
+            if not self.bulk:
+                return await self.conn.fetchval(
+                    f"""
+                    WITH inserted AS (
+                        INSERT INTO balance_changes (customer_id, change_type, delta, description)
+                        SELECT customer_id, change_type, delta, description FROM ({select}) s
+                        RETURNING 1
+                    ) SELECT count(*) FROM inserted
+                    """
+                )
+            await self.conn.execute("SET LOCAL app.bulk_write = 'on'")
+            totals = await self.conn.fetch(
+                f"""
+                WITH changes AS (
+                    INSERT INTO balance_changes (customer_id, change_type, delta, description, created_at)
+                    SELECT customer_id, change_type, delta, description, created_at FROM ({select}) s
+                    RETURNING *
+                ), changes_audit AS (
+                    INSERT INTO audit_log (table_name, operation, row_id, new_data, changed_at)
+                    SELECT 'balance_changes', 'INSERT', id, to_jsonb(changes), created_at FROM changes
+                )
+                SELECT customer_id, SUM((delta).amount) AS total, count(*) AS n FROM changes GROUP BY customer_id
+                """
+            )
+            await self.conn.execute(
+                _APPLY_BALANCE_DELTAS, [t["customer_id"] for t in totals], [t["total"] for t in totals]
+            )
+            return sum(t["n"] for t in totals)
+
+    async def events(self) -> int:
+        r = self.r
+        await self.conn.execute(
+            """
+            CREATE TEMP TABLE gen_events (
+                n INTEGER PRIMARY KEY, id BIGINT NOT NULL, date TIMESTAMPTZ NOT NULL,
+                sport TEXT NOT NULL, finished BOOLEAN NOT NULL
+            )
+            """
+        )
+        # On the triggers path past events start out live and finish after
+        # their bets are placed; prematch ones must be in the future either way
+        final_status = (
+            "CASE WHEN date < now() - $5::interval THEN 'finished' WHEN date <= now() THEN 'live' ELSE 'prematch' END"
+            if self.bulk
+            else "CASE WHEN date <= now() THEN 'live' ELSE 'prematch' END"
+        )
+        return await self.conn.fetchval(
+            f"""
+            WITH teams_by_sport AS (
+                SELECT sport, array_agg(id ORDER BY id) AS ids FROM teams
+                WHERE name LIKE $1 || ' Team %' GROUP BY sport
+            ), competitions_by_sport AS (
+                SELECT sport, array_agg(id ORDER BY id) AS ids FROM competitions
+                WHERE name LIKE $1 || ' League %' GROUP BY sport
+            ), planned AS (
+                SELECT g, ($2::text[])[1 + floor({r('g', 21)} * cardinality($2::text[]))::int] AS sport,
+                       date_trunc('hour', now() - $3 * interval '1 day'
+                           + {r('g', 22)} * ($3 + {AHEAD_DAYS}) * interval '1 day') + interval '1 hour' AS date,
+                       {r('g', 23)} AS team_r, {r('g', 24)} AS opponent_r, {r('g', 25)} AS competition_r
+                FROM generate_series(1, $4) g
+            ), inserted AS (
+                INSERT INTO events (date, competition_id, team_a_id, team_b_id, status, created_at)
+                SELECT p.date,
+                       c.ids[1 + floor(competition_r * cardinality(c.ids))::int],
+                       t.ids[1 + a],
+                       t.ids[1 + (a + 1 + floor(opponent_r * (cardinality(t.ids) - 1))::int) % cardinality(t.ids)],
+                       ({final_status})::event_status,
+                       LEAST(p.date - interval '14 days', now())
+                FROM (SELECT *, floor(team_r * 1000000)::int AS a0 FROM planned) p
+                JOIN teams_by_sport t USING (sport)
+                JOIN competitions_by_sport c USING (sport)
+                CROSS JOIN LATERAL (SELECT a0 % cardinality(t.ids) AS a) pick
+                ORDER BY p.g
+                RETURNING id, date, competition_id
+            ), numbered AS (
+                INSERT INTO gen_events
+                SELECT row_number() OVER (ORDER BY i.id), i.id, i.date, c.sport, i.date < now() - $5::interval
+                FROM inserted i JOIN competitions c ON c.id = i.competition_id
+                RETURNING 1
+            )
+            SELECT count(*) FROM numbered
+            """,
+            self.tag, SPORTS, self.args.days, self.args.events, FINISHED_AFTER,
+        )
+
+    async def results(self) -> int:
+        r = self.r
+        async with self.conn.transaction():
+            if not self.bulk:
+                await self.conn.execute(
+                    "UPDATE events SET status = 'finished' FROM gen_events g WHERE g.id = events.id AND g.finished"
+                )
+            return await self.conn.fetchval(
+                f"""
+                WITH inserted AS (
+                    INSERT INTO results (event_id, score_a, score_b, created_at)
+                    SELECT id, floor({r('n', 31)} * {r('n', 31)} * 5)::int, floor({r('n', 32)} * {r('n', 32)} * 5)::int,
+                           date + interval '2 hours'
+                    FROM gen_events WHERE finished
+                    RETURNING 1
+                ) SELECT count(*) FROM inserted
+                """
+            )
+
+    async def bets(self) -> int:
+        plan = _plan_bets_sql(self.seed)
+        bookies = [f"{self.tag} Bookie {k}" for k in range(1, 5)]
+        total = 0
+        for first in range(1, self.args.bets + 1, self.args.batch):
+            last = min(first + self.args.batch - 1, self.args.bets)
+            async with self.conn.transaction():
+                if self.bulk:
+                    await self.conn.execute("SET LOCAL app.bulk_write = 'on'")
+                    totals = await self.conn.fetch(
+                        _INSERT_BETS_BULK.format(plan=plan), first, last, self.run, bookies
+                    )
+                    await self.conn.execute(
+                        _APPLY_BALANCE_DELTAS, [t["customer_id"] for t in totals], [t["total"] for t in totals]
+                    )
+                else:
+                    await self.conn.execute(_INSERT_BETS_TRIGGERS.format(plan=plan), first, last, self.run, bookies)
+            total = last
+            if sys.stdout.isatty():
+                print(f"  {total:,} / {self.args.bets:,} bets", end="\r", flush=True)
+        return total
+
+    async def settle(self) -> int:
+        # triggers path only: one UPDATE per slice of events, as the
+        # per-event settlements would be
+        sql = _SETTLE_BETS.format(r=self.r("b.id", 41))
+        events = await self.conn.fetchval("SELECT count(*) FROM gen_events")
+        settled = 0
+        step = max(1, events // 50)
+        for first in range(1, events + 1, step):
+            status = await self.conn.execute(sql, first, first + step - 1, f"{self.run}-%")
+            settled += int(status.split()[-1])
+        return settled
+
+    async def fold(self) -> int:
+        folded = await self.conn.fetchval(
+            "SELECT fold_customer_stats() + fold_event_positions() + fold_pnl_hourly()"
+        )
+        await self.conn.execute("ANALYZE")
+        return folded
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bench.datagen")
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--events", type=int, default=5_000)
+    parser.add_argument("--bets", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=180, help="history length")
+    parser.add_argument("--teams-per-sport", type=int, default=40)
+    parser.add_argument("--path", choices=("bulk", "triggers"), default="bulk")
+    parser.add_argument("--batch", type=int, default=100_000, help="bets per transaction")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tag", default="gen", help="name prefix for generated rows")
+    args = parser.parse_args()
+
+    conn = await _connect()
+    loader = Loader(conn, args)
+    started = time.perf_counter()
+    try:
+        await loader.step("reference data", loader.reference())
+        if loader.bulk:
+            await loader.step("partitions", loader.partitions(
+                datetime.now(timezone.utc) - timedelta(days=args.days + 30)
+            ))
+        await loader.step("customers", loader.customers())
+        await loader.step("deposits", loader.deposits())
+        await loader.step("events", loader.events())
+        if loader.bulk:
+            await loader.step("results", loader.results())
+            await loader.step(f"bets ({args.path})", loader.bets())
+        else:
+            await loader.step(f"bets ({args.path})", loader.bets())
+            await loader.step("results", loader.results())
+            await loader.step("settlements", loader.settle())
+        await loader.step("withdrawals/adjustments", loader.withdrawals())
+        await loader.step("fold rollups + analyze", loader.fold())
+    finally:
+        await conn.close()
+    print(f"done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
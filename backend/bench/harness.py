@@ -0,0 +1,273 @@
+"""HTTP load test of the API, with results kept per commit.
+
+Drives a running backend (``--base-url``) route by route: for each scenario
+``--concurrency`` clients send requests back to back for ``--seconds``, and
+the harness reports throughput and p50/p90/p99 latency. Ids for the
+parameterised routes are sampled from the API first, so any data set works;
+fill a database with ``python -m bench.datagen`` for meaningful numbers.
+
+Each run is saved as ``bench/results/<time>-<commit>.json`` and compared with
+the most recent saved run of another commit (or ``--compare <commit|file>``):
+a p99 or throughput change beyond ``--threshold`` is reported as a
+regression, and ``--fail-on-regression`` turns that into exit status 1.
+Compare runs made against the same data set and server settings only.
+
+Run from the backend directory::
+
+    python -m bench.harness --base-url http://localhost:8000 --seconds 10 --concurrency 16
+    python -m bench.harness --routes bets_page,bet_search --no-save
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import httpx
+
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    method: str
+    route: str  # path template, as in the /metrics route label
+    params: Callable[[dict[str, list[Any]]], tuple[str, dict[str, Any], Optional[Any]]]
+
+
+def _pick(ids: dict[str, list[Any]], key: str) -> Any:
+    return random.choice(ids[key]) if ids[key] else 1
+
+
+def _pnl_window() -> dict[str, str]:
+    until = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return {"from": (until - timedelta(days=30)).isoformat(), "to": until.isoformat()}
+
+
+# GET /api/customers, /api/events and /api/balance_changes return whole
+# tables; only events is included, it stays small next to bets
+SCENARIOS = (
+    Scenario("bets_page", "GET", "/api/bets", lambda ids: ("/api/bets", {"limit": 100}, None)),
+    Scenario(
+        "bets_by_customer", "GET", "/api/bets",
+        lambda ids: ("/api/bets", {"customer_id": _pick(ids, "customer_id"), "limit": 50}, None),
+    ),
+    Scenario(
+        "bets_by_event", "GET", "/api/bets",
+        lambda ids: ("/api/bets", {"event_id": _pick(ids, "event_id"), "limit": 50}, None),
+    ),
+    Scenario(
+        "bet_search", "GET", "/api/bets/search",
+        lambda ids: ("/api/bets/search", {"placement": json.dumps({"market": "correct_score"}), "limit": 50}, None),
+    ),
+    Scenario("events", "GET", "/api/events", lambda ids: ("/api/events", {}, None)),
+    Scenario("customer_stats", "GET", "/api/customer_stats", lambda ids: ("/api/customer_stats", {}, None)),
+    Scenario("live_positions", "GET", "/api/positions", lambda ids: ("/api/positions", {"status": "live"}, None)),
+    Scenario(
+        "event_positions", "GET", "/api/events/{event_id}/positions",
+        lambda ids: (f"/api/events/{_pick(ids, 'event_id')}/positions", {}, None),
+    ),
+    Scenario(
+        "pnl_daily", "GET", "/api/pnl",
+        lambda ids: ("/api/pnl", {**_pnl_window(), "bucket": "day", "group_by": "bookie"}, None),
+    ),
+    Scenario("audit_page", "GET", "/api/audit", lambda ids: ("/api/audit", {"limit": 100}, None)),
+    Scenario(
+        "top_up", "POST", "/api/balance_changes",
+        lambda ids: (
+            "/api/balance_changes",
+            {},
+            {
+                "customer_id": (c := _pick(ids, "customer"))[0],
+                "change_type": "top_up",
+                "delta": {"amount": "1.00", "currency": c[1]},
+                "description": "harness",
+            },
+        ),
+    ),
+)
+WRITE_SCENARIOS = {"top_up"}
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    # Nearest rank on an ascending list
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p90_ms": round(percentile(ordered, 0.90) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> list[str]:
+    # Regressions of current against baseline, as printable lines
+    regressions: list[str] = []
+    for name, now in current.items():
+        before = baseline.get(name)
+        if not before or not before["requests"] or not now["requests"]:
+            continue
+        if now["p99_ms"] > before["p99_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p99 {before['p99_ms']:.1f} -> {now['p99_ms']:.1f} ms")
+        if now["throughput"] < before["throughput"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {before['throughput']:.0f} -> {now['throughput']:.0f} req/s")
+    return regressions
+
+
+async def _sample_ids(client: httpx.AsyncClient) -> dict[str, list[Any]]:
+    res = await client.get("/api/bets", params={"limit": 1000})
+    res.raise_for_status()
+    bets = res.json()
+    res = await client.get("/api/customer_stats")
+    res.raise_for_status()
+    customers = [(c["customer_id"], c["currency"]) for c in res.json()][:5000]
+    return {
+        "customer_id": sorted({b["customer_id"] for b in bets}),
+        "event_id": sorted({b["event_id"] for b in bets}),
+        "customer": customers,
+    }
+
+
+async def _run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, ids: dict[str, list[Any]], seconds: float, concurrency: int
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker() -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            path, params, body = scenario.params(ids)
+            started = time.perf_counter()
+            try:
+                res = await client.request(scenario.method, path, params=params, json=body)
+                await res.aread()
+                ok = res.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(("git", *args), capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _load_baseline(compare_to: Optional[str], commit: str) -> Optional[dict[str, Any]]:
+    if compare_to and Path(compare_to).is_file():
+        return json.loads(Path(compare_to).read_text())
+    runs = sorted(RESULTS_DIR.glob("*.json"), reverse=True)
+    for path in runs:
+        run = json.loads(path.read_text())
+        if compare_to and not run["commit"].startswith(compare_to):
+            continue
+        if not compare_to and run["commit"] == commit:
+            continue
+        return run
+    return None
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bench.harness")
+    parser.add_argument("--base-url", default=os.getenv("BENCH_BASE_URL", "http://localhost:8000"))
+    parser.add_argument("--api-key", default=os.getenv("API_KEY", "dev-key"))
+    parser.add_argument("--seconds", type=float, default=10.0, help="per scenario")
+    parser.add_argument("--warmup", type=float, default=1.0, help="seconds per scenario, not recorded")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--routes", help="comma-separated scenario names (default: all reads)")
+    parser.add_argument("--writes", action="store_true", help="include scenarios that write (top-ups)")
+    parser.add_argument("--compare", help="commit (prefix) or result file to compare with")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as regression")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    wanted = set(args.routes.split(",")) if args.routes else None
+    scenarios = [
+        s for s in SCENARIOS
+        if (s.name in wanted if wanted else args.writes or s.name not in WRITE_SCENARIOS)
+    ]
+    if wanted and len(scenarios) != len(wanted):
+        known = ", ".join(s.name for s in SCENARIOS)
+        raise SystemExit(f"unknown scenario in --routes; known: {known}")
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, headers={"X-API-Key": args.api_key}, limits=limits, timeout=60
+    ) as client:
+        ids = await _sample_ids(client)
+        results: dict[str, Any] = {}
+        print(f"{'scenario':<18} {'req/s':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for scenario in scenarios:
+            if args.warmup > 0:
+                await _run_scenario(client, scenario, ids, args.warmup, args.concurrency)
+            r = await _run_scenario(client, scenario, ids, args.seconds, args.concurrency)
+            results[scenario.name] = {**r, "method": scenario.method, "route": scenario.route}
+            print(
+                f"{scenario.name:<18} {r['throughput']:>9.1f} {r['p50_ms']:>9.2f} "
+                f"{r['p90_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['errors']:>7}"
+            )
+
+    commit = _git("rev-parse", "--short", "HEAD") or "unknown"
+    run = {
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "base_url": args.base_url,
+        "seconds": args.seconds,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    baseline = _load_baseline(args.compare, commit)
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{commit}.json"
+        path.write_text(json.dumps(run, indent=2) + "\n")
+        print(f"saved {path}")
+
+    if baseline is None:
+        print("no earlier run to compare with")
+        return
+    print(f"compared with {baseline['commit']} ({baseline['created_at']}):")
+    regressions = compare(baseline["results"], results, args.threshold)
+    for line in regressions or ["no regressions"]:
+        print(f"  {line}")
+    if regressions and args.fail_on_regression:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
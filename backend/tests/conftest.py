@@ -0,0 +1,28 @@
+import asyncio
+import os
+from typing import AsyncIterator
+
+import pytest
+
+os.environ.setdefault("API_KEY", "dev-key")
+os.environ.setdefault("ENABLE_DB_EVENTS", "0")
+
+import asyncpg  # noqa: E402
+
+from app.db import db  # noqa: E402
+
+# Database tests run against the database configured by POSTGRES_* (docker
+# compose, or a scratch database with init/*.sql loaded) and are skipped
+# without one
+
+
+@pytest.fixture
+async def database() -> AsyncIterator[None]:
+    try:
+        await asyncio.wait_for(db.connect(), 5)
+    except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as exc:
+        pytest.skip(f"no database: {exc}")
+    try:
+        yield
+    finally:
+        await db.disconnect()
@@ -0,0 +1,38 @@
+import os
+
+import pytest
+from httpx import AsyncClient
+
+os.environ.setdefault("API_KEY", "dev-key")
+os.environ.setdefault("ENABLE_DB_EVENTS", "0")
+
+from app.batch import _Op, group_operations  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+def test_operations_group_by_kind_and_fields_and_split_on_repeated_records() -> None:
+    ops = [
+        _Op(0, "update", "events", 1, {"status": "live"}),
+        _Op(1, "update", "events", 2, {"status": "live"}),
+        _Op(2, "update", "events", 3, {"status": "live", "date": None}),
+        _Op(3, "update", "events", 3, {"date": None, "status": "finished"}),
+        _Op(4, "create", "teams", None, {"name": "a"}),
+        _Op(5, "create", "teams", None, {"name": "b"}),
+        _Op(6, "delete", "teams", 7, {}),
+    ]
+    assert [[op.index for op in run] for run in group_operations(ops)] == [[0, 1], [2], [3], [4, 5], [6]]
+
+
+@pytest.mark.asyncio
+async def test_batch_validates_every_operation_before_writing() -> None:
+    headers = {"X-API-Key": "dev-key"}
+    operations = [
+        {"op": "delete", "entity": "teams", "id": 1},
+        {"op": "update", "entity": "customers", "id": 1, "data": {"balance": {"amount": "1", "currency": "USD"}}},
+    ]
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        res = await ac.post("/api/batch", json={"operations": operations}, headers=headers)
+        assert res.status_code == 422
+        assert res.json()["detail"]["index"] == 1
+        res = await ac.post("/api/batch", json={"operations": [{"op": "delete", "entity": "bets"}]}, headers=headers)
+        assert res.json()["detail"] == {"index": 0, "error": "id is required to delete"}
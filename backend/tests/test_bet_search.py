@@ -0,0 +1,62 @@
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+import asyncpg
+from httpx import AsyncClient
+
+os.environ.setdefault("API_KEY", "dev-key")
+os.environ.setdefault("ENABLE_DB_EVENTS", "0")
+
+from app import routers  # noqa: E402
+from app.main import app  # noqa: E402
+from app.routers import _like_prefix  # noqa: E402
+
+HEADERS = {"X-API-Key": "dev-key"}
+
+
+class _Connection:
+    # Fails every query the way Postgres does when a jsonpath does not parse
+    def __init__(self) -> None:
+        self.queries: list[str] = []
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        yield
+
+    async def execute(self, query: str, *args: Any) -> None:
+        self.queries.append(query)
+
+    async def _fail(self, query: str, *args: Any) -> Any:
+        self.queries.append(query)
+        raise asyncpg.PostgresSyntaxError("syntax error at end of jsonpath input")
+
+    fetch = fetchrow = _fail
+
+
+class _Database:
+    def __init__(self) -> None:
+        self.conn = _Connection()
+        self.acquired = 0
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[_Connection]:
+        self.acquired += 1
+        yield self.conn
+
+
+def test_like_prefix_escapes_wildcards() -> None:
+    assert _like_prefix("BM-00") == "BM-00%"
+    assert _like_prefix("a_b%c\\") == "a\\_b\\%c\\\\%"
+
+
+async def test_malformed_placement_path_is_a_400_from_the_page_query(monkeypatch) -> None:
+    database = _Database()
+    monkeypatch.setattr(routers, "db", database)
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        res = await ac.get("/api/bets/search", params={"placement_path": "$.selection =="}, headers=HEADERS)
+    assert res.status_code == 400
+    assert res.json()["detail"].startswith("Invalid placement_path")
+    # No separate validation query
+    assert database.acquired == 1
+    assert [q for q in database.conn.queries if "FROM bets" in q] and len(database.conn.queries) == 2
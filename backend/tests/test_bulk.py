@@ -0,0 +1,46 @@
+import os
+from decimal import Decimal
+
+import pytest
+from httpx import AsyncClient
+
+os.environ.setdefault("API_KEY", "dev-key")
+os.environ.setdefault("ENABLE_DB_EVENTS", "0")
+
+from app.bulk import check_balances  # noqa: E402
+from app.main import app  # noqa: E402
+
+HEADERS = {"X-API-Key": "dev-key"}
+
+
+@pytest.mark.asyncio
+async def test_bulk_bets_rejects_non_array_body() -> None:
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        res = await ac.post("/api/bets/bulk", json={"bookie": "x"}, headers=HEADERS)
+        assert res.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_bulk_bets_reports_per_row_errors() -> None:
+    # Every row fails request validation, so the database is never reached
+    body = '{"odds": 0.5}\nnot json\n\n{"bookie": "BetMaster"}\n'
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        res = await ac.post(
+            "/api/bets/bulk",
+            content=body,
+            headers={**HEADERS, "Content-Type": "application/x-ndjson"},
+        )
+    assert res.status_code == 200
+    data = res.json()
+    assert data["inserted"] == 0
+    assert data["ids"] == [None, None, None]
+    assert [e["index"] for e in data["errors"]] == [0, 1, 2]
+    assert data["errors"][1]["error"].startswith("Invalid JSON")
+
+
+def test_check_balances_counts_only_accepted_stakes() -> None:
+    # 150 overdraws a balance of 100; the 50 after it still fits, as it
+    # would when the bets are placed one at a time
+    stakes = [(0, 1, Decimal("150")), (1, 1, Decimal("50")), (2, 1, Decimal("60")), (3, 2, Decimal("5"))]
+    rejected = check_balances({1: Decimal("100"), 2: Decimal("5")}, stakes)
+    assert rejected == {0: Decimal("-50"), 2: Decimal("-10")}
@@ -0,0 +1,50 @@
+import pytest
+from fastapi import Request
+from pydantic import TypeAdapter
+
+from app.cache import LocalCacheBackend, ResponseCache
+
+ADAPTER = TypeAdapter(list[str])
+
+
+def _request(if_none_match: str | None = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+@pytest.mark.asyncio
+async def test_cache_serves_hits_and_304_without_reloading() -> None:
+    cache = ResponseCache(LocalCacheBackend(), ttl=60)
+    loads = 0
+
+    async def load() -> list[str]:
+        nonlocal loads
+        loads += 1
+        return ["Football"]
+
+    first = await cache.respond(_request(), "sports", load, ADAPTER)
+    assert first.status_code == 200
+    assert first.body == b'["Football"]'
+
+    etag = first.headers["etag"]
+    revalidated = await cache.respond(_request(etag), "sports", load, ADAPTER)
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+    assert loads == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_invalidation_reloads() -> None:
+    cache = ResponseCache(LocalCacheBackend(), ttl=60)
+    data = ["Football"]
+
+    async def load() -> list[str]:
+        return list(data)
+
+    etag = (await cache.respond(_request(), "sports", load, ADAPTER)).headers["etag"]
+    data.append("Tennis")
+    await cache.invalidate("sports")
+
+    res = await cache.respond(_request(etag), "sports", load, ADAPTER)
+    assert res.status_code == 200
+    assert res.body == b'["Football","Tennis"]'
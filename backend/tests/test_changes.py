@@ -0,0 +1,41 @@
+import pytest
+
+from app.changes import Change, ChangeFeed, ChangeFilter, parse_payload
+
+
+def test_parse_payload() -> None:
+    changes = parse_payload('[["bets","I",10,7,5],["customers","U",5,null,5]]')
+    assert changes == [Change("bets", "I", 10, 7, 5), Change("customers", "U", 5, None, 5)]
+
+
+@pytest.mark.asyncio
+async def test_subscriber_filters_and_coalesces() -> None:
+    feed = ChangeFeed(max_pending=10)
+    sub = feed.subscribe(ChangeFilter(tables=frozenset({"bets"}), customer_ids=frozenset({5})))
+    feed.publish(
+        [
+            Change("bets", "I", 1, 7, 5),
+            Change("bets", "U", 1, 7, 5),
+            Change("bets", "U", 2, 7, 5),
+            Change("bets", "U", 2, 7, 5),
+            Change("bets", "I", 3, 7, 5),
+            Change("bets", "D", 3, 7, 5),
+            Change("bets", "I", 4, 7, 6),
+            Change("customers", "U", 5, None, 5),
+        ]
+    )
+    batch = await sub.next_batch(timeout=1)
+    assert batch == [Change("bets", "I", 1, 7, 5), Change("bets", "U", 2, 7, 5)]
+    assert await sub.next_batch(timeout=0.01) == []
+
+
+@pytest.mark.asyncio
+async def test_subscriber_overflow_asks_for_reload() -> None:
+    feed = ChangeFeed(max_pending=3)
+    slow = feed.subscribe(ChangeFilter())
+    feed.publish([Change("bets", "I", i) for i in range(5)])
+    assert await slow.next_batch(timeout=1) is None
+    feed.publish([Change("bets", "U", 9)])
+    assert await slow.next_batch(timeout=1) == [Change("bets", "U", 9)]
+    feed.unsubscribe(slow)
+    assert not feed.subscribers
@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+
+from fastapi import Request
+
+from app.conditional import etag_for, not_modified, validators
+
+UPDATED_AT = datetime(2025, 3, 1, 12, 30, 5, 123456, tzinfo=timezone.utc)
+
+
+def _request(**headers: str) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_validators_from_updated_at() -> None:
+    headers = validators(UPDATED_AT)
+    assert headers["Last-Modified"] == "Sat, 01 Mar 2025 12:30:05 GMT"
+    assert headers["ETag"] == etag_for(UPDATED_AT)
+    assert etag_for(UPDATED_AT.replace(microsecond=123457)) != headers["ETag"]
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since() -> None:
+    etag = etag_for(UPDATED_AT)
+    assert not_modified(_request(if_none_match=f'"x", W/{etag}'), UPDATED_AT)
+    assert not not_modified(
+        _request(if_none_match='"x"', if_modified_since="Sat, 01 Mar 2025 12:30:05 GMT"), UPDATED_AT
+    )
+
+
+def test_if_modified_since_compares_whole_seconds() -> None:
+    assert not_modified(_request(if_modified_since="Sat, 01 Mar 2025 12:30:05 GMT"), UPDATED_AT)
+    assert not not_modified(_request(if_modified_since="Sat, 01 Mar 2025 12:30:04 GMT"), UPDATED_AT)
+    assert not not_modified(_request(if_modified_since="not a date"), UPDATED_AT)
@@ -0,0 +1,129 @@
+import pytest
+
+from app import db as db_module
+from app.db import READ_YOUR_WRITES_COOKIE, PoolConfig, PoolMetrics, ReadRoutingMiddleware, read_from_replica
+
+
+def test_pool_config_from_env(monkeypatch) -> None:
+    monkeypatch.setenv("DB_POOL_MAX_SIZE", "32")
+    monkeypatch.setenv("DB_STATEMENT_CACHE_SIZE", "0")
+    monkeypatch.setenv("DB_COMMAND_TIMEOUT", "2.5")
+    monkeypatch.setenv("DB_POOL_ACQUIRE_TIMEOUT", "0")
+    config = PoolConfig.from_env()
+    assert config.max_size == 32
+    assert config.statement_cache_size == 0
+    assert config.command_timeout == 2.5
+    assert config.acquire_timeout is None
+
+
+def test_pool_metrics_snapshot() -> None:
+    metrics = PoolMetrics()
+    assert metrics.snapshot()["statement_cache_hit_rate"] is None
+    metrics.record_wait(0.001)
+    metrics.record_wait(0.003)
+    metrics.statement_cache_hits = 3
+    metrics.statement_cache_misses = 1
+    snapshot = metrics.snapshot()
+    assert snapshot["acquisitions"] == 2
+    assert snapshot["wait_ms_avg"] == 2.0
+    assert snapshot["wait_ms_max"] == 3.0
+    assert snapshot["statement_cache_hit_rate"] == 0.75
+
+
+@pytest.mark.asyncio
+async def test_read_routing_middleware() -> None:
+    seen: list[bool] = []
+
+    async def app(scope, receive, send) -> None:
+        seen.append(read_from_replica.get())
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    sent: list[dict] = []
+
+    async def send(message) -> None:
+        sent.append(message)
+
+    middleware = ReadRoutingMiddleware(app, window=5)
+    await middleware({"type": "http", "method": "POST", "headers": []}, None, send)
+    cookie = dict(sent[0]["headers"])[b"set-cookie"].split(b";")[0]
+    assert cookie.startswith(READ_YOUR_WRITES_COOKIE.encode() + b"=")
+
+    await middleware({"type": "http", "method": "GET", "headers": []}, None, send)
+    await middleware({"type": "http", "method": "GET", "headers": [(b"cookie", cookie)]}, None, send)
+    assert seen == [False, True, False]
+    assert read_from_replica.get() is False
+
+
+def test_statement_cache_counting_tolerates_missing_internals() -> None:
+    class Protocol:
+        def get_record_class(self) -> type:
+            return tuple
+
+    class Connection:
+        _protocol = Protocol()
+        _stmt_cache = {("SELECT 1", tuple, False): object()}
+
+    before = (db_module.metrics.statement_cache_hits, db_module.metrics.statement_cache_misses)
+    db_module._count_statement_cache(Connection(), "SELECT 1", {})
+    db_module._count_statement_cache(Connection(), "SELECT 2", {})
+    # An asyncpg without the cache attribute: not counted, no error
+    db_module._count_statement_cache(object(), "SELECT 1", {})
+    after = (db_module.metrics.statement_cache_hits, db_module.metrics.statement_cache_misses)
+    assert (after[0] - before[0], after[1] - before[1]) == (1, 1)
+
+
+class _Pool:
+    def __init__(self, name: str, fail: bool = False) -> None:
+        self.name = name
+        self.fail = fail
+        self.acquired = 0
+
+    async def acquire(self, timeout=None) -> str:
+        self.acquired += 1
+        if self.fail:
+            raise ConnectionRefusedError("replica down")
+        return self.name
+
+    async def release(self, connection) -> None:
+        pass
+
+    def get_size(self) -> int:
+        return 2
+
+    def get_idle_size(self) -> int:
+        return 1
+
+
+@pytest.mark.asyncio
+async def test_reads_fall_back_to_the_primary_when_a_replica_goes_down() -> None:
+    database = db_module.Database()
+    primary, replica = _Pool("primary"), _Pool("replica", fail=True)
+    database._pool = primary
+    database._replicas = [replica]
+    async with database.acquire(replica=True) as conn:
+        assert conn == "primary"
+    # Skipped until the retry interval has passed
+    async with database.acquire(replica=True) as conn:
+        assert conn == "primary"
+    assert replica.acquired == 1
+    replica.fail = False
+    database._replica_down_until[replica] = 0.0
+    async with database.acquire(replica=True) as conn:
+        assert conn == "replica"
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_label_replicas_by_position_not_host(monkeypatch) -> None:
+    class Database(db_module.Database):
+        async def _create_pool(self, host: str, port: int, role: str) -> _Pool:
+            if host == "replica-a":
+                raise ConnectionRefusedError("replica down")
+            return _Pool(host)
+
+    monkeypatch.setenv("POSTGRES_REPLICA_HOSTS", "replica-a:5433,replica-b:5434")
+    database = Database()
+    await database.connect()
+    replicas = database.pool_stats()["replicas"]
+    assert replicas == [{"replica": 1, "available": True, "size": 2, "idle": 1, "in_use": 1}]
+    assert "replica-b" not in repr(database.pool_stats())
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+
+os.environ.setdefault("API_KEY", "dev-key")
+os.environ.setdefault("ENABLE_DB_EVENTS", "0")
+
+from app.entities import BET, CUSTOMER, select_fields  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+def test_select_fields_keeps_known_order_and_key_fields() -> None:
+    known = ("id", "stake", "placement_data", "created_at", "customer_username")
+    assert select_fields(None, known) == list(known)
+    assert select_fields(" customer_username,stake ", known, ("id", "created_at")) == [
+        "id", "stake", "created_at", "customer_username",
+    ]
+    with pytest.raises(HTTPException) as exc:
+        select_fields("stake,nope", known)
+    assert exc.value.status_code == 400
+
+
+def test_entity_selection_narrows_money_and_json_columns() -> None:
+    selected = BET.select("stake")
+    assert selected == ["id", "stake", "created_at"]
+    assert BET.money(selected) == ("stake",)
+    assert "placement_data" not in BET.json_object(selected)
+    assert CUSTOMER.money(CUSTOMER.select("username")) == ()
+
+
+@pytest.mark.asyncio
+async def test_unknown_fields_rejected_before_querying() -> None:
+    headers = {"X-API-Key": "dev-key"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        res = await ac.get("/api/customers", params={"fields": "username,bogus"}, headers=headers)
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Unknown fields: bogus"
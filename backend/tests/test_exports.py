@@ -0,0 +1,21 @@
+from datetime import datetime, timezone
+
+from app.exports import EXPORTS, export_query
+
+
+def test_export_query_orders_by_the_filtered_timestamp() -> None:
+    since = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    until = datetime(2024, 2, 1, tzinfo=timezone.utc)
+    query, args = export_query(EXPORTS["audit_log"], since, until)
+    assert "WHERE changed_at >= $1 AND changed_at < $2" in query
+    assert query.endswith("ORDER BY changed_at, id")
+    assert args == [since, until]
+
+
+def test_export_query_without_filters() -> None:
+    query, args = export_query(EXPORTS["bets"], None, None)
+    assert "WHERE" not in query
+    assert query.endswith("FROM bets  ORDER BY created_at, id")
+    assert args == []
+    query, args = export_query(EXPORTS["balance_changes"], None, datetime(2024, 1, 1, tzinfo=timezone.utc))
+    assert "WHERE created_at < $1" in query and len(args) == 1
@@ -0,0 +1,35 @@
+from bench.harness import compare, percentile, summarize
+
+
+def test_percentile_nearest_rank() -> None:
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile(values, 1.0) == 100.0
+    assert percentile([7.0], 0.99) == 7.0
+    assert percentile([], 0.5) == 0.0
+
+
+def test_summarize_reports_ms_and_throughput() -> None:
+    summary = summarize([0.010, 0.020, 0.030, 0.040], errors=1, elapsed=2.0)
+    assert summary["requests"] == 4
+    assert summary["errors"] == 1
+    assert summary["throughput"] == 2.0
+    assert summary["p50_ms"] == 20.0
+    assert summary["max_ms"] == 40.0
+
+
+def test_compare_flags_p99_and_throughput_regressions() -> None:
+    baseline = {
+        "bets_page": {"requests": 100, "throughput": 200.0, "p99_ms": 50.0},
+        "events": {"requests": 100, "throughput": 40.0, "p99_ms": 250.0},
+    }
+    current = {
+        "bets_page": {"requests": 100, "throughput": 150.0, "p99_ms": 54.0},
+        "events": {"requests": 100, "throughput": 41.0, "p99_ms": 300.0},
+        "new_route": {"requests": 10, "throughput": 1.0, "p99_ms": 1.0},
+    }
+    assert compare(baseline, current, threshold=0.10) == [
+        "bets_page: throughput 200 -> 150 req/s",
+        "events: p99 250.0 -> 300.0 ms",
+    ]
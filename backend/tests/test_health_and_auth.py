@@ -7,6 +7,7 @@ os.environ.setdefault("API_KEY", "dev-key")
 os.environ.setdefault("ENABLE_DB_EVENTS", "0")
 
 from app.main import app  # noqa: E402
+from app.security import STREAM_TOKEN_SECONDS, issue_stream_token, stream_token_valid  # noqa: E402
 
 
 @pytest.mark.asyncio
@@ -32,3 +33,33 @@ async def test_openapi_available() -> None:
         data = res.json()
         assert data["info"]["title"] == "Sports Betting Admin API"
 
+
+
+def test_stream_tokens_expire_and_are_signed() -> None:
+    token = issue_stream_token(now=1000)
+    assert stream_token_valid(token, now=1000 + STREAM_TOKEN_SECONDS)
+    assert not stream_token_valid(token, now=1001 + STREAM_TOKEN_SECONDS)
+    expires, _, signature = token.partition(".")
+    assert not stream_token_valid(f"{int(expires) + 3600}.{signature}", now=1000)
+    assert not stream_token_valid("dev-key", now=1000)
+
+
+@pytest.mark.asyncio
+async def test_change_stream_takes_a_token_not_the_api_key() -> None:
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        res = await ac.get("/api/changes/stream", params={"api_key": "dev-key", "table": "nope"})
+        assert res.status_code == 401
+        res = await ac.post("/api/changes/token", params={"token": issue_stream_token()})
+        assert res.status_code == 401
+        res = await ac.post("/api/changes/token", headers={"X-API-Key": "dev-key"})
+        token = res.json()["token"]
+        # Authenticated; fails on the unknown table before reaching the database
+        res = await ac.get("/api/changes/stream", params={"token": token, "table": "nope"})
+        assert res.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_pool_health_requires_api_key() -> None:
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        res = await ac.get("/health/db")
+    assert res.status_code == 401
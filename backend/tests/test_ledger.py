@@ -0,0 +1,100 @@
+import asyncio
+import os
+from decimal import Decimal
+from typing import AsyncIterator
+
+import pytest
+from httpx import AsyncClient
+
+os.environ.setdefault("API_KEY", "dev-key")
+os.environ.setdefault("ENABLE_DB_EVENTS", "0")
+
+import asyncpg  # noqa: E402
+
+from app.db import db  # noqa: E402
+from app.main import app  # noqa: E402
+
+HEADERS = {"X-API-Key": "dev-key"}
+
+
+@pytest.fixture
+async def customer_id(database: None) -> AsyncIterator[int]:
+    # A ledger mode customer with lanes of 100, 100, 100 and 130
+    async with db.acquire() as conn:
+        customer_id = await conn.fetchval(
+            """
+            INSERT INTO customers (username, password, real_name, currency, status, balance)
+            VALUES ('test_ledger_' || gen_random_uuid(), 'x', 'Ledger Test', 'USD', 'active',
+                    ROW(430, 'USD')::money_amount)
+            RETURNING id
+            """
+        )
+        await conn.execute("SELECT enable_balance_ledger($1, 4)", customer_id)
+        await conn.execute(
+            "UPDATE balance_lanes SET amount = CASE WHEN lane = 3 THEN 130 ELSE 100 END WHERE customer_id = $1",
+            customer_id,
+        )
+    try:
+        yield customer_id
+    finally:
+        async with db.acquire() as conn:
+            await conn.execute("DELETE FROM customers WHERE id = $1", customer_id)
+
+
+async def _lanes(customer_id: int) -> list[Decimal]:
+    async with db.acquire() as conn:
+        rows = await conn.fetch("SELECT amount FROM balance_lanes WHERE customer_id = $1 ORDER BY lane", customer_id)
+    return [r["amount"] for r in rows]
+
+
+async def test_ledger_deltas_keep_the_total_and_no_lane_negative(customer_id: int) -> None:
+    async with db.acquire() as conn:
+        for delta in (-50, -120, -200, 30):
+            await conn.execute("SELECT apply_balance_delta($1, $2)", customer_id, delta)
+        with pytest.raises(asyncpg.RaiseError, match="Insufficient balance"):
+            await conn.execute("SELECT apply_balance_delta($1, -91)", customer_id)
+        lanes = await _lanes(customer_id)
+        assert sum(lanes) == 90 and min(lanes) >= 0
+        await conn.execute("SELECT snapshot_balance_ledger($1)", customer_id)
+        assert await conn.fetchval("SELECT (balance).amount FROM customers WHERE id = $1", customer_id) == 90
+
+
+async def test_slow_path_does_not_wait_while_holding_a_lane(customer_id: int) -> None:
+    async with db.acquire() as a, db.acquire() as b:
+        tx_a = a.transaction()
+        await tx_a.start()
+        # Fast path: A takes lane 3, the fullest
+        await a.execute("SELECT apply_balance_delta($1, -10)", customer_id)
+        tx_b = b.transaction()
+        await tx_b.start()
+        # Slow path: B locks lanes 0-2 in order and waits for lane 3
+        waiting = asyncio.create_task(b.execute("SELECT apply_balance_delta($1, -150)", customer_id))
+        b_pid = b.get_server_pid()
+        for _ in range(100):
+            if await a.fetchval(
+                "SELECT wait_event_type = 'Lock' FROM pg_stat_activity WHERE pid = $1", b_pid
+            ):
+                break
+            await asyncio.sleep(0.02)
+        # A now needs every lane while holding lane 3: waiting would deadlock
+        # with B, so it fails straight away instead
+        with pytest.raises(asyncpg.LockNotAvailableError):
+            await asyncio.wait_for(a.execute("SELECT apply_balance_delta($1, -150)", customer_id), 0.5)
+        await tx_a.rollback()
+        await asyncio.wait_for(waiting, 5)
+        await tx_b.commit()
+    assert sum(await _lanes(customer_id)) == 280
+
+
+async def test_put_cannot_overwrite_a_ledger_balance(customer_id: int) -> None:
+    body = {
+        "username": f"test_ledger_put_{customer_id}", "password": "x", "real_name": "Ledger Test",
+        "currency": "USD", "status": "active", "balance": {"amount": "430", "currency": "USD"},
+    }
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        res = await ac.put(f"/api/customers/{customer_id}", json=body, headers=HEADERS)
+        assert res.status_code == 200
+        body["balance"]["amount"] = "1000"
+        res = await ac.put(f"/api/customers/{customer_id}", json=body, headers=HEADERS)
+        assert res.status_code == 409
+    assert sum(await _lanes(customer_id)) == 430
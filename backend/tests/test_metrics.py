@@ -0,0 +1,73 @@
+import os
+import sys
+from collections import Counter
+
+import pytest
+from httpx import AsyncClient
+
+os.environ.setdefault("API_KEY", "dev-key")
+os.environ.setdefault("ENABLE_DB_EVENTS", "0")
+
+from app import profiling  # noqa: E402
+from app.main import app  # noqa: E402
+from app.metrics import Histogram, MetricsRegistry, RequestTimings  # noqa: E402
+from app.profiling import fold_stack, format_folded  # noqa: E402
+
+HEADERS = {"X-API-Key": "dev-key"}
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    histogram = Histogram(buckets=(0.01, 0.1))
+    for value in (0.005, 0.01, 0.05, 3.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [("0.01", 2), ("0.1", 3), ("+Inf", 4)]
+    assert histogram.count == 4
+
+
+def test_registry_renders_phases_with_remainder_as_other() -> None:
+    registry = MetricsRegistry()
+    timings = RequestTimings(route="/api/bets/{bet_id}", phases={"db": 0.002, "handler": 0.001})
+    registry.observe_request("GET", "/api/bets/{bet_id}", 200, 0.005, timings)
+    registry.add_collector(lambda: [("db_pool_waiting", "gauge", "Waiting", 0)])
+    text = registry.render()
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/bets/{bet_id}",status="200"} 1' in text
+    assert 'http_request_phase_seconds_bucket{method="GET",route="/api/bets/{bet_id}",phase="other",le="0.0025"} 1' in text
+    assert 'http_request_phase_seconds_bucket{method="GET",route="/api/bets/{bet_id}",phase="other",le="0.001"} 0' in text
+    assert "# TYPE db_pool_waiting gauge\ndb_pool_waiting 0\n" in text
+
+
+def test_folded_stack_runs_outer_to_inner() -> None:
+    def inner() -> str:
+        return fold_stack(sys._getframe())
+
+    stack = inner()
+    assert stack.split(";")[-1].startswith("test_folded_stack_runs_outer_to_inner.<locals>.inner (tests/test_metrics.py:")
+    assert "test_folded_stack_runs_outer_to_inner" in stack.split(";")[-2]
+    assert format_folded(Counter({"b;c": 1, "a;b": 3})) == "a;b 3\nb;c 1\n"
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_route_templates() -> None:
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        await ac.get("/health")
+        assert (await ac.get("/metrics")).status_code == 401
+        res = await ac.get("/metrics", headers=HEADERS)
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_request_phase_seconds_count{method="GET",route="/health",phase="handler"}' in res.text
+
+
+@pytest.mark.asyncio
+async def test_profile_header_needs_the_api_key(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(profiling, "enabled", True)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        res = await ac.get("/health", headers={"X-Profile": "1"})
+        assert "x-profile-file" not in res.headers
+        res = await ac.get("/health", headers={"X-Profile": "1", "X-API-Key": "wrong"})
+        assert "x-profile-file" not in res.headers
+        res = await ac.get("/health", headers={"X-Profile": "1", **HEADERS})
+    path = res.headers["x-profile-file"]
+    assert os.path.dirname(path) == str(tmp_path)
+    assert os.path.exists(path)
+    assert len(os.listdir(tmp_path)) == 1
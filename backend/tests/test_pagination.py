@@ -0,0 +1,41 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+
+os.environ.setdefault("API_KEY", "dev-key")
+os.environ.setdefault("ENABLE_DB_EVENTS", "0")
+
+from app.main import app  # noqa: E402
+from app.pagination import decode_cursor, encode_cursor  # noqa: E402
+
+
+def test_cursor_round_trip() -> None:
+    created_at = datetime(2025, 3, 1, 12, 30, 5, 123456, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+def test_invalid_cursor_rejected() -> None:
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_list_bets_validates_page_params() -> None:
+    headers = {"X-API-Key": "dev-key"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        res = await ac.get("/api/bets", params={"limit": 5000}, headers=headers)
+        assert res.status_code == 422
+        res = await ac.get("/api/bets", params={"cursor": "garbage"}, headers=headers)
+        assert res.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_list_audit_requires_table_for_row_id() -> None:
+    headers = {"X-API-Key": "dev-key"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        res = await ac.get("/api/audit", params={"row_id": 1}, headers=headers)
+        assert res.status_code == 400
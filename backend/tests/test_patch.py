@@ -0,0 +1,38 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+from httpx import AsyncClient
+from pydantic import ValidationError
+
+os.environ.setdefault("API_KEY", "dev-key")
+os.environ.setdefault("ENABLE_DB_EVENTS", "0")
+
+from app.conditional import etag_for, if_match_versions  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import BetPatch, CustomerPatch  # noqa: E402
+
+
+def test_patch_keeps_only_sent_fields_and_nullable_nulls() -> None:
+    assert BetPatch(outcome=None).changes() == {"outcome": None}
+    assert BetPatch.model_validate({"odds": "2.5"}).changes() == {"odds": 2.5}
+    with pytest.raises(ValidationError):
+        BetPatch(sport=None)
+    with pytest.raises(ValidationError):
+        CustomerPatch.model_validate({"balance": {"amount": "1", "currency": "USD"}})
+
+
+def test_if_match_versions_decode_our_strong_tags() -> None:
+    updated_at = datetime(2025, 3, 1, 12, 30, 5, 123456, tzinfo=timezone.utc)
+    etag = etag_for(updated_at)
+    assert if_match_versions(f'"other", {etag}') == [updated_at]
+    assert if_match_versions(f"W/{etag}") == []
+    assert if_match_versions("*") is None
+
+
+@pytest.mark.asyncio
+async def test_patch_rejects_null_for_required_field() -> None:
+    headers = {"X-API-Key": "dev-key"}
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        res = await ac.patch("/api/events/1", json={"status": None}, headers=headers)
+    assert res.status_code == 422
@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator
+
+import pytest
+
+from app.db import db
+from app.maintenance import pnl_chunks
+
+# An hour no seeded bet falls in
+HOUR = datetime(2001, 1, 1, 10, tzinfo=timezone.utc)
+
+
+def test_pnl_chunks_are_hour_aligned_and_cover_the_range() -> None:
+    start = datetime(2025, 3, 1, 10, 45, tzinfo=timezone.utc)
+    end = datetime(2025, 3, 2, 9, 59)  # naive times are UTC
+    chunks = pnl_chunks(start, end, chunk_hours=12)
+    assert chunks[0][0] == datetime(2025, 3, 1, 10, tzinfo=timezone.utc)
+    assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+    assert chunks[-1][0] <= end.replace(tzinfo=timezone.utc) < chunks[-1][1]
+    assert len(chunks) == 2
+
+
+@pytest.fixture
+async def customer_id(database: None) -> AsyncIterator[int]:
+    async with db.acquire() as conn:
+        customer_id = await conn.fetchval(
+            """
+            INSERT INTO customers (username, password, real_name, currency, status, balance)
+            VALUES ('test_pnl_' || gen_random_uuid(), 'x', 'P&L Test', 'USD', 'active',
+                    ROW(1000, 'USD')::money_amount)
+            RETURNING id
+            """
+        )
+    try:
+        yield customer_id
+    finally:
+        async with db.acquire() as conn:
+            await conn.execute("DELETE FROM customers WHERE id = $1", customer_id)
+            await conn.execute("DELETE FROM pnl_hourly_deltas WHERE bucket = $1", HOUR)
+            await conn.execute("DELETE FROM pnl_hourly_totals WHERE bucket = $1", HOUR)
+
+
+async def _place_bet(conn, customer_id: int, stake: int) -> None:
+    await conn.execute(
+        """
+        INSERT INTO bets (bookie, customer_id, bookie_bet_id, bet_type, event_id, sport,
+                          placement_status, stake, odds, placement_data, created_at)
+        SELECT (SELECT name FROM bookies ORDER BY name LIMIT 1), $1, 'test_pnl_' || gen_random_uuid(),
+               'match_winner', e.id, c.sport, 'placed', ROW($2, 'USD')::money_amount, 2, '{}', $3
+        FROM events e JOIN competitions c ON c.id = e.competition_id
+        WHERE e.status = 'prematch'
+        ORDER BY e.id
+        LIMIT 1
+        """,
+        customer_id, stake, HOUR + timedelta(minutes=stake),
+    )
+
+
+async def _turnover() -> tuple[int, int]:
+    async with db.acquire() as conn:
+        row = await conn.fetchrow(
+            """
+            SELECT (SELECT COALESCE(SUM(turnover), 0) FROM pnl_hourly WHERE bucket = $1) AS rollup,
+                   (SELECT COALESCE(SUM((stake).amount), 0) FROM bets
+                    WHERE placement_status = 'placed' AND date_trunc('hour', created_at, 'UTC') = $1) AS bets
+            """,
+            HOUR,
+        )
+    return row["rollup"], row["bets"]
+
+
+async def test_backfill_runs_alongside_bet_writes_and_folds(customer_id: int) -> None:
+    async with db.acquire() as writer, db.acquire() as backfill, db.acquire() as folder:
+        await _place_bet(writer, customer_id, 10)
+        tx_w = writer.transaction()
+        await tx_w.start()
+        # Not yet committed when the backfill takes its snapshot
+        await _place_bet(writer, customer_id, 20)
+
+        tx_b = backfill.transaction()
+        await tx_b.start()
+        await asyncio.wait_for(
+            backfill.execute("SELECT backfill_pnl_hourly($1, $2)", HOUR, HOUR + timedelta(hours=1)), 2
+        )
+        # Neither bet writes nor the fold wait for (or break) the backfill
+        await asyncio.wait_for(_place_bet(writer, customer_id, 30), 2)
+        assert await asyncio.wait_for(folder.fetchval("SELECT fold_pnl_hourly()"), 2) == 0
+        await tx_w.commit()
+        await tx_b.commit()
+
+        assert await _turnover() == (60, 60)
+        assert await folder.fetchval("SELECT fold_pnl_hourly()") > 0
+    assert await _turnover() == (60, 60)
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+from httpx import AsyncClient
+
+os.environ.setdefault("API_KEY", "dev-key")
+os.environ.setdefault("ENABLE_DB_EVENTS", "0")
+
+from app.main import app  # noqa: E402
+from app.positions import positions_query  # noqa: E402
+
+HEADERS = {"X-API-Key": "dev-key"}
+
+
+@pytest.mark.asyncio
+async def test_positions_rejects_unknown_status() -> None:
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        res = await ac.get("/api/positions", params={"status": "open"}, headers=HEADERS)
+        assert res.status_code == 422
+
+
+def test_positions_filters_are_pushed_to_event_ids() -> None:
+    query, args = positions_query("live", [3, 4])
+    assert "JOIN" not in query
+    assert "p.event_id = ANY(ARRAY(SELECT id FROM events WHERE status = $1))" in query
+    assert "p.event_id = ANY($2::bigint[])" in query
+    assert args == ["live", [3, 4]]
+    query, args = positions_query(None, None)
+    assert "WHERE" not in query and args == []
+
+
+@pytest.mark.asyncio
+async def test_positions_rejects_non_integer_event_ids() -> None:
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        res = await ac.get("/api/positions", params=[("event_id", "1"), ("event_id", "x")], headers=HEADERS)
+        assert res.status_code == 422
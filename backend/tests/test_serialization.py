@@ -0,0 +1,49 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from app import serialization
+from app.serialization import encode_rows
+
+ROW = {
+    "id": 1,
+    "stake": (Decimal("10.1235"), "USD"),
+    "odds": Decimal("2.1000000000"),
+    "created_at": datetime(2025, 3, 1, 12, 0, 0, 5, tzinfo=timezone.utc),
+    "placement_data": {"selection": "draw"},
+}
+EXPECTED = {
+    "id": 1,
+    "stake": {"amount": "10.1235", "currency": "USD"},
+    "odds": "2.1000000000",
+    "created_at": "2025-03-01T12:00:00.000005Z",
+    "placement_data": {"selection": "draw"},
+}
+
+
+def test_encode_rows_keeps_money_exact() -> None:
+    assert json.loads(encode_rows([ROW], ("stake",))) == [EXPECTED]
+
+
+def test_encode_rows_json_fallback_matches(monkeypatch) -> None:
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert json.loads(encode_rows([ROW], ("stake",))) == [EXPECTED]
+
+
+def test_json_object_sql_shapes_columns() -> None:
+    sql = serialization.json_object_sql(
+        ("id", "stake", "odds", "created_at"),
+        money_fields=("stake",),
+        text_fields=("odds",),
+        timestamp_fields=("created_at",),
+    )
+    assert sql.startswith("json_build_object('id', id, ")
+    assert "'stake', json_build_object('amount', (stake).amount::text, 'currency', (stake).currency)" in sql
+    assert "'odds', odds::text" in sql
+    assert "'created_at', to_char(created_at AT TIME ZONE 'UTC', " in sql
+
+
+def test_json_array_sql_filter_and_empty_default() -> None:
+    sql = serialization.json_array_sql("json_build_object('id', id)", "rn", "rn < $3")
+    assert "json_agg(json_build_object('id', id) ORDER BY rn) FILTER (WHERE rn < $3)" in sql
+    assert "'[]'" in sql
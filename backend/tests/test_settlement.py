@@ -0,0 +1,69 @@
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+import pytest
+from httpx import AsyncClient
+
+os.environ.setdefault("API_KEY", "dev-key")
+os.environ.setdefault("ENABLE_DB_EVENTS", "0")
+
+from app import bulk  # noqa: E402
+from app.main import app  # noqa: E402
+
+HEADERS = {"X-API-Key": "dev-key"}
+
+
+class _EventConnection:
+    # Answers the lookups settle_event makes before it writes: event 7
+    # exists and has bets 1 and 2
+    def __init__(self) -> None:
+        self.queries: list[str] = []
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        yield
+
+    async def fetchval(self, query: str, event_id: int, *args: Any) -> Any:
+        self.queries.append(query)
+        if "FROM events" in query:
+            return 1 if event_id == 7 else None
+        return sorted(i for i in args[0] if i not in (1, 2)) or None
+
+
+class _Database:
+    def __init__(self) -> None:
+        self.conn = _EventConnection()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[_EventConnection]:
+        yield self.conn
+
+
+@pytest.mark.asyncio
+async def test_settle_validates_the_request() -> None:
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        for body in (
+            {"rules": [{"bet_type": "match_winner", "outcome": "draw"}]},
+            {"rules": [{"bet_type": "match_winner"}]},
+            {"outcomes": {"1": "won"}},
+            {"outcomes": {"first": "win"}},
+        ):
+            res = await ac.post("/api/events/7/settle", json=body, headers=HEADERS)
+            assert res.status_code == 422, body
+
+
+@pytest.mark.asyncio
+async def test_settle_rejects_outcomes_for_bets_on_other_events(monkeypatch) -> None:
+    database = _Database()
+    monkeypatch.setattr(bulk, "db", database)
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        res = await ac.post(
+            "/api/events/7/settle", json={"outcomes": {"2": "win", "9": "lose", "3": "void"}}, headers=HEADERS
+        )
+        assert res.status_code == 422
+        assert res.json()["detail"] == "Bets not on event 7: 3, 9"
+        res = await ac.post("/api/events/8/settle", json={"outcomes": {"1": "win"}}, headers=HEADERS)
+        assert res.status_code == 404
+    # Nothing was settled
+    assert not any("UPDATE" in q for q in database.conn.queries)
@@ -1,7 +1,7 @@
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api'
 const API_KEY = import.meta.env.VITE_API_KEY || 'dev-key'
 
-export async function api<T>(path: string, init?: RequestInit): Promise<T> {
+async function request(path: string, init?: RequestInit): Promise<Response> {
   const res = await fetch(`${API_URL}${path}`, {
     ...init,
     headers: {
@@ -14,7 +14,73 @@ export async function api<T>(path: string, init?: RequestInit): Promise<T> {
     const text = await res.text()
     throw new Error(`${res.status} ${res.statusText}: ${text}`)
   }
+  return res
+}
+
+export async function api<T>(path: string, init?: RequestInit): Promise<T> {
+  const res = await request(path, init)
   return res.json() as Promise<T>
 }
 
+export type Page<T> = { items: T[]; nextCursor: string | null }
+
+export async function apiPage<T>(path: string, cursor?: string | null): Promise<Page<T>> {
+  const sep = path.includes('?') ? '&' : '?'
+  const url = cursor ? `${path}${sep}cursor=${encodeURIComponent(cursor)}` : path
+  const res = await request(url)
+  return { items: (await res.json()) as T[], nextCursor: res.headers.get('X-Next-Cursor') }
+}
+
+
 
+export type Change = {
+  table: string
+  op: 'I' | 'U' | 'D'
+  id: number
+  event_id: number | null
+  customer_id: number | null
+}
+
+// Server-sent change feed. onChanges gets coalesced batches; onReset means
+// changes were dropped (slow client or reconnect) and the view should reload.
+// EventSource cannot send the API key header, so each connection opens with
+// a short-lived token; when the stream drops, a new token is fetched rather
+// than letting EventSource retry with the expired one.
+export function subscribeChanges(
+  params: { table?: string[]; event_id?: number[]; customer_id?: number[] },
+  onChanges: (changes: Change[]) => void,
+  onReset: () => void,
+): () => void {
+  let source: EventSource | null = null
+  let retry: ReturnType<typeof setTimeout> | null = null
+  let closed = false
+
+  const connect = async (reconnect: boolean) => {
+    try {
+      const { token } = await api<{ token: string }>('/changes/token', { method: 'POST' })
+      if (closed) return
+      const query = new URLSearchParams({ token })
+      for (const [key, values] of Object.entries(params)) {
+        for (const value of values || []) query.append(key, String(value))
+      }
+      source = new EventSource(`${API_URL}/changes/stream?${query}`)
+      source.addEventListener('changes', (e) => onChanges(JSON.parse((e as MessageEvent).data) as Change[]))
+      source.addEventListener('reset', onReset)
+      source.onerror = () => {
+        source?.close()
+        if (!closed) retry = setTimeout(() => connect(true), 2000)
+      }
+      // Changes made while disconnected were missed
+      if (reconnect) onReset()
+    } catch {
+      if (!closed) retry = setTimeout(() => connect(true), 5000)
+    }
+  }
+
+  connect(false)
+  return () => {
+    closed = true
+    if (retry) clearTimeout(retry)
+    source?.close()
+  }
+}
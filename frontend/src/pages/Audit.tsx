@@ -1,5 +1,5 @@
 import React from 'react';
-import { api } from '../lib/api';
+import { apiPage } from '../lib/api';
 
 type Audit = {
   id: number;
@@ -14,15 +14,24 @@ export const Audit: React.FC = () => {
   const [rows, setRows] = React.useState<Audit[]>([]);
   const [loading, setLoading] = React.useState(true);
   const [error, setError] = React.useState<string | null>(null);
+  const [nextCursor, setNextCursor] = React.useState<string | null>(null);
 
-  React.useEffect(() => {
-    api<Audit[]>('/audit')
-      .then(setRows)
+  const loadPage = React.useCallback((cursor: string | null) => {
+    setLoading(true);
+    apiPage<Audit>('/audit?limit=100', cursor)
+      .then((page) => {
+        setRows((prev) => (cursor ? [...prev, ...page.items] : page.items));
+        setNextCursor(page.nextCursor);
+      })
       .catch((e) => setError(String(e)))
       .finally(() => setLoading(false));
   }, []);
 
-  if (loading) return <div>Loading…</div>;
+  React.useEffect(() => {
+    loadPage(null);
+  }, [loadPage]);
+
+  if (loading && rows.length === 0) return <div>Loading…</div>;
   if (error) return <div style={{ color: 'crimson' }}>{error}</div>;
 
   return (
@@ -60,6 +69,15 @@ export const Audit: React.FC = () => {
           ))}
         </tbody>
       </table>
+      {nextCursor && (
+        <button
+          style={{ marginTop: 12 }}
+          disabled={loading}
+          onClick={() => loadPage(nextCursor)}
+        >
+          {loading ? 'Loading…' : 'Load more'}
+        </button>
+      )}
     </div>
   );
 };
@@ -1,38 +1,64 @@
 import React from 'react';
-import { api } from '../lib/api';
+import { apiPage } from '../lib/api';
 
-type Money = { amount: number; currency: 'USD' | 'GBP' | 'EUR' };
+// Amounts are strings when the backend encodes rows directly
+type Money = { amount: number | string; currency: 'USD' | 'GBP' | 'EUR' };
 
 type Bet = {
   id: number;
   bookie: string;
   customer_id: number;
-  bookie_bet_id: string;
-  bet_type: string;
+  customer_username: string;
   event_id: number;
-  sport: string;
+  team_a_name: string;
+  team_b_name: string;
+  competition_name: string;
+  event_status: 'prematch' | 'live' | 'finished';
   placement_status: 'pending' | 'placed' | 'failed';
   outcome: 'win' | 'lose' | 'void' | null;
   stake: Money;
-  odds: number;
-  placement_data: Record<string, unknown>;
+  odds: number | string;
   created_at: string;
-  updated_at: string;
 };
 
+// Names resolved server-side; placement_data is left out
+const FIELDS = [
+  'bookie',
+  'customer_id',
+  'customer_username',
+  'event_id',
+  'team_a_name',
+  'team_b_name',
+  'competition_name',
+  'event_status',
+  'placement_status',
+  'outcome',
+  'stake',
+  'odds',
+].join(',');
+
 export const Bets: React.FC = () => {
   const [rows, setRows] = React.useState<Bet[]>([]);
   const [loading, setLoading] = React.useState(true);
   const [error, setError] = React.useState<string | null>(null);
+  const [nextCursor, setNextCursor] = React.useState<string | null>(null);
 
-  React.useEffect(() => {
-    api<Bet[]>('/bets')
-      .then(setRows)
+  const loadPage = React.useCallback((cursor: string | null) => {
+    setLoading(true);
+    apiPage<Bet>(`/bets/enriched?limit=100&fields=${FIELDS}`, cursor)
+      .then((page) => {
+        setRows((prev) => (cursor ? [...prev, ...page.items] : page.items));
+        setNextCursor(page.nextCursor);
+      })
       .catch((e) => setError(String(e)))
       .finally(() => setLoading(false));
   }, []);
 
-  if (loading) return <div>Loading…</div>;
+  React.useEffect(() => {
+    loadPage(null);
+  }, [loadPage]);
+
+  if (loading && rows.length === 0) return <div>Loading…</div>;
   if (error) return <div style={{ color: 'crimson' }}>{error}</div>;
 
   return (
@@ -69,18 +95,32 @@ export const Bets: React.FC = () => {
             <tr key={r.id}>
               <td style={{ padding: 6 }}>{r.id}</td>
               <td style={{ padding: 6 }}>{r.bookie}</td>
-              <td style={{ padding: 6 }}>{r.customer_id}</td>
-              <td style={{ padding: 6 }}>{r.event_id}</td>
+              <td style={{ padding: 6 }} title={`#${r.customer_id}`}>
+                {r.customer_username}
+              </td>
+              <td style={{ padding: 6 }} title={`#${r.event_id}, ${r.event_status}`}>
+                {r.team_a_name} v {r.team_b_name}
+                <div style={{ color: '#888', fontSize: 12 }}>{r.competition_name}</div>
+              </td>
               <td style={{ padding: 6 }}>
-                {r.stake.amount.toFixed(2)} {r.stake.currency}
+                {Number(r.stake.amount).toFixed(2)} {r.stake.currency}
               </td>
-              <td style={{ padding: 6 }}>{r.odds}</td>
+              <td style={{ padding: 6 }}>{Number(r.odds)}</td>
               <td style={{ padding: 6 }}>{r.placement_status}</td>
               <td style={{ padding: 6 }}>{r.outcome ?? '-'}</td>
             </tr>
           ))}
         </tbody>
       </table>
+      {nextCursor && (
+        <button
+          style={{ marginTop: 12 }}
+          disabled={loading}
+          onClick={() => loadPage(nextCursor)}
+        >
+          {loading ? 'Loading…' : 'Load more'}
+        </button>
+      )}
     </div>
   );
 };
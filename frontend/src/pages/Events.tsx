@@ -1,5 +1,5 @@
 import React from 'react';
-import { api } from '../lib/api';
+import { api, subscribeChanges } from '../lib/api';
 
 type Event = {
   id: number;
@@ -15,13 +15,27 @@ export const Events: React.FC = () => {
   const [loading, setLoading] = React.useState(true);
   const [error, setError] = React.useState<string | null>(null);
 
-  React.useEffect(() => {
+  const load = React.useCallback(() => {
     api<Event[]>('/events')
       .then(setRows)
       .catch((e) => setError(String(e)))
       .finally(() => setLoading(false));
   }, []);
 
+  React.useEffect(() => {
+    load();
+    // Drop deleted rows in place; reload for inserts and updates
+    return subscribeChanges(
+      { table: ['events'] },
+      (changes) => {
+        const deleted = new Set(changes.filter((c) => c.op === 'D').map((c) => c.id));
+        if (deleted.size) setRows((prev) => prev.filter((r) => !deleted.has(r.id)));
+        if (changes.some((c) => c.op !== 'D')) load();
+      },
+      load
+    );
+  }, [load]);
+
   if (loading) return <div>Loading…</div>;
   if (error) return <div style={{ color: 'crimson' }}>{error}</div>;
 
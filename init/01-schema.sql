@@ -110,21 +110,40 @@ CREATE TABLE bookies (
     preferences JSONB NOT NULL DEFAULT '{}'
 );
 
--- Balance changes table for tracking all customer balance modifications
+-- Balance lanes for customers in ledger balance mode (see enable_balance_ledger
+-- in 02-triggers.sql). The spendable balance is split across several rows so
+-- concurrent bets for one customer lock different lanes instead of queueing
+-- on the customers row; every lane stays non-negative, so the total does too.
+-- customers.balance becomes a periodic snapshot of SUM(amount).
+CREATE TABLE balance_lanes (
+    customer_id BIGINT NOT NULL REFERENCES customers(id) ON DELETE CASCADE,
+    lane SMALLINT NOT NULL,
+    amount DECIMAL(20, 4) NOT NULL CHECK (amount >= 0),
+    PRIMARY KEY (customer_id, lane)
+);
+
+-- Balance changes table for tracking all customer balance modifications.
+-- Partitioned by month on created_at like audit_log: monthly partitions are
+-- created ahead of time by ensure_monthly_partitions() (02-triggers.sql) and
+-- old ones archived with `python -m app.maintenance archive-partitions`. The
+-- default partition only catches rows outside every monthly range.
 CREATE TABLE balance_changes (
-    id BIGSERIAL PRIMARY KEY,
+    id BIGSERIAL,
     customer_id BIGINT NOT NULL REFERENCES customers(id) ON DELETE CASCADE,
     change_type balance_change_type NOT NULL,
     delta money_amount NOT NULL,
     reference_id TEXT, -- Can reference bet_id or other transaction IDs
     description TEXT,
-    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
-);
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE balance_changes_default PARTITION OF balance_changes DEFAULT;
 
 -- Indexes for balance_changes
 CREATE INDEX idx_balance_changes_customer_id ON balance_changes(customer_id);
 CREATE INDEX idx_balance_changes_change_type ON balance_changes(change_type);
-CREATE INDEX idx_balance_changes_created_at ON balance_changes(created_at);
+CREATE INDEX idx_balance_changes_created_at ON balance_changes(created_at, id);
 
 -- Bets table
 CREATE TABLE bets (
@@ -151,37 +170,115 @@ CREATE TABLE bets (
 );
 
 -- Indexes for bets
-CREATE INDEX idx_bets_bookie ON bets(bookie);
-CREATE INDEX idx_bets_customer_id ON bets(customer_id);
-CREATE INDEX idx_bets_event_id ON bets(event_id);
-CREATE INDEX idx_bets_sport ON bets(sport);
-CREATE INDEX idx_bets_placement_status ON bets(placement_status);
-CREATE INDEX idx_bets_outcome ON bets(outcome);
-CREATE INDEX idx_bets_created_at ON bets(created_at);
+-- Filter columns lead and (created_at, id) trails so every filtered page of
+-- GET /api/bets is an index range scan from the keyset cursor position.
+CREATE INDEX idx_bets_bookie ON bets(bookie, created_at, id);
+CREATE INDEX idx_bets_customer_id ON bets(customer_id, created_at, id);
+CREATE INDEX idx_bets_event_id ON bets(event_id, created_at, id);
+CREATE INDEX idx_bets_sport ON bets(sport, created_at, id);
+CREATE INDEX idx_bets_placement_status ON bets(placement_status, created_at, id);
+CREATE INDEX idx_bets_outcome ON bets(outcome, created_at, id);
+CREATE INDEX idx_bets_created_at ON bets(created_at, id);
 CREATE INDEX idx_bets_updated_at ON bets(updated_at);
+-- Bet search: bet_type, containment/jsonpath filters on placement_data
+-- (@>, @@, @? via jsonb_path_ops) and bookie_bet_id prefix (LIKE 'abc%')
+CREATE INDEX idx_bets_bet_type ON bets(bet_type, created_at, id);
+CREATE INDEX idx_bets_placement_data ON bets USING GIN (placement_data jsonb_path_ops);
+CREATE INDEX idx_bets_bookie_bet_id_prefix ON bets(bookie_bet_id text_pattern_ops);
 
--- Audit log table for important changes
+-- Audit log table for important changes, partitioned by month on changed_at
 CREATE TABLE audit_log (
-    id BIGSERIAL PRIMARY KEY,
+    id BIGSERIAL,
     table_name TEXT NOT NULL,
     operation audit_operation NOT NULL,
     username TEXT NOT NULL DEFAULT CURRENT_USER,
     changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     row_id BIGINT,
     old_data JSONB,
-    new_data JSONB
-);
+    new_data JSONB,
+    PRIMARY KEY (id, changed_at)
+) PARTITION BY RANGE (changed_at);
 
-CREATE INDEX idx_audit_log_table_name ON audit_log(table_name);
-CREATE INDEX idx_audit_log_changed_at ON audit_log(changed_at);
+CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT;
+
+-- Audit history is read newest first with keyset pagination on
+-- (changed_at, id), either per record, per table or across all tables
+CREATE INDEX idx_audit_log_record ON audit_log(table_name, row_id, changed_at, id);
+CREATE INDEX idx_audit_log_table_name ON audit_log(table_name, changed_at, id);
+CREATE INDEX idx_audit_log_changed_at ON audit_log(changed_at, id);
 CREATE INDEX idx_audit_log_username ON audit_log(username);
 
 -- ============================================
--- MATERIALIZED VIEWS
+-- CUSTOMER STATISTICS
 -- ============================================
 
--- Customer betting statistics
-CREATE MATERIALIZED VIEW customer_stats AS
+-- Per-customer betting totals are maintained incrementally. Bet writes append
+-- signed deltas to customer_stats_deltas (statement-level triggers, see
+-- 02-triggers.sql) and fold_customer_stats() periodically merges them into
+-- customer_stats_totals, so a bet write never waits on another customer's
+-- stats row or rescans the bets table.
+CREATE TABLE customer_stats_totals (
+    customer_id BIGINT PRIMARY KEY REFERENCES customers(id) ON DELETE CASCADE,
+    total_bets BIGINT NOT NULL DEFAULT 0,
+    won_bets BIGINT NOT NULL DEFAULT 0,
+    lost_bets BIGINT NOT NULL DEFAULT 0,
+    void_bets BIGINT NOT NULL DEFAULT 0,
+    total_staked DECIMAL NOT NULL DEFAULT 0,
+    total_won DECIMAL NOT NULL DEFAULT 0,
+    net_profit DECIMAL NOT NULL DEFAULT 0
+);
+
+-- No foreign key: deltas for deleted customers are discarded when folded
+CREATE TABLE customer_stats_deltas (
+    id BIGSERIAL PRIMARY KEY,
+    customer_id BIGINT NOT NULL,
+    total_bets BIGINT NOT NULL,
+    won_bets BIGINT NOT NULL,
+    lost_bets BIGINT NOT NULL,
+    void_bets BIGINT NOT NULL,
+    total_staked DECIMAL NOT NULL,
+    total_won DECIMAL NOT NULL,
+    net_profit DECIMAL NOT NULL
+);
+
+CREATE INDEX idx_customer_stats_deltas_customer_id ON customer_stats_deltas(customer_id);
+
+-- Customer betting statistics: folded totals plus any deltas not yet folded
+CREATE VIEW customer_stats AS
+SELECT
+    c.id as customer_id,
+    c.username,
+    c.currency,
+    COALESCE(t.total_bets, 0) + COALESCE(d.total_bets, 0) as total_bets,
+    COALESCE(t.won_bets, 0) + COALESCE(d.won_bets, 0) as won_bets,
+    COALESCE(t.lost_bets, 0) + COALESCE(d.lost_bets, 0) as lost_bets,
+    COALESCE(t.void_bets, 0) + COALESCE(d.void_bets, 0) as void_bets,
+    COALESCE(t.total_staked, 0) + COALESCE(d.total_staked, 0) as total_staked,
+    COALESCE(t.total_won, 0) + COALESCE(d.total_won, 0) as total_won,
+    COALESCE(t.net_profit, 0) + COALESCE(d.net_profit, 0) as net_profit,
+    COALESCE(l.amount, (c.balance).amount) as current_balance
+FROM customers c
+LEFT JOIN (
+    SELECT customer_id, SUM(amount) as amount FROM balance_lanes GROUP BY customer_id
+) l ON l.customer_id = c.id
+LEFT JOIN customer_stats_totals t ON t.customer_id = c.id
+LEFT JOIN (
+    SELECT
+        customer_id,
+        SUM(total_bets)::bigint as total_bets,
+        SUM(won_bets)::bigint as won_bets,
+        SUM(lost_bets)::bigint as lost_bets,
+        SUM(void_bets)::bigint as void_bets,
+        SUM(total_staked) as total_staked,
+        SUM(total_won) as total_won,
+        SUM(net_profit) as net_profit
+    FROM customer_stats_deltas
+    GROUP BY customer_id
+) d ON d.customer_id = c.id;
+
+-- Full recompute from bets, used by the reconciliation job to verify and
+-- rebuild customer_stats_totals. Scans every bet: never query it on a hot path.
+CREATE VIEW customer_stats_recomputed AS
 SELECT 
     c.id as customer_id,
     c.username,
@@ -194,12 +291,184 @@ SELECT
     COALESCE(SUM((b.stake).amount * b.odds) FILTER (WHERE b.outcome = 'win'), 0) as total_won,
     COALESCE(SUM((b.stake).amount * b.odds) FILTER (WHERE b.outcome = 'win'), 0) - 
         COALESCE(SUM((b.stake).amount) FILTER (WHERE b.outcome IN ('win', 'lose')), 0) as net_profit,
-    (c.balance).amount as current_balance
+    COALESCE(
+        (SELECT SUM(l.amount) FROM balance_lanes l WHERE l.customer_id = c.id),
+        (c.balance).amount
+    ) as current_balance
 FROM customers c
 LEFT JOIN bets b ON c.id = b.customer_id
 GROUP BY c.id, c.username, c.currency, c.balance;
 
-CREATE UNIQUE INDEX idx_customer_stats_customer_id ON customer_stats(customer_id);
+-- ============================================
+-- EVENT POSITIONS
+-- ============================================
+
+-- Per-event exposure by (bet_type, bookie, currency), maintained the same way
+-- as customer_stats: bet writes append signed deltas and
+-- fold_event_positions() merges them into event_positions_totals. Only placed
+-- bets count; a bet is open until it gets an outcome.
+CREATE TABLE event_positions_totals (
+    event_id BIGINT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+    bet_type TEXT NOT NULL,
+    bookie TEXT NOT NULL,
+    currency currency_code NOT NULL,
+    open_bets BIGINT NOT NULL DEFAULT 0,
+    open_stake DECIMAL NOT NULL DEFAULT 0,
+    potential_payout DECIMAL NOT NULL DEFAULT 0,
+    settled_bets BIGINT NOT NULL DEFAULT 0,
+    settled_stake DECIMAL NOT NULL DEFAULT 0,
+    settled_payout DECIMAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (event_id, bet_type, bookie, currency)
+);
+
+-- No foreign key: deltas for deleted events are discarded when folded
+CREATE TABLE event_positions_deltas (
+    id BIGSERIAL PRIMARY KEY,
+    event_id BIGINT NOT NULL,
+    bet_type TEXT NOT NULL,
+    bookie TEXT NOT NULL,
+    currency currency_code NOT NULL,
+    open_bets BIGINT NOT NULL,
+    open_stake DECIMAL NOT NULL,
+    potential_payout DECIMAL NOT NULL,
+    settled_bets BIGINT NOT NULL,
+    settled_stake DECIMAL NOT NULL,
+    settled_payout DECIMAL NOT NULL
+);
+
+CREATE INDEX idx_event_positions_deltas_event_id ON event_positions_deltas(event_id);
+
+-- Event positions: folded totals plus any deltas not yet folded. liability is
+-- what open bets would pay out beyond their stakes if they all won.
+CREATE VIEW event_positions AS
+SELECT
+    event_id,
+    bet_type,
+    bookie,
+    currency,
+    open_bets,
+    open_stake,
+    potential_payout,
+    potential_payout - open_stake as liability,
+    settled_bets,
+    settled_stake,
+    settled_payout
+FROM (
+    SELECT
+        event_id, bet_type, bookie, currency,
+        SUM(open_bets)::bigint as open_bets,
+        SUM(open_stake) as open_stake,
+        SUM(potential_payout) as potential_payout,
+        SUM(settled_bets)::bigint as settled_bets,
+        SUM(settled_stake) as settled_stake,
+        SUM(settled_payout) as settled_payout
+    FROM (
+        SELECT event_id, bet_type, bookie, currency, open_bets, open_stake, potential_payout,
+               settled_bets, settled_stake, settled_payout
+        FROM event_positions_totals
+        UNION ALL
+        SELECT event_id, bet_type, bookie, currency, open_bets, open_stake, potential_payout,
+               settled_bets, settled_stake, settled_payout
+        FROM event_positions_deltas
+    ) parts
+    GROUP BY event_id, bet_type, bookie, currency
+) p
+WHERE open_bets <> 0 OR settled_bets <> 0;
+
+-- Full recompute from bets, for reconciliation. Scans every placed bet.
+CREATE VIEW event_positions_recomputed AS
+SELECT
+    event_id,
+    bet_type,
+    bookie,
+    (stake).currency as currency,
+    COUNT(*) FILTER (WHERE outcome IS NULL) as open_bets,
+    COALESCE(SUM((stake).amount) FILTER (WHERE outcome IS NULL), 0) as open_stake,
+    COALESCE(SUM((stake).amount * odds) FILTER (WHERE outcome IS NULL), 0) as potential_payout,
+    COALESCE(SUM((stake).amount * odds - (stake).amount) FILTER (WHERE outcome IS NULL), 0) as liability,
+    COUNT(*) FILTER (WHERE outcome IS NOT NULL) as settled_bets,
+    COALESCE(SUM((stake).amount) FILTER (WHERE outcome IS NOT NULL), 0) as settled_stake,
+    COALESCE(SUM(CASE outcome
+        WHEN 'win' THEN (stake).amount * odds
+        WHEN 'void' THEN (stake).amount
+        ELSE 0 END) FILTER (WHERE outcome IS NOT NULL), 0) as settled_payout
+FROM bets
+WHERE placement_status = 'placed'
+GROUP BY event_id, bet_type, bookie, (stake).currency;
+
+-- ============================================
+-- P&L ROLLUPS
+-- ============================================
+
+-- Hourly turnover and gross gaming revenue per (event, sport, bookie,
+-- currency), maintained like event_positions: bet writes append signed
+-- deltas and fold_pnl_hourly() merges them into pnl_hourly_totals. Buckets
+-- are the UTC hour a bet was placed in, so settling a bet updates the bucket
+-- it was placed in. Competition is resolved through events when queried
+-- (bets are deleted with their event, and an event may change competition).
+-- Only placed bets count; ggr = settled_stake - payout.
+CREATE TABLE pnl_hourly_totals (
+    bucket TIMESTAMPTZ NOT NULL,
+    event_id BIGINT NOT NULL,
+    sport TEXT NOT NULL,
+    bookie TEXT NOT NULL,
+    currency currency_code NOT NULL,
+    bets BIGINT NOT NULL DEFAULT 0,
+    turnover DECIMAL NOT NULL DEFAULT 0,
+    settled_bets BIGINT NOT NULL DEFAULT 0,
+    settled_stake DECIMAL NOT NULL DEFAULT 0,
+    payout DECIMAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, event_id, sport, bookie, currency)
+);
+
+CREATE TABLE pnl_hourly_deltas (
+    id BIGSERIAL PRIMARY KEY,
+    bucket TIMESTAMPTZ NOT NULL,
+    event_id BIGINT NOT NULL,
+    sport TEXT NOT NULL,
+    bookie TEXT NOT NULL,
+    currency currency_code NOT NULL,
+    bets BIGINT NOT NULL,
+    turnover DECIMAL NOT NULL,
+    settled_bets BIGINT NOT NULL,
+    settled_stake DECIMAL NOT NULL,
+    payout DECIMAL NOT NULL
+);
+
+CREATE INDEX idx_pnl_hourly_deltas_bucket ON pnl_hourly_deltas(bucket);
+
+-- Hourly P&L: folded totals plus any deltas not yet folded
+CREATE VIEW pnl_hourly AS
+SELECT *
+FROM (
+    SELECT
+        bucket, event_id, sport, bookie, currency,
+        SUM(bets)::bigint as bets,
+        SUM(turnover) as turnover,
+        SUM(settled_bets)::bigint as settled_bets,
+        SUM(settled_stake) as settled_stake,
+        SUM(payout) as payout
+    FROM (
+        SELECT bucket, event_id, sport, bookie, currency, bets, turnover, settled_bets, settled_stake, payout
+        FROM pnl_hourly_totals
+        UNION ALL
+        SELECT bucket, event_id, sport, bookie, currency, bets, turnover, settled_bets, settled_stake, payout
+        FROM pnl_hourly_deltas
+    ) parts
+    GROUP BY bucket, event_id, sport, bookie, currency
+) p
+WHERE bets <> 0;
 
 COMMENT ON TABLE audit_log IS 'Audit trail for changes to critical tables';
-COMMENT ON MATERIALIZED VIEW customer_stats IS 'Aggregated betting statistics per customer for reporting';
\ No newline at end of file
+COMMENT ON TABLE balance_lanes IS 'Spendable balance split into lock lanes for ledger balance mode customers';
+COMMENT ON TABLE customer_stats_totals IS 'Folded per-customer betting totals; see customer_stats';
+COMMENT ON TABLE customer_stats_deltas IS 'Unfolded signed per-customer deltas appended by bet writes';
+COMMENT ON VIEW customer_stats IS 'Aggregated betting statistics per customer for reporting';
+COMMENT ON VIEW customer_stats_recomputed IS 'Full recompute of customer_stats from bets, for reconciliation';
+COMMENT ON TABLE event_positions_totals IS 'Folded per-event position totals; see event_positions';
+COMMENT ON TABLE event_positions_deltas IS 'Unfolded signed per-event position deltas appended by bet writes';
+COMMENT ON VIEW event_positions IS 'Open exposure and settled totals per event, bet type, bookie and currency';
+COMMENT ON VIEW event_positions_recomputed IS 'Full recompute of event_positions from bets, for reconciliation';
+COMMENT ON TABLE pnl_hourly_totals IS 'Folded hourly turnover and GGR totals; see pnl_hourly';
+COMMENT ON TABLE pnl_hourly_deltas IS 'Unfolded signed hourly P&L deltas appended by bet writes';
+COMMENT ON VIEW pnl_hourly IS 'Turnover, settled stake and payout per placement hour, event, sport, bookie and currency';
@@ -1,6 +1,64 @@
 -- All triggers and trigger functions for the betting platform database
 -- This file should be loaded after schema (01) and before sample data (03)
 
+-- Set-based write paths (bulk bet ingestion, event settlement) run
+-- SET LOCAL app.bulk_write = 'on' and perform validation, balance changes
+-- and audit rows for the whole batch themselves; the per-row bet and
+-- balance_changes triggers below are skipped while it is set.
+CREATE OR REPLACE FUNCTION bulk_write_active()
+RETURNS BOOLEAN AS $$
+    SELECT COALESCE(current_setting('app.bulk_write', true), '') = 'on';
+$$ LANGUAGE sql STABLE;
+
+-- Create the monthly partitions of a range-partitioned table (audit_log,
+-- balance_changes) from the current UTC month to p_months_ahead months out.
+-- Each partition is built standalone and then attached, which does not block
+-- writes to the parent the way CREATE TABLE ... PARTITION OF would; rows that
+-- already landed in the default partition for that month are moved across.
+-- Returns the number of partitions created.
+CREATE OR REPLACE FUNCTION ensure_monthly_partitions(p_table TEXT, p_months_ahead INTEGER DEFAULT 3)
+RETURNS INTEGER AS $$
+DECLARE
+    key_column TEXT;
+    month_start TIMESTAMP;
+    range_start TIMESTAMPTZ;
+    range_end TIMESTAMPTZ;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    SELECT a.attname INTO key_column
+    FROM pg_partitioned_table p
+    JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0]
+    WHERE p.partrelid = p_table::regclass;
+
+    IF key_column IS NULL THEN
+        RAISE EXCEPTION 'Table % is not partitioned', p_table;
+    END IF;
+
+    FOR i IN 0..p_months_ahead LOOP
+        month_start := date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => i);
+        partition_name := format('%s_y%sm%s', p_table, to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+
+        range_start := month_start AT TIME ZONE 'UTC';
+        range_end := (month_start + INTERVAL '1 month') AT TIME ZONE 'UTC';
+
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', partition_name, p_table);
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM %I WHERE %I >= $1 AND %I < $2 RETURNING *) INSERT INTO %I SELECT * FROM moved',
+            p_table || '_default', key_column, key_column, partition_name
+        ) USING range_start, range_end;
+        EXECUTE format(
+            'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            p_table, partition_name, range_start, range_end
+        );
+        created := created + 1;
+    END LOOP;
+
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Function to update updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -25,26 +83,160 @@ CREATE TRIGGER update_customers_updated_at BEFORE UPDATE ON customers
 CREATE TRIGGER update_bets_updated_at BEFORE UPDATE ON bets
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
--- Function to update customer balance when balance_change is inserted
-CREATE OR REPLACE FUNCTION update_customer_balance()
-RETURNS TRIGGER AS $$
+-- Skip UPDATEs that change nothing: the row is not rewritten, and updated_at,
+-- the audit row, the validation checks and the statement-level delta
+-- triggers never see it. BEFORE triggers fire in name order, so these are
+-- named to run ahead of update_*_updated_at, which would otherwise make
+-- every row look changed
+CREATE TRIGGER skip_noop_update_teams BEFORE UPDATE ON teams
+    FOR EACH ROW EXECUTE FUNCTION suppress_redundant_updates_trigger();
+
+CREATE TRIGGER skip_noop_update_events BEFORE UPDATE ON events
+    FOR EACH ROW EXECUTE FUNCTION suppress_redundant_updates_trigger();
+
+CREATE TRIGGER skip_noop_update_results BEFORE UPDATE ON results
+    FOR EACH ROW EXECUTE FUNCTION suppress_redundant_updates_trigger();
+
+CREATE TRIGGER skip_noop_update_customers BEFORE UPDATE ON customers
+    FOR EACH ROW EXECUTE FUNCTION suppress_redundant_updates_trigger();
+
+CREATE TRIGGER skip_noop_update_bets BEFORE UPDATE ON bets
+    FOR EACH ROW EXECUTE FUNCTION suppress_redundant_updates_trigger();
+
+-- Ledger balance mode: move a delta through the customer's balance lanes.
+-- The fast path locks a single lane that can absorb the whole delta and
+-- skips lanes held by concurrent transactions, so bets for one customer only
+-- wait on each other once every lane is busy. Returns false when the
+-- customer has no lanes (direct balance mode).
+--
+-- A transaction holding a lane it took out of order on the fast path never
+-- waits for the others: a second delta for the same customer in that
+-- transaction (a batch, a multi-row statement) that needs the slow path
+-- takes the remaining lanes only if they are free, and otherwise fails with
+-- lock_not_available for the client to retry the transaction. Waiting there
+-- could deadlock with a transaction locking the lanes in lane order. The
+-- customers holding such a lane are listed in app.ledger_lanes_held.
+CREATE OR REPLACE FUNCTION apply_ledger_delta(p_customer_id BIGINT, p_delta DECIMAL)
+RETURNS BOOLEAN AS $$
+DECLARE
+    lane_no SMALLINT;
+    lane_row RECORD;
+    available DECIMAL(20, 4);
+    remaining DECIMAL(20, 4);
+    taken DECIMAL(20, 4);
+    held TEXT := COALESCE(NULLIF(current_setting('app.ledger_lanes_held', true), ''), ',');
+    locked_lanes INTEGER;
+BEGIN
+    -- Debits take from the fullest free lane, credits top up the emptiest
+    SELECT lane INTO lane_no
+    FROM balance_lanes
+    WHERE customer_id = p_customer_id AND amount + p_delta >= 0
+    ORDER BY CASE WHEN p_delta < 0 THEN -amount ELSE amount END
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED;
+
+    IF FOUND THEN
+        UPDATE balance_lanes SET amount = amount + p_delta
+        WHERE customer_id = p_customer_id AND lane = lane_no;
+        IF position(',' || p_customer_id || ',' IN held) = 0 THEN
+            PERFORM set_config('app.ledger_lanes_held', held || p_customer_id || ',', true);
+        END IF;
+        RETURN TRUE;
+    END IF;
+
+    IF position(',' || p_customer_id || ',' IN held) > 0 THEN
+        -- Already holding a lane: take the rest only if nobody else has them
+        SELECT SUM(amount), COUNT(*) INTO available, locked_lanes
+        FROM (
+            SELECT amount FROM balance_lanes
+            WHERE customer_id = p_customer_id
+            ORDER BY lane
+            FOR UPDATE SKIP LOCKED
+        ) locked;
+
+        IF locked_lanes < (SELECT COUNT(*) FROM balance_lanes WHERE customer_id = p_customer_id) THEN
+            RAISE EXCEPTION 'Balance lanes of customer % are held by concurrent transactions, retry', p_customer_id
+                USING ERRCODE = 'lock_not_available';
+        END IF;
+    ELSE
+        -- Slow path: no single free lane fits, so wait for all of them
+        -- (always in lane order) and spread the delta
+        SELECT SUM(amount) INTO available
+        FROM (
+            SELECT amount FROM balance_lanes
+            WHERE customer_id = p_customer_id
+            ORDER BY lane
+            FOR UPDATE
+        ) locked;
+    END IF;
+
+    IF available IS NULL THEN
+        RETURN FALSE;
+    END IF;
+
+    IF available + p_delta < 0 THEN
+        RAISE EXCEPTION 'Insufficient balance: operation would result in negative balance %', available + p_delta;
+    END IF;
+
+    IF p_delta >= 0 THEN
+        UPDATE balance_lanes SET amount = amount + p_delta
+        WHERE customer_id = p_customer_id
+          AND lane = (SELECT MIN(lane) FROM balance_lanes WHERE customer_id = p_customer_id);
+        RETURN TRUE;
+    END IF;
+
+    remaining := -p_delta;
+    FOR lane_row IN
+        SELECT lane, amount FROM balance_lanes
+        WHERE customer_id = p_customer_id AND amount > 0
+        ORDER BY amount DESC
+    LOOP
+        EXIT WHEN remaining <= 0;
+        taken := LEAST(lane_row.amount, remaining);
+        UPDATE balance_lanes SET amount = amount - taken
+        WHERE customer_id = p_customer_id AND lane = lane_row.lane;
+        remaining := remaining - taken;
+    END LOOP;
+
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Apply a balance delta to a customer, in whichever balance mode it is in.
+-- Raises if the balance would go negative.
+CREATE OR REPLACE FUNCTION apply_balance_delta(p_customer_id BIGINT, p_delta DECIMAL)
+RETURNS VOID AS $$
 DECLARE
     current_balance_amount DECIMAL(20, 4);
     current_currency currency_code;
     new_balance_amount DECIMAL(20, 4);
 BEGIN
-    -- Get current balance
+    IF EXISTS (SELECT 1 FROM balance_lanes WHERE customer_id = p_customer_id) THEN
+        IF apply_ledger_delta(p_customer_id, p_delta) THEN
+            RETURN;
+        END IF;
+    END IF;
+
+    -- Get current balance, locked so concurrent changes cannot overwrite it
     SELECT (balance).amount, (balance).currency 
     INTO current_balance_amount, current_currency
     FROM customers
-    WHERE id = NEW.customer_id;
+    WHERE id = p_customer_id
+    FOR NO KEY UPDATE;
     
     IF NOT FOUND THEN
-        RAISE EXCEPTION 'Customer with id % not found', NEW.customer_id;
+        RAISE EXCEPTION 'Customer with id % not found', p_customer_id;
+    END IF;
+
+    -- Ledger mode may have been enabled while we waited for the row lock
+    IF EXISTS (SELECT 1 FROM balance_lanes WHERE customer_id = p_customer_id) THEN
+        IF apply_ledger_delta(p_customer_id, p_delta) THEN
+            RETURN;
+        END IF;
     END IF;
     
     -- Calculate new balance
-    new_balance_amount := current_balance_amount + (NEW.delta).amount;
+    new_balance_amount := current_balance_amount + p_delta;
     
     -- Check if the balance would go negative
     IF new_balance_amount < 0 THEN
@@ -55,15 +247,123 @@ BEGIN
     UPDATE customers 
     SET balance = ROW(new_balance_amount, current_currency)::money_amount,
         updated_at = CURRENT_TIMESTAMP
-    WHERE id = NEW.customer_id;
-    
+    WHERE id = p_customer_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Lock a customer's balance (its lanes in ledger mode, else its customers
+-- row) and return the spendable amount. Used by the set-based write paths
+-- to check a whole batch before applying it.
+CREATE OR REPLACE FUNCTION lock_customer_balance(p_customer_id BIGINT)
+RETURNS DECIMAL AS $$
+DECLARE
+    available DECIMAL(20, 4);
+BEGIN
+    SELECT SUM(amount) INTO available
+    FROM (
+        SELECT amount FROM balance_lanes
+        WHERE customer_id = p_customer_id
+        ORDER BY lane
+        FOR UPDATE
+    ) locked;
+
+    IF available IS NULL THEN
+        SELECT (balance).amount INTO available
+        FROM customers
+        WHERE id = p_customer_id
+        FOR NO KEY UPDATE;
+    END IF;
+
+    RETURN available;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Switch a customer to ledger balance mode, spreading the current balance
+-- over p_lanes lanes
+CREATE OR REPLACE FUNCTION enable_balance_ledger(p_customer_id BIGINT, p_lanes INTEGER DEFAULT 8)
+RETURNS VOID AS $$
+DECLARE
+    total DECIMAL(20, 4);
+    share DECIMAL(20, 4);
+BEGIN
+    IF p_lanes < 1 THEN
+        RAISE EXCEPTION 'A balance ledger needs at least one lane';
+    END IF;
+
+    SELECT (balance).amount INTO total FROM customers WHERE id = p_customer_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Customer with id % not found', p_customer_id;
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM balance_lanes WHERE customer_id = p_customer_id) THEN
+        RETURN;
+    END IF;
+
+    share := trunc(total / p_lanes, 4);
+    INSERT INTO balance_lanes (customer_id, lane, amount)
+    SELECT p_customer_id, g, CASE WHEN g = 0 THEN total - share * (p_lanes - 1) ELSE share END
+    FROM generate_series(0, p_lanes - 1) g;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Write the ledger balance back to customers.balance (only when it changed,
+-- to keep audit noise down) and even the lanes out again
+CREATE OR REPLACE FUNCTION snapshot_balance_ledger(p_customer_id BIGINT)
+RETURNS VOID AS $$
+DECLARE
+    total DECIMAL(20, 4);
+    lanes INTEGER;
+    share DECIMAL(20, 4);
+BEGIN
+    PERFORM 1 FROM customers WHERE id = p_customer_id FOR NO KEY UPDATE;
+
+    SELECT SUM(amount), COUNT(*) INTO total, lanes
+    FROM (
+        SELECT amount FROM balance_lanes
+        WHERE customer_id = p_customer_id
+        ORDER BY lane
+        FOR UPDATE
+    ) locked;
+
+    IF lanes = 0 THEN
+        RETURN;
+    END IF;
+
+    UPDATE customers
+    SET balance = ROW(total, (balance).currency)::money_amount
+    WHERE id = p_customer_id AND (balance).amount IS DISTINCT FROM total;
+
+    share := trunc(total / lanes, 4);
+    UPDATE balance_lanes
+    SET amount = CASE WHEN lane = (SELECT MIN(lane) FROM balance_lanes WHERE customer_id = p_customer_id)
+                      THEN total - share * (lanes - 1) ELSE share END
+    WHERE customer_id = p_customer_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Switch a customer back to direct balance mode
+CREATE OR REPLACE FUNCTION disable_balance_ledger(p_customer_id BIGINT)
+RETURNS VOID AS $$
+BEGIN
+    PERFORM snapshot_balance_ledger(p_customer_id);
+    DELETE FROM balance_lanes WHERE customer_id = p_customer_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to update customer balance when balance_change is inserted
+CREATE OR REPLACE FUNCTION update_customer_balance()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM apply_balance_delta(NEW.customer_id, (NEW.delta).amount);
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER update_customer_balance_on_change
 AFTER INSERT ON balance_changes
-FOR EACH ROW EXECUTE FUNCTION update_customer_balance();
+FOR EACH ROW
+WHEN (NOT bulk_write_active())
+EXECUTE FUNCTION update_customer_balance();
 
 -- Function to validate balance_change currency matches customer currency
 CREATE OR REPLACE FUNCTION validate_balance_change_currency()
@@ -92,7 +392,9 @@ $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER validate_balance_change_currency_trigger
 BEFORE INSERT ON balance_changes
-FOR EACH ROW EXECUTE FUNCTION validate_balance_change_currency();
+FOR EACH ROW
+WHEN (NOT bulk_write_active())
+EXECUTE FUNCTION validate_balance_change_currency();
 
 -- Ensure bets can only be placed on prematch or live events
 CREATE OR REPLACE FUNCTION validate_bet_placement()
@@ -118,7 +420,9 @@ $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER validate_bet_placement_trigger
 BEFORE INSERT OR UPDATE ON bets
-FOR EACH ROW EXECUTE FUNCTION validate_bet_placement();
+FOR EACH ROW
+WHEN (NOT bulk_write_active())
+EXECUTE FUNCTION validate_bet_placement();
 
 -- Ensure bet sports match event's competition sport
 CREATE OR REPLACE FUNCTION validate_bet_sport()
@@ -141,7 +445,9 @@ $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER validate_bet_sport_trigger
 BEFORE INSERT OR UPDATE ON bets
-FOR EACH ROW EXECUTE FUNCTION validate_bet_sport();
+FOR EACH ROW
+WHEN (NOT bulk_write_active())
+EXECUTE FUNCTION validate_bet_sport();
 
 -- Validate team consistency in events
 CREATE OR REPLACE FUNCTION validate_event_teams()
@@ -197,7 +503,91 @@ $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER validate_bet_currency_trigger
 BEFORE INSERT OR UPDATE ON bets
-FOR EACH ROW EXECUTE FUNCTION validate_bet_currency();
+FOR EACH ROW
+WHEN (NOT bulk_write_active())
+EXECUTE FUNCTION validate_bet_currency();
+
+-- The three bet checks above (currency, placement, sport) in one function
+-- with a single joined lookup instead of three. Errors and their order are
+-- the same: the separate triggers fire alphabetically, so currency is checked
+-- first, then placement, then sport, and a missing customer or event fails
+-- none of them (the foreign keys report it). Only one of the two variants is
+-- enabled at a time; see set_bet_validation below.
+CREATE OR REPLACE FUNCTION validate_bet()
+RETURNS TRIGGER AS $$
+DECLARE
+    customer_currency currency_code;
+    event_status_val event_status;
+    event_sport TEXT;
+BEGIN
+    SELECT cu.currency, e.status, c.sport
+    INTO customer_currency, event_status_val, event_sport
+    FROM (SELECT 1) AS one
+    LEFT JOIN customers cu ON cu.id = NEW.customer_id
+    LEFT JOIN events e ON e.id = NEW.event_id
+    LEFT JOIN competitions c ON c.id = e.competition_id;
+
+    IF (NEW.stake).currency != customer_currency THEN
+        RAISE EXCEPTION 'Bet stake currency % does not match customer currency %',
+            (NEW.stake).currency, customer_currency;
+    END IF;
+
+    IF NEW.outcome IS NULL AND NEW.placement_status = 'placed' AND event_status_val = 'finished' THEN
+        RAISE EXCEPTION 'Cannot place bet on finished event %', NEW.event_id;
+    END IF;
+
+    IF event_sport != NEW.sport THEN
+        RAISE EXCEPTION 'Bet sport % does not match event sport %', NEW.sport, event_sport;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER validate_bet_trigger
+BEFORE INSERT OR UPDATE ON bets
+FOR EACH ROW
+WHEN (NOT bulk_write_active())
+EXECUTE FUNCTION validate_bet();
+
+-- Switch bet validation between the consolidated validate_bet_trigger and
+-- the three separate triggers ('consolidated' or 'separate'). Takes a SHARE
+-- ROW EXCLUSIVE lock on bets, so it waits for in-flight bet writes.
+CREATE OR REPLACE FUNCTION set_bet_validation(p_mode TEXT)
+RETURNS VOID AS $$
+DECLARE
+    separate_triggers TEXT[] := ARRAY[
+        'validate_bet_currency_trigger', 'validate_bet_placement_trigger', 'validate_bet_sport_trigger'
+    ];
+    name TEXT;
+BEGIN
+    IF p_mode NOT IN ('consolidated', 'separate') THEN
+        RAISE EXCEPTION 'Unknown bet validation mode %, expected consolidated or separate', p_mode;
+    END IF;
+    EXECUTE format('ALTER TABLE bets %s TRIGGER validate_bet_trigger',
+        CASE p_mode WHEN 'consolidated' THEN 'ENABLE' ELSE 'DISABLE' END);
+    FOREACH name IN ARRAY separate_triggers LOOP
+        EXECUTE format('ALTER TABLE bets %s TRIGGER %I',
+            CASE p_mode WHEN 'separate' THEN 'ENABLE' ELSE 'DISABLE' END, name);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 'consolidated', 'separate', or 'mixed' after manual ALTER TABLE changes
+CREATE OR REPLACE FUNCTION bet_validation_mode()
+RETURNS TEXT AS $$
+    SELECT CASE
+        WHEN bool_and((tgname = 'validate_bet_trigger') = (tgenabled <> 'D')) THEN 'consolidated'
+        WHEN bool_and((tgname <> 'validate_bet_trigger') = (tgenabled <> 'D')) THEN 'separate'
+        ELSE 'mixed'
+    END
+    FROM pg_trigger
+    WHERE tgrelid = 'bets'::regclass
+      AND tgname IN ('validate_bet_trigger', 'validate_bet_currency_trigger',
+                     'validate_bet_placement_trigger', 'validate_bet_sport_trigger');
+$$ LANGUAGE sql STABLE;
+
+SELECT set_bet_validation('consolidated');
 
 -- Audit trigger function
 CREATE OR REPLACE FUNCTION audit_trigger_function()
@@ -251,11 +641,73 @@ CREATE TRIGGER audit_customers_trigger
 
 CREATE TRIGGER audit_balance_changes_trigger
     AFTER INSERT OR UPDATE OR DELETE ON balance_changes
-    FOR EACH ROW EXECUTE FUNCTION audit_trigger_function();
+    FOR EACH ROW
+    WHEN (NOT bulk_write_active())
+    EXECUTE FUNCTION audit_trigger_function();
 
 CREATE TRIGGER audit_bets_trigger
     AFTER INSERT OR UPDATE OR DELETE ON bets
-    FOR EACH ROW EXECUTE FUNCTION audit_trigger_function();
+    FOR EACH ROW
+    WHEN (NOT bulk_write_active())
+    EXECUTE FUNCTION audit_trigger_function();
+
+-- Change feed: publish every audited change on the change_feed channel as a
+-- compact [table, op, row_id, event_id, customer_id] entry, delivered at
+-- commit. Fired per statement on audit_log so bulk writes, which insert their
+-- audit rows directly, are covered too; entries are sent in chunks of 64 to
+-- stay well below the 8000 byte NOTIFY payload limit.
+CREATE OR REPLACE FUNCTION notify_changes()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('change_feed', chunk::text)
+    FROM (
+        SELECT json_agg(
+                   json_build_array(table_name, left(operation::text, 1), row_id, event_id, customer_id)
+                   ORDER BY id
+               ) AS chunk
+        FROM (
+            SELECT id, table_name, operation, row_id,
+                   CASE WHEN table_name IN ('events', 'results') THEN row_id
+                        ELSE (COALESCE(new_data, old_data) ->> 'event_id')::bigint
+                   END AS event_id,
+                   CASE WHEN table_name = 'customers' THEN row_id
+                        ELSE (COALESCE(new_data, old_data) ->> 'customer_id')::bigint
+                   END AS customer_id,
+                   (row_number() OVER (ORDER BY id) - 1) / 64 AS chunk_no
+            FROM new_audit_rows
+        ) r
+        GROUP BY chunk_no
+        ORDER BY chunk_no
+    ) c;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER audit_log_notify_changes
+    AFTER INSERT ON audit_log
+    REFERENCING NEW TABLE AS new_audit_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_changes();
+
+-- The change feed is off unless switched on with set_change_feed(true):
+-- every transaction that sends a NOTIFY takes one database-wide lock at
+-- commit, whether or not anyone LISTENs, which serializes the commits of all
+-- audited writes. Takes a SHARE ROW EXCLUSIVE lock on audit_log.
+CREATE OR REPLACE FUNCTION set_change_feed(p_enabled BOOLEAN)
+RETURNS VOID AS $$
+BEGIN
+    EXECUTE format('ALTER TABLE audit_log %s TRIGGER audit_log_notify_changes',
+        CASE WHEN p_enabled THEN 'ENABLE' ELSE 'DISABLE' END);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION change_feed_enabled()
+RETURNS BOOLEAN AS $$
+    SELECT tgenabled <> 'D'
+    FROM pg_trigger
+    WHERE tgrelid = 'audit_log'::regclass AND tgname = 'audit_log_notify_changes';
+$$ LANGUAGE sql STABLE;
+
+SELECT set_change_feed(false);
 
 -- Add constraint to ensure events are in the future when created as prematch
 CREATE OR REPLACE FUNCTION validate_prematch_event_date()
@@ -275,19 +727,420 @@ CREATE TRIGGER validate_prematch_event_date_trigger
 BEFORE INSERT OR UPDATE ON events
 FOR EACH ROW EXECUTE FUNCTION validate_prematch_event_date();
 
--- Function to refresh the materialized view
-CREATE OR REPLACE FUNCTION refresh_customer_stats()
+-- Append signed customer_stats deltas for the bets changed by a statement.
+-- Runs once per statement over the transition tables, so a multi-row write
+-- costs one grouped INSERT; rows whose deltas cancel out (e.g. an UPDATE
+-- that only touches placement_data) are not written at all.
+CREATE OR REPLACE FUNCTION record_customer_stats_deltas()
 RETURNS TRIGGER AS $$
+DECLARE
+    changed_rows TEXT;
 BEGIN
-    REFRESH MATERIALIZED VIEW CONCURRENTLY customer_stats;
+    changed_rows := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT 1 AS sign, * FROM new_bets'
+        WHEN 'DELETE' THEN 'SELECT -1 AS sign, * FROM old_bets'
+        ELSE 'SELECT -1 AS sign, * FROM old_bets UNION ALL SELECT 1 AS sign, * FROM new_bets'
+    END;
+
+    EXECUTE format($sql$
+        INSERT INTO customer_stats_deltas (
+            customer_id, total_bets, won_bets, lost_bets, void_bets,
+            total_staked, total_won, net_profit
+        )
+        SELECT * FROM (
+            SELECT
+                customer_id,
+                SUM(sign) AS total_bets,
+                SUM(CASE WHEN outcome = 'win' THEN sign ELSE 0 END) AS won_bets,
+                SUM(CASE WHEN outcome = 'lose' THEN sign ELSE 0 END) AS lost_bets,
+                SUM(CASE WHEN outcome = 'void' THEN sign ELSE 0 END) AS void_bets,
+                SUM(sign * CASE WHEN placement_status = 'placed' THEN (stake).amount ELSE 0 END) AS total_staked,
+                SUM(sign * CASE WHEN outcome = 'win' THEN (stake).amount * odds ELSE 0 END) AS total_won,
+                SUM(sign * CASE outcome
+                    WHEN 'win' THEN (stake).amount * odds - (stake).amount
+                    WHEN 'lose' THEN -(stake).amount
+                    ELSE 0 END) AS net_profit
+            FROM (%s) AS changed
+            GROUP BY customer_id
+        ) AS deltas
+        WHERE (total_bets, won_bets, lost_bets, void_bets, total_staked, total_won, net_profit)
+            <> (0, 0, 0, 0, 0, 0, 0)
+    $sql$, changed_rows);
+
     RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
--- Refresh stats when bets or balance changes
-CREATE TRIGGER refresh_customer_stats_on_bet
-AFTER INSERT OR UPDATE OR DELETE ON bets
-FOR EACH STATEMENT EXECUTE FUNCTION refresh_customer_stats();
+-- Transition tables require one trigger per event
+CREATE TRIGGER customer_stats_on_bet_insert
+AFTER INSERT ON bets
+REFERENCING NEW TABLE AS new_bets
+FOR EACH STATEMENT EXECUTE FUNCTION record_customer_stats_deltas();
+
+CREATE TRIGGER customer_stats_on_bet_update
+AFTER UPDATE ON bets
+REFERENCING OLD TABLE AS old_bets NEW TABLE AS new_bets
+FOR EACH STATEMENT EXECUTE FUNCTION record_customer_stats_deltas();
+
+CREATE TRIGGER customer_stats_on_bet_delete
+AFTER DELETE ON bets
+REFERENCING OLD TABLE AS old_bets
+FOR EACH STATEMENT EXECUTE FUNCTION record_customer_stats_deltas();
+
+-- Merge pending deltas into customer_stats_totals. Safe to run concurrently:
+-- each delta row is deleted (and therefore folded) by exactly one caller.
+CREATE OR REPLACE FUNCTION fold_customer_stats()
+RETURNS BIGINT AS $$
+DECLARE
+    folded BIGINT;
+BEGIN
+    WITH moved AS (
+        DELETE FROM customer_stats_deltas RETURNING *
+    ), summed AS (
+        SELECT
+            customer_id,
+            COUNT(*) AS delta_rows,
+            SUM(total_bets) AS total_bets,
+            SUM(won_bets) AS won_bets,
+            SUM(lost_bets) AS lost_bets,
+            SUM(void_bets) AS void_bets,
+            SUM(total_staked) AS total_staked,
+            SUM(total_won) AS total_won,
+            SUM(net_profit) AS net_profit
+        FROM moved
+        GROUP BY customer_id
+    ), merged AS (
+        INSERT INTO customer_stats_totals AS t (
+            customer_id, total_bets, won_bets, lost_bets, void_bets,
+            total_staked, total_won, net_profit
+        )
+        SELECT customer_id, total_bets, won_bets, lost_bets, void_bets,
+               total_staked, total_won, net_profit
+        FROM summed
+        WHERE EXISTS (SELECT 1 FROM customers c WHERE c.id = summed.customer_id)
+        ON CONFLICT (customer_id) DO UPDATE SET
+            total_bets = t.total_bets + EXCLUDED.total_bets,
+            won_bets = t.won_bets + EXCLUDED.won_bets,
+            lost_bets = t.lost_bets + EXCLUDED.lost_bets,
+            void_bets = t.void_bets + EXCLUDED.void_bets,
+            total_staked = t.total_staked + EXCLUDED.total_staked,
+            total_won = t.total_won + EXCLUDED.total_won,
+            net_profit = t.net_profit + EXCLUDED.net_profit
+    )
+    SELECT COALESCE(SUM(delta_rows), 0) INTO folded FROM summed;
+
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recompute customer_stats_totals from scratch. Blocks bet writes for the
+-- duration so no delta can slip in between the recompute and the swap.
+CREATE OR REPLACE FUNCTION rebuild_customer_stats()
+RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE bets IN SHARE MODE;
+
+    DELETE FROM customer_stats_deltas;
+    DELETE FROM customer_stats_totals;
+
+    INSERT INTO customer_stats_totals (
+        customer_id, total_bets, won_bets, lost_bets, void_bets,
+        total_staked, total_won, net_profit
+    )
+    SELECT customer_id, total_bets, won_bets, lost_bets, void_bets,
+           total_staked, total_won, net_profit
+    FROM customer_stats_recomputed
+    WHERE total_bets > 0;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Append signed event_positions deltas for the bets changed by a statement
+CREATE OR REPLACE FUNCTION record_event_positions_deltas()
+RETURNS TRIGGER AS $$
+DECLARE
+    changed_rows TEXT;
+BEGIN
+    changed_rows := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT 1 AS sign, * FROM new_bets'
+        WHEN 'DELETE' THEN 'SELECT -1 AS sign, * FROM old_bets'
+        ELSE 'SELECT -1 AS sign, * FROM old_bets UNION ALL SELECT 1 AS sign, * FROM new_bets'
+    END;
+
+    EXECUTE format($sql$
+        INSERT INTO event_positions_deltas (
+            event_id, bet_type, bookie, currency, open_bets, open_stake, potential_payout,
+            settled_bets, settled_stake, settled_payout
+        )
+        SELECT * FROM (
+            SELECT
+                event_id,
+                bet_type,
+                bookie,
+                (stake).currency,
+                SUM(CASE WHEN outcome IS NULL THEN sign ELSE 0 END) AS open_bets,
+                SUM(CASE WHEN outcome IS NULL THEN sign * (stake).amount ELSE 0 END) AS open_stake,
+                SUM(CASE WHEN outcome IS NULL THEN sign * (stake).amount * odds ELSE 0 END) AS potential_payout,
+                SUM(CASE WHEN outcome IS NOT NULL THEN sign ELSE 0 END) AS settled_bets,
+                SUM(CASE WHEN outcome IS NOT NULL THEN sign * (stake).amount ELSE 0 END) AS settled_stake,
+                SUM(sign * CASE outcome
+                    WHEN 'win' THEN (stake).amount * odds
+                    WHEN 'void' THEN (stake).amount
+                    ELSE 0 END) AS settled_payout
+            FROM (%s) AS changed
+            WHERE placement_status = 'placed'
+            GROUP BY event_id, bet_type, bookie, (stake).currency
+        ) AS deltas
+        WHERE (open_bets, open_stake, potential_payout, settled_bets, settled_stake, settled_payout)
+            <> (0, 0, 0, 0, 0, 0)
+    $sql$, changed_rows);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER event_positions_on_bet_insert
+AFTER INSERT ON bets
+REFERENCING NEW TABLE AS new_bets
+FOR EACH STATEMENT EXECUTE FUNCTION record_event_positions_deltas();
+
+CREATE TRIGGER event_positions_on_bet_update
+AFTER UPDATE ON bets
+REFERENCING OLD TABLE AS old_bets NEW TABLE AS new_bets
+FOR EACH STATEMENT EXECUTE FUNCTION record_event_positions_deltas();
+
+CREATE TRIGGER event_positions_on_bet_delete
+AFTER DELETE ON bets
+REFERENCING OLD TABLE AS old_bets
+FOR EACH STATEMENT EXECUTE FUNCTION record_event_positions_deltas();
+
+-- Merge pending deltas into event_positions_totals; see fold_customer_stats()
+CREATE OR REPLACE FUNCTION fold_event_positions()
+RETURNS BIGINT AS $$
+DECLARE
+    folded BIGINT;
+BEGIN
+    WITH moved AS (
+        DELETE FROM event_positions_deltas RETURNING *
+    ), summed AS (
+        SELECT
+            event_id,
+            bet_type,
+            bookie,
+            currency,
+            COUNT(*) AS delta_rows,
+            SUM(open_bets) AS open_bets,
+            SUM(open_stake) AS open_stake,
+            SUM(potential_payout) AS potential_payout,
+            SUM(settled_bets) AS settled_bets,
+            SUM(settled_stake) AS settled_stake,
+            SUM(settled_payout) AS settled_payout
+        FROM moved
+        GROUP BY event_id, bet_type, bookie, currency
+    ), merged AS (
+        INSERT INTO event_positions_totals AS t (
+            event_id, bet_type, bookie, currency, open_bets, open_stake, potential_payout,
+            settled_bets, settled_stake, settled_payout
+        )
+        SELECT event_id, bet_type, bookie, currency, open_bets, open_stake, potential_payout,
+               settled_bets, settled_stake, settled_payout
+        FROM summed
+        WHERE EXISTS (SELECT 1 FROM events e WHERE e.id = summed.event_id)
+        ON CONFLICT (event_id, bet_type, bookie, currency) DO UPDATE SET
+            open_bets = t.open_bets + EXCLUDED.open_bets,
+            open_stake = t.open_stake + EXCLUDED.open_stake,
+            potential_payout = t.potential_payout + EXCLUDED.potential_payout,
+            settled_bets = t.settled_bets + EXCLUDED.settled_bets,
+            settled_stake = t.settled_stake + EXCLUDED.settled_stake,
+            settled_payout = t.settled_payout + EXCLUDED.settled_payout
+    )
+    SELECT COALESCE(SUM(delta_rows), 0) INTO folded FROM summed;
+
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recompute event_positions_totals from scratch; see rebuild_customer_stats()
+CREATE OR REPLACE FUNCTION rebuild_event_positions()
+RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE bets IN SHARE MODE;
+
+    DELETE FROM event_positions_deltas;
+    DELETE FROM event_positions_totals;
+
+    INSERT INTO event_positions_totals (
+        event_id, bet_type, bookie, currency, open_bets, open_stake, potential_payout,
+        settled_bets, settled_stake, settled_payout
+    )
+    SELECT event_id, bet_type, bookie, currency, open_bets, open_stake, potential_payout,
+           settled_bets, settled_stake, settled_payout
+    FROM event_positions_recomputed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- P&L rollups: the same delta scheme as event positions, bucketed by the
+-- UTC hour each bet was placed in
+CREATE OR REPLACE FUNCTION record_pnl_hourly_deltas()
+RETURNS TRIGGER AS $$
+DECLARE
+    changed_rows TEXT;
+BEGIN
+    changed_rows := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT 1 AS sign, * FROM new_bets'
+        WHEN 'DELETE' THEN 'SELECT -1 AS sign, * FROM old_bets'
+        ELSE 'SELECT -1 AS sign, * FROM old_bets UNION ALL SELECT 1 AS sign, * FROM new_bets'
+    END;
+
+    EXECUTE format($sql$
+        INSERT INTO pnl_hourly_deltas (
+            bucket, event_id, sport, bookie, currency, bets, turnover, settled_bets, settled_stake, payout
+        )
+        SELECT * FROM (
+            SELECT
+                date_trunc('hour', created_at, 'UTC') AS bucket,
+                event_id,
+                sport,
+                bookie,
+                (stake).currency,
+                SUM(sign) AS bets,
+                SUM(sign * (stake).amount) AS turnover,
+                SUM(CASE WHEN outcome IS NOT NULL THEN sign ELSE 0 END) AS settled_bets,
+                SUM(CASE WHEN outcome IS NOT NULL THEN sign * (stake).amount ELSE 0 END) AS settled_stake,
+                SUM(sign * CASE outcome
+                    WHEN 'win' THEN (stake).amount * odds
+                    WHEN 'void' THEN (stake).amount
+                    ELSE 0 END) AS payout
+            FROM (%s) AS changed
+            WHERE placement_status = 'placed'
+            GROUP BY 1, event_id, sport, bookie, (stake).currency
+        ) AS deltas
+        WHERE (bets, turnover, settled_bets, settled_stake, payout) <> (0, 0, 0, 0, 0)
+    $sql$, changed_rows);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER pnl_hourly_on_bet_insert
+AFTER INSERT ON bets
+REFERENCING NEW TABLE AS new_bets
+FOR EACH STATEMENT EXECUTE FUNCTION record_pnl_hourly_deltas();
+
+CREATE TRIGGER pnl_hourly_on_bet_update
+AFTER UPDATE ON bets
+REFERENCING OLD TABLE AS old_bets NEW TABLE AS new_bets
+FOR EACH STATEMENT EXECUTE FUNCTION record_pnl_hourly_deltas();
+
+CREATE TRIGGER pnl_hourly_on_bet_delete
+AFTER DELETE ON bets
+REFERENCING OLD TABLE AS old_bets
+FOR EACH STATEMENT EXECUTE FUNCTION record_pnl_hourly_deltas();
+
+-- Merge pending deltas into pnl_hourly_totals; see fold_customer_stats().
+-- Backfills hold the pnl_hourly_totals advisory lock shared; while one runs
+-- the deltas are left for the next fold.
+CREATE OR REPLACE FUNCTION fold_pnl_hourly()
+RETURNS BIGINT AS $$
+DECLARE
+    folded BIGINT;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock('pnl_hourly_totals'::regclass::oid::bigint) THEN
+        RETURN 0;
+    END IF;
+
+    WITH moved AS (
+        DELETE FROM pnl_hourly_deltas RETURNING *
+    ), summed AS (
+        SELECT
+            bucket, event_id, sport, bookie, currency,
+            COUNT(*) AS delta_rows,
+            SUM(bets) AS bets,
+            SUM(turnover) AS turnover,
+            SUM(settled_bets) AS settled_bets,
+            SUM(settled_stake) AS settled_stake,
+            SUM(payout) AS payout
+        FROM moved
+        GROUP BY bucket, event_id, sport, bookie, currency
+    ), merged AS (
+        INSERT INTO pnl_hourly_totals AS t (
+            bucket, event_id, sport, bookie, currency, bets, turnover, settled_bets, settled_stake, payout
+        )
+        SELECT bucket, event_id, sport, bookie, currency, bets, turnover, settled_bets, settled_stake, payout
+        FROM summed
+        ON CONFLICT (bucket, event_id, sport, bookie, currency) DO UPDATE SET
+            bets = t.bets + EXCLUDED.bets,
+            turnover = t.turnover + EXCLUDED.turnover,
+            settled_bets = t.settled_bets + EXCLUDED.settled_bets,
+            settled_stake = t.settled_stake + EXCLUDED.settled_stake,
+            payout = t.payout + EXCLUDED.payout
+    )
+    SELECT COALESCE(SUM(delta_rows), 0) INTO folded FROM summed;
+
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recompute the buckets in [p_from, p_to) from bets, without locking bets.
+-- One statement, so one snapshot: the deltas it deletes are exactly those of
+-- the bet writes its recompute sees, and writes it does not see keep their
+-- deltas for the next fold. The shared advisory lock keeps folds out (they
+-- would move deltas into totals under it) while disjoint ranges run in
+-- parallel; concurrent calls must not overlap. Call it in READ COMMITTED so
+-- the snapshot is taken after the lock.
+CREATE OR REPLACE FUNCTION backfill_pnl_hourly(p_from TIMESTAMPTZ, p_to TIMESTAMPTZ)
+RETURNS BIGINT AS $$
+DECLARE
+    rebuilt_rows BIGINT;
+BEGIN
+    PERFORM pg_advisory_xact_lock_shared('pnl_hourly_totals'::regclass::oid::bigint);
+
+    WITH fenced AS (
+        DELETE FROM pnl_hourly_deltas WHERE bucket >= p_from AND bucket < p_to
+    ), rebuilt AS (
+        SELECT
+            date_trunc('hour', created_at, 'UTC') AS bucket,
+            event_id,
+            sport,
+            bookie,
+            (stake).currency AS currency,
+            COUNT(*) AS bets,
+            SUM((stake).amount) AS turnover,
+            COUNT(*) FILTER (WHERE outcome IS NOT NULL) AS settled_bets,
+            COALESCE(SUM((stake).amount) FILTER (WHERE outcome IS NOT NULL), 0) AS settled_stake,
+            COALESCE(SUM(CASE outcome
+                WHEN 'win' THEN (stake).amount * odds
+                WHEN 'void' THEN (stake).amount
+                ELSE 0 END), 0) AS payout
+        FROM bets
+        WHERE placement_status = 'placed' AND created_at >= p_from AND created_at < p_to
+        GROUP BY 1, event_id, sport, bookie, (stake).currency
+    ), stale AS (
+        DELETE FROM pnl_hourly_totals t
+        WHERE t.bucket >= p_from AND t.bucket < p_to
+          AND NOT EXISTS (
+              SELECT 1 FROM rebuilt r
+              WHERE (r.bucket, r.event_id, r.sport, r.bookie, r.currency)
+                  = (t.bucket, t.event_id, t.sport, t.bookie, t.currency)
+          )
+    ), upserted AS (
+        INSERT INTO pnl_hourly_totals AS t (
+            bucket, event_id, sport, bookie, currency, bets, turnover, settled_bets, settled_stake, payout
+        )
+        SELECT bucket, event_id, sport, bookie, currency, bets, turnover, settled_bets, settled_stake, payout
+        FROM rebuilt
+        ON CONFLICT (bucket, event_id, sport, bookie, currency) DO UPDATE SET
+            bets = EXCLUDED.bets,
+            turnover = EXCLUDED.turnover,
+            settled_bets = EXCLUDED.settled_bets,
+            settled_stake = EXCLUDED.settled_stake,
+            payout = EXCLUDED.payout
+        RETURNING 1
+    )
+    SELECT COUNT(*) INTO rebuilt_rows FROM upserted;
+
+    RETURN rebuilt_rows;
+END;
+$$ LANGUAGE plpgsql;
 
 -- Function to deduct stake when bet is placed
 CREATE OR REPLACE FUNCTION handle_bet_placement()
@@ -325,6 +1178,7 @@ $$ LANGUAGE plpgsql;
 CREATE TRIGGER handle_bet_placement_trigger
 AFTER INSERT ON bets
 FOR EACH ROW
+WHEN (NOT bulk_write_active())
 EXECUTE FUNCTION handle_bet_placement();
 
 -- Function to create balance change when bet outcome changes from NULL
@@ -381,19 +1235,34 @@ $$ LANGUAGE plpgsql;
 CREATE TRIGGER handle_bet_outcome_change_trigger
 AFTER UPDATE ON bets
 FOR EACH ROW 
-WHEN (OLD.outcome IS DISTINCT FROM NEW.outcome)
+WHEN (OLD.outcome IS DISTINCT FROM NEW.outcome AND NOT bulk_write_active())
 EXECUTE FUNCTION handle_bet_outcome_change();
 
 COMMENT ON TRIGGER validate_bet_placement_trigger ON bets IS 'Ensures bets can only be placed on non-finished events';
 COMMENT ON TRIGGER validate_bet_sport_trigger ON bets IS 'Ensures bet sport matches the event competition sport';
 COMMENT ON TRIGGER validate_event_teams_trigger ON events IS 'Ensures teams in an event play the same sport as the competition';
 COMMENT ON TRIGGER validate_bet_currency_trigger ON bets IS 'Ensures bet stakes use the same currency as the customer';
+COMMENT ON TRIGGER validate_bet_trigger ON bets IS 'Currency, placement and sport checks for bets in one lookup (replaces the three separate triggers)';
 COMMENT ON TRIGGER audit_events_trigger ON events IS 'Tracks all changes to events table for audit purposes';
 COMMENT ON TRIGGER audit_results_trigger ON results IS 'Tracks all changes to results table for audit purposes';
 COMMENT ON TRIGGER audit_customers_trigger ON customers IS 'Tracks all changes to customers table for audit purposes';
 COMMENT ON TRIGGER audit_balance_changes_trigger ON balance_changes IS 'Tracks all changes to balance_changes table for audit purposes';
 COMMENT ON TRIGGER audit_bets_trigger ON bets IS 'Tracks all changes to bets table for audit purposes';
+COMMENT ON TRIGGER audit_log_notify_changes ON audit_log IS 'Publishes audited changes on the change_feed NOTIFY channel';
 COMMENT ON TRIGGER validate_prematch_event_date_trigger ON events IS 'Ensures prematch events are scheduled in the future';
-COMMENT ON TRIGGER refresh_customer_stats_on_bet ON bets IS 'Refreshes materialized view when bets change';
+COMMENT ON TRIGGER customer_stats_on_bet_insert ON bets IS 'Appends customer_stats deltas for inserted bets';
+COMMENT ON TRIGGER customer_stats_on_bet_update ON bets IS 'Appends customer_stats deltas for updated bets';
+COMMENT ON TRIGGER customer_stats_on_bet_delete ON bets IS 'Appends customer_stats deltas for deleted bets';
+COMMENT ON TRIGGER event_positions_on_bet_insert ON bets IS 'Appends event_positions deltas for inserted bets';
+COMMENT ON TRIGGER event_positions_on_bet_update ON bets IS 'Appends event_positions deltas for updated bets';
+COMMENT ON TRIGGER event_positions_on_bet_delete ON bets IS 'Appends event_positions deltas for deleted bets';
+COMMENT ON TRIGGER pnl_hourly_on_bet_insert ON bets IS 'Appends pnl_hourly deltas for inserted bets';
+COMMENT ON TRIGGER pnl_hourly_on_bet_update ON bets IS 'Appends pnl_hourly deltas for updated bets';
+COMMENT ON TRIGGER pnl_hourly_on_bet_delete ON bets IS 'Appends pnl_hourly deltas for deleted bets';
 COMMENT ON TRIGGER handle_bet_placement_trigger ON bets IS 'Deducts stake from customer balance when bet is placed';
-COMMENT ON TRIGGER handle_bet_outcome_change_trigger ON bets IS 'Creates balance change when bet outcome changes from NULL to win/lose/void';
\ No newline at end of file
+COMMENT ON TRIGGER handle_bet_outcome_change_trigger ON bets IS 'Creates balance change when bet outcome changes from NULL to win/lose/void';
+
+-- Partitions for the current month and the next three; the maintenance job
+-- keeps creating them ahead of time
+SELECT ensure_monthly_partitions('audit_log');
+SELECT ensure_monthly_partitions('balance_changes');